@@ -1,14 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, JSONResponse
 from pydantic import BaseModel
 import secrets
 import os
+import json
+import asyncio
 import logging
+import threading
 import traceback
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
-import uvicorn
 
 # Configure logging
 logging.basicConfig(
@@ -17,20 +20,123 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from services.hysteria import HysteriaManager
-from services.vless import VLESSManager
-from services.openvpn import OpenVPNManager
-from services.routing import RoutingManager
+from services.managers import (
+    get_hysteria_manager, get_vless_manager, get_openvpn_manager,
+    get_routing_manager, get_vpn_health, get_vless_traffic, is_created, warm_up
+)
 from services.monitoring import monitoring_manager
+from services.hysteria_stats import hysteria_stats
+from services.shared_state import shared_monitoring
+from services.perf import PerfMiddleware, perf_recorder
+from services.commands import command_stats
+from services.profiler import sampling_profiler, dump_tasks
+from services.loop_monitor import loop_monitor
+from services.static import StaticBundle
+from services.alerts import alert_engine
+from services.conntrack import conntrack_collector
+from services.geoip import geoip_resolver
+from services.conditional import conditional_cache, make_etag, encoded_etag, matching_etag
+from services.serialization import EncodedBody, dumps
 from services.export import config_exporter
 from services.firewall import firewall_manager
+from services.interfaces import interface_cache
+from services.server_address import server_address
 from config import get_settings
 
+settings = get_settings()
+
+
+def start_background_tasks():
+    """Create managers and start background services (runs off the event loop)"""
+    warm_up()
+    from services.reality_keys import reality_key_pool
+    reality_key_pool.fill_async()
+    server_address.warm()
+    hysteria_mgr = get_hysteria_manager()
+    if hysteria_mgr.config_path.exists():
+        hysteria_mgr.certs.ensure_async()
+
+
+def start_leader_tasks():
+    """Pollers that must run once per host, not once per worker"""
+    get_vless_traffic().start()
+    get_openvpn_manager().management.start()
+    if settings.VPN_PROBE_ENABLED:
+        get_vpn_health().start()
+
+
+# Sampled by the leader worker every MONITORING_INTERVAL and served to all
+# workers from the shared snapshot ('stats' first: it takes the sample)
+shared_monitoring.register('stats', monitoring_manager.get_system_stats)
+shared_monitoring.register('history', monitoring_manager.get_historical_data,
+                           {'bandwidth': [], 'cpu': [], 'memory': [], 'hysteria': []})
+shared_monitoring.register('hysteria', hysteria_stats.get_stats)
+shared_monitoring.register('metrics', monitoring_manager.get_prometheus_metrics, '')
+shared_monitoring.register('vless_traffic', lambda: get_vless_traffic().get_usage())
+shared_monitoring.register('vpn_health', lambda: get_vpn_health().get_health(), {'pending': True, 'score': None})
+shared_monitoring.register('openvpn', lambda: get_openvpn_manager().get_tunnel_stats())
+if settings.CONNTRACK_ENABLED:
+    shared_monitoring.register('talkers', conntrack_collector.get_talkers,
+                               {'pending': True, 'services': {}, 'talkers': []})
+if settings.ALERTS_ENABLED:
+    # Last: rules are evaluated against the sample 'stats' just took
+    shared_monitoring.register('alerts', alert_engine.evaluate,
+                               {'pending': True, 'firing': [], 'rules': [], 'events': []})
+shared_monitoring.on_elected(start_leader_tasks)
+
+
+def stop_background_tasks():
+    shared_monitoring.stop()
+    if is_created('vpn_health'):
+        get_vpn_health().stop()
+    if is_created('vless_traffic'):
+        get_vless_traffic().stop()
+    if is_created('openvpn'):
+        get_openvpn_manager().management.stop()
+    interface_cache.stop()
+
+
+def _log_warm_up_failure(future: asyncio.Future) -> None:
+    error = None if future.cancelled() else future.exception()
+    if error is not None:
+        stack = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+        logger.error(f"Background warm-up failed, background services not started: {error}\n{stack}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve immediately; anything a request needs before warm-up finishes
+    # is created on demand by the manager getters
+    interface_cache.start()
+    shared_monitoring.start()
+    loop_monitor.start()
+    warm = asyncio.get_running_loop().run_in_executor(None, start_background_tasks)
+    warm.add_done_callback(_log_warm_up_failure)
+    try:
+        yield
+    finally:
+        try:
+            await warm
+        except Exception:
+            pass  # already logged
+        loop_monitor.stop()
+        stop_background_tasks()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="ProxyVault API",
     description="Multi-Protocol Proxy Manager with OpenVPN Routing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -42,24 +148,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms (outermost, so it times the whole stack)
+app.add_middleware(PerfMiddleware)
+
 # Security
 security = HTTPBasic()
-settings = get_settings()
 
-# Service managers
-hysteria_mgr = HysteriaManager()
-vless_mgr = VLESSManager()
-openvpn_mgr = OpenVPNManager()
-routing_mgr = RoutingManager()
-
-# Mount static files (frontend)
-# Check if frontend directory exists relative to backend
+# Mount static files (frontend): hashed, precompressed and cached in memory,
+# read on the first request (see services/static.py)
 import pathlib
 frontend_path = pathlib.Path(__file__).parent.parent / "frontend"
-if frontend_path.exists():
-    app.mount("/static", StaticFiles(directory=str(frontend_path)), name="static")
-else:
-    print(f"Warning: Frontend directory not found at {frontend_path}")
+app.mount("/static", StaticBundle(frontend_path), name="static")
 
 
 # Authentication
@@ -75,6 +174,30 @@ def verify_credentials(credentials: HTTPBasicCredentials = Depends(security)):
     return credentials.username
 
 
+# Pre-serialized JSON, gzipped (once per body) for clients that accept it
+def json_response(request: Request, body: EncodedBody, headers: Optional[Dict[str, str]] = None) -> Response:
+    content, encoding = body.negotiate(request.headers.get("accept-encoding", ""))
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        if "ETag" in headers:
+            headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+# Conditional GET: the ETag comes from a cheap version of the content, so an
+# unchanged poll is answered with 304 before the content is built. The gzip
+# body's ETag gets a "-gzip" suffix; a revalidation matches on the base hash
+# and the 304 repeats the tag the client holds.
+def conditional_json(request: Request, version, build, *key) -> Response:
+    etag = make_etag(request.url.path, *key, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched:
+        return Response(status_code=304, headers={**headers, "ETag": matched, "Vary": "Accept-Encoding"})
+    return json_response(request, conditional_cache.get_body(etag, build), headers)
+
+
 # Pydantic models
 class HysteriaConfig(BaseModel):
     port: int = 36712
@@ -87,6 +210,7 @@ class HysteriaConfig(BaseModel):
     port_start: Optional[int] = 20000
     port_end: Optional[int] = 30000
     port_hop_interval: Optional[str] = None  # e.g., "30s", "1m", "5m"
+    auth_type: str = "password"  # "password" (shared) or "http" (per-user)
 
 
 class VLESSConfig(BaseModel):
@@ -99,6 +223,17 @@ class VLESSConfig(BaseModel):
     short_ids: list[str] = [""]
 
 
+class HysteriaUser(BaseModel):
+    name: str
+    password: Optional[str] = None
+
+
+class VLESSUser(BaseModel):
+    email: str
+    uuid: Optional[str] = None
+    quota_gb: Optional[float] = None  # overrides VLESS_USER_QUOTA_GB
+
+
 class OpenVPNConfig(BaseModel):
     config_content: str
     username: Optional[str] = None
@@ -124,18 +259,19 @@ async def root():
 async def get_status():
     """Get status of all services"""
     return {
-        "hysteria": hysteria_mgr.get_status(),
-        "vless": vless_mgr.get_status(),
-        "openvpn": openvpn_mgr.get_status(),
-        "routing": routing_mgr.is_routing_enabled()
+        "hysteria": get_hysteria_manager().get_status(),
+        "vless": get_vless_manager().get_status(),
+        "openvpn": {**get_openvpn_manager().get_status(), "health_score": shared_monitoring.get('vpn_health')['score']},
+        "routing": get_routing_manager().is_routing_enabled()
     }
 
 
 # Hysteria endpoints
 @app.get("/api/hysteria/config", dependencies=[Depends(verify_credentials)])
-async def get_hysteria_config():
+async def get_hysteria_config(request: Request):
     """Get current Hysteria configuration"""
-    return hysteria_mgr.get_config()
+    manager = get_hysteria_manager()
+    return conditional_json(request, manager.get_config_version(), manager.get_config)
 
 
 @app.post("/api/hysteria/config", dependencies=[Depends(verify_credentials)])
@@ -143,7 +279,7 @@ async def update_hysteria_config(config: HysteriaConfig):
     """Update Hysteria configuration"""
     try:
         logger.info(f"Updating Hysteria config: port={config.port}, port_hopping={config.port_hopping_enabled}")
-        hysteria_mgr.update_config(config.model_dump())
+        get_hysteria_manager().update_config(config.model_dump())
         logger.info("Hysteria config updated successfully")
         return {"status": "success", "message": "Hysteria configuration updated"}
     except Exception as e:
@@ -157,7 +293,7 @@ async def control_hysteria_service(action: ServiceAction):
     """Control Hysteria service (start/stop/restart)"""
     try:
         logger.info(f"Controlling Hysteria service: action={action.action}")
-        result = hysteria_mgr.control_service(action.action)
+        result = get_hysteria_manager().control_service(action.action)
         logger.info(f"Hysteria service {action.action} successful")
         return {"status": "success", "action": action.action, "result": result}
     except Exception as e:
@@ -166,11 +302,89 @@ async def control_hysteria_service(action: ServiceAction):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/hysteria/users", dependencies=[Depends(verify_credentials)])
+async def list_hysteria_users():
+    """List Hysteria users (used in HTTP auth mode)"""
+    users = get_hysteria_manager().list_users()
+    return {"users": users, "count": len(users)}
+
+
+@app.post("/api/hysteria/users", dependencies=[Depends(verify_credentials)])
+async def add_hysteria_user(user: HysteriaUser):
+    """Add a Hysteria user"""
+    try:
+        created = get_hysteria_manager().add_user(user.name, user.password)
+        logger.info(f"Added Hysteria user {created['name']}")
+        return {"status": "success", "user": created}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/hysteria/users/{name}", dependencies=[Depends(verify_credentials)])
+async def remove_hysteria_user(name: str):
+    """Remove a Hysteria user"""
+    try:
+        removed = get_hysteria_manager().remove_user(name)
+        logger.info(f"Removed Hysteria user {removed['name']}")
+        return {"status": "success", "user": removed}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="User not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/hysteria/users/{name}/disable", dependencies=[Depends(verify_credentials)])
+async def disable_hysteria_user(name: str):
+    """Disable a Hysteria user without deleting it"""
+    try:
+        return {"status": "success", "user": get_hysteria_manager().set_user_enabled(name, False)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="User not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/hysteria/users/{name}/enable", dependencies=[Depends(verify_credentials)])
+async def enable_hysteria_user(name: str):
+    """Re-enable a disabled Hysteria user"""
+    try:
+        return {"status": "success", "user": get_hysteria_manager().set_user_enabled(name, True)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="User not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Hysteria HTTP auth callback: called by hysteria-server for every new
+# connection, so it skips Basic auth and pydantic and answers from memory
+AUTH_REJECTED = b'{"ok":false,"id":""}'
+
+
+@app.post("/internal/hysteria/auth", include_in_schema=False)
+async def hysteria_auth(request: Request):
+    if request.client is None or request.client.host not in ("127.0.0.1", "::1"):
+        return Response(status_code=403)
+    try:
+        payload = json.loads(await request.body())
+        user_id = get_hysteria_manager().authenticate(payload["auth"])
+    except (ValueError, KeyError, TypeError):
+        user_id = None
+    if user_id is None:
+        return Response(content=AUTH_REJECTED, media_type="application/json")
+    return Response(
+        content=b'{"ok":true,"id":' + json.dumps(user_id).encode() + b'}',
+        media_type="application/json"
+    )
+
+
 # VLESS endpoints
 @app.get("/api/vless/config", dependencies=[Depends(verify_credentials)])
-async def get_vless_config():
+async def get_vless_config(request: Request):
     """Get current VLESS configuration"""
-    return vless_mgr.get_config()
+    manager = get_vless_manager()
+    return conditional_json(request, manager.get_config_version(), manager.get_config)
 
 
 @app.post("/api/vless/config", dependencies=[Depends(verify_credentials)])
@@ -178,7 +392,7 @@ async def update_vless_config(config: VLESSConfig):
     """Update VLESS configuration"""
     try:
         logger.info(f"Updating VLESS config: port={config.port}, uuid={config.uuid[:8]}...")
-        vless_mgr.update_config(config.model_dump())
+        get_vless_manager().update_config(config.model_dump())
         logger.info("VLESS config updated successfully")
         return {"status": "success", "message": "VLESS configuration updated"}
     except Exception as e:
@@ -192,7 +406,7 @@ async def control_vless_service(action: ServiceAction):
     """Control VLESS service (start/stop/restart)"""
     try:
         logger.info(f"Controlling VLESS service: action={action.action}")
-        result = vless_mgr.control_service(action.action)
+        result = get_vless_manager().control_service(action.action)
         logger.info(f"VLESS service {action.action} successful")
         return {"status": "success", "action": action.action, "result": result}
     except Exception as e:
@@ -205,24 +419,102 @@ async def control_vless_service(action: ServiceAction):
 async def generate_vless_keys():
     """Generate new Reality key pair"""
     try:
-        keys = vless_mgr.generate_reality_keys()
+        keys = get_vless_manager().generate_reality_keys()
         return {"status": "success", "keys": keys}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/vless/users", dependencies=[Depends(verify_credentials)])
+async def list_vless_users():
+    """List VLESS users"""
+    users = get_vless_manager().list_users()
+    return {"users": users, "count": len(users)}
+
+
+@app.post("/api/vless/users", dependencies=[Depends(verify_credentials)])
+async def add_vless_user(user: VLESSUser):
+    """Add a VLESS user"""
+    try:
+        quota_bytes = int(user.quota_gb * 1024 ** 3) if user.quota_gb else None
+        created = get_vless_manager().add_user(user.email, user.uuid, quota_bytes)
+        logger.info(f"Added VLESS user {created['email']}")
+        return {"status": "success", "user": created}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/vless/users/{user_id}", dependencies=[Depends(verify_credentials)])
+async def remove_vless_user(user_id: str):
+    """Remove a VLESS user"""
+    try:
+        removed = get_vless_manager().remove_user(user_id)
+        logger.info(f"Removed VLESS user {removed['email']}")
+        return {"status": "success", "user": removed}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="User not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/vless/users/{user_id}/disable", dependencies=[Depends(verify_credentials)])
+async def disable_vless_user(user_id: str):
+    """Disable a VLESS user without deleting it"""
+    try:
+        return {"status": "success", "user": get_vless_manager().set_user_enabled(user_id, False)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="User not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/vless/users/{user_id}/enable", dependencies=[Depends(verify_credentials)])
+async def enable_vless_user(user_id: str):
+    """Re-enable a disabled VLESS user"""
+    try:
+        return {"status": "success", "user": get_vless_manager().set_user_enabled(user_id, True)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="User not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/vless/traffic", dependencies=[Depends(verify_credentials)])
+async def get_vless_traffic_usage(request: Request):
+    """Get per-user VLESS traffic totals and quota events"""
+    return json_response(request, shared_monitoring.get_encoded('vless_traffic'))
+
+
+@app.post("/api/vless/users/{user_id}/reset-traffic", dependencies=[Depends(verify_credentials)])
+async def reset_vless_user_traffic(user_id: str):
+    """Reset a VLESS user's traffic counters"""
+    user = get_vless_manager().users.get(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if get_vless_traffic().reset(user['email']):
+        return {"status": "success", "usage": get_vless_traffic().get_usage(user['email'])}
+    # Another worker runs the poller and applies it on its next poll
+    return {"status": "queued", "email": user['email']}
+
+
 # OpenVPN endpoints
 @app.get("/api/openvpn/config", dependencies=[Depends(verify_credentials)])
 async def get_openvpn_config():
     """Get current OpenVPN configuration status"""
-    return openvpn_mgr.get_config()
+    return get_openvpn_manager().get_config()
 
 
 @app.post("/api/openvpn/config", dependencies=[Depends(verify_credentials)])
 async def update_openvpn_config(config: OpenVPNConfig):
     """Upload OpenVPN configuration"""
     try:
-        openvpn_mgr.update_config(
+        get_openvpn_manager().update_config(
             config.config_content,
             config.username,
             config.password
@@ -236,19 +528,25 @@ async def update_openvpn_config(config: OpenVPNConfig):
 async def control_openvpn_service(action: ServiceAction):
     """Control OpenVPN service (start/stop/restart)"""
     try:
-        result = openvpn_mgr.control_service(action.action)
+        result = get_openvpn_manager().control_service(action.action)
         return {"status": "success", "action": action.action, "result": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/openvpn/stats", dependencies=[Depends(verify_credentials)])
+async def get_openvpn_stats(request: Request):
+    """Get live tunnel stats from the OpenVPN management interface"""
+    return json_response(request, shared_monitoring.get_encoded('openvpn'))
+
+
 # Routing endpoints
 @app.get("/api/routing/status", dependencies=[Depends(verify_credentials)])
 async def get_routing_status():
     """Get traffic routing status"""
     return {
-        "enabled": routing_mgr.is_routing_enabled(),
-        "rules": routing_mgr.get_routing_rules()
+        "enabled": get_routing_manager().is_routing_enabled(),
+        "rules": get_routing_manager().get_routing_rules()
     }
 
 
@@ -256,7 +554,7 @@ async def get_routing_status():
 async def enable_routing():
     """Enable traffic routing through OpenVPN"""
     try:
-        routing_mgr.enable_routing()
+        get_routing_manager().enable_routing()
         return {"status": "success", "message": "Traffic routing enabled"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -266,7 +564,7 @@ async def enable_routing():
 async def disable_routing():
     """Disable traffic routing"""
     try:
-        routing_mgr.disable_routing()
+        get_routing_manager().disable_routing()
         return {"status": "success", "message": "Traffic routing disabled"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -295,15 +593,31 @@ async def get_system_info():
 
 # Monitoring endpoints
 @app.get("/api/monitoring/stats", dependencies=[Depends(verify_credentials)])
-async def get_monitoring_stats():
-    """Get comprehensive system statistics"""
-    return monitoring_manager.get_system_stats()
+async def get_monitoring_stats(request: Request):
+    """Get comprehensive system statistics (latest sample)"""
+    return json_response(request, shared_monitoring.get_encoded('stats'))
 
 
 @app.get("/api/monitoring/history", dependencies=[Depends(verify_credentials)])
-async def get_monitoring_history():
-    """Get historical monitoring data"""
-    return monitoring_manager.get_historical_data()
+async def get_monitoring_history(request: Request, since: Optional[float] = None):
+    """Get historical monitoring data
+
+    ``since`` is the ``cursor`` of a previous response: only newer points
+    are returned.
+    """
+    def build():
+        history = shared_monitoring.get('history')
+        points = {
+            name: [p for p in series if since is None or p.get('t', 0) > since]
+            for name, series in history.items()
+        }
+        latest = [series[-1].get('t', 0) for series in history.values() if series]
+        return {**points, "cursor": max(latest, default=since or 0)}
+
+    version = shared_monitoring.get_version()
+    if version is None:
+        return build()
+    return conditional_json(request, version, build, since)
 
 
 @app.get("/api/monitoring/connections", dependencies=[Depends(verify_credentials)])
@@ -330,6 +644,91 @@ async def get_uptime():
     return monitoring_manager.get_uptime()
 
 
+@app.get("/api/monitoring/hysteria", dependencies=[Depends(verify_credentials)])
+async def get_hysteria_stats(request: Request):
+    """Get per-user Hysteria traffic rates and online clients"""
+    return json_response(request, shared_monitoring.get_encoded('hysteria'))
+
+
+@app.get("/metrics", dependencies=[Depends(verify_credentials)], response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Prometheus metrics (scrape with basic_auth)"""
+    # Loop lag is per worker: it describes the process that answered
+    return shared_monitoring.get('metrics') + loop_monitor.get_prometheus_metrics()
+
+
+@app.get("/api/monitoring/vpn-health", dependencies=[Depends(verify_credentials)])
+async def get_vpn_health_status(request: Request):
+    """Get VPN tunnel health, probe history and failover events"""
+    return json_response(request, shared_monitoring.get_encoded('vpn_health'))
+
+
+@app.get("/api/monitoring/sampler", dependencies=[Depends(verify_credentials)])
+async def get_sampler_info():
+    """Get which worker runs the monitoring sampler and the snapshot age"""
+    return shared_monitoring.get_info()
+
+
+@app.get("/api/monitoring/alerts", dependencies=[Depends(verify_credentials)])
+async def get_alerts(request: Request):
+    """Get alert rules, firing alerts and recent fired/resolved events"""
+    if not settings.ALERTS_ENABLED:
+        return {"enabled": False, "firing": [], "rules": [], "events": []}
+    return json_response(request, shared_monitoring.get_encoded('alerts'))
+
+
+@app.get("/api/monitoring/talkers", dependencies=[Depends(verify_credentials)])
+def get_top_talkers(request: Request, limit: Optional[int] = None):
+    """Get the client IPs moving the most bytes through the proxy ports"""
+    if not settings.CONNTRACK_ENABLED:
+        return {"enabled": False, "services": {}, "talkers": []}
+    if limit is None:
+        return json_response(request, shared_monitoring.get_encoded('talkers'))
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    talkers = shared_monitoring.get('talkers')
+    return {**talkers, "talkers": talkers['talkers'][:limit]}
+
+
+@app.get("/api/monitoring/talkers/{client}", dependencies=[Depends(verify_credentials)])
+def get_client_flows(client: str, limit: int = 200):
+    """Get the proxy flows of one client IP, largest first"""
+    try:
+        return conntrack_collector.get_client_flows(client, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/monitoring/geoip", dependencies=[Depends(verify_credentials)])
+async def get_geoip_info():
+    """Get the GeoIP database in use (path, range counts, build time)"""
+    return geoip_resolver.get_info()
+
+
+@app.get("/api/monitoring/geoip/{ip}", dependencies=[Depends(verify_credentials)])
+async def lookup_geoip(ip: str):
+    """Get the country and ASN of an IP from the local GeoIP database"""
+    try:
+        return {"ip": ip, "geo": geoip_resolver.lookup(ip)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/monitoring/loop", dependencies=[Depends(verify_credentials)])
+async def get_loop_lag():
+    """Event-loop lag histogram and recent stalls of the answering worker"""
+    return {"pid": os.getpid(), **loop_monitor.get_stats()}
+
+
+@app.delete("/api/monitoring/loop", dependencies=[Depends(verify_credentials)])
+async def reset_loop_lag():
+    """Reset the event-loop lag histogram and stall log"""
+    loop_monitor.reset()
+    return {"status": "success"}
+
+
 @app.get("/api/monitoring/process/{service}", dependencies=[Depends(verify_credentials)])
 async def get_process_info(service: str):
     """Get process information for a service"""
@@ -348,7 +747,7 @@ async def get_process_info(service: str):
 
 
 @app.get("/api/logs/{service}", dependencies=[Depends(verify_credentials)])
-async def get_service_logs(service: str, lines: int = 50):
+async def get_service_logs(request: Request, service: str, lines: int = 50):
     """Get recent logs for a service"""
     service_map = {
         'hysteria': settings.HYSTERIA_SERVICE,
@@ -362,15 +761,14 @@ async def get_service_logs(service: str, lines: int = 50):
         raise HTTPException(status_code=404, detail="Service not found")
     
     logs = monitoring_manager.get_service_logs(service_name, lines)
-    return {"service": service, "logs": logs}
+    return json_response(request, EncodedBody.of({"service": service, "logs": logs}))
 
 
 # Export endpoints
-@app.get("/api/export/hysteria", dependencies=[Depends(verify_credentials)])
-async def export_hysteria_config():
-    """Export Hysteria configuration for client apps"""
+def _export_hysteria(user: Optional[str]) -> Dict[str, Any]:
+    """Hysteria client configs (for one user, or the shared password)"""
     try:
-        hysteria_config = hysteria_mgr.get_config()
+        hysteria_config = get_hysteria_manager().get_config()
         if not hysteria_config.get('configured'):
             raise HTTPException(status_code=404, detail="Hysteria not configured yet")
         
@@ -381,8 +779,15 @@ async def export_hysteria_config():
         config = hysteria_config['config']
         port_str = config.get('listen', ':36712').replace(':', '')
         
+        password = config.get('auth', {}).get('password', '')
+        if user or config.get('auth', {}).get('type') == 'http':
+            stored = get_hysteria_manager().users.get(user or 'default')
+            if not stored:
+                raise HTTPException(status_code=404, detail="User not found")
+            password = stored['password']
+        
         export_data = {
-            'password': config.get('auth', {}).get('password', ''),
+            'password': password,
             'bandwidth_up': config.get('bandwidth', {}).get('up', '100 mbps'),
             'bandwidth_down': config.get('bandwidth', {}).get('down', '100 mbps'),
             'obfs': config.get('obfs', {}).get('salamander', {}).get('password')
@@ -404,15 +809,16 @@ async def export_hysteria_config():
             "server_ip": server_ip,
             "formats": result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/export/vless", dependencies=[Depends(verify_credentials)])
-async def export_vless_config():
-    """Export VLESS configuration for client apps"""
+def _export_vless(user: Optional[str]) -> Dict[str, Any]:
+    """VLESS client configs (for one user by UUID, or the default client)"""
     try:
-        vless_config = vless_mgr.get_config()
+        vless_config = get_vless_manager().get_config()
         if not vless_config.get('configured'):
             raise HTTPException(status_code=404, detail="VLESS not configured yet")
         
@@ -424,11 +830,18 @@ async def export_vless_config():
         inbound = config['inbounds'][0]
         reality = inbound['streamSettings']['realitySettings']
         
+        user_id = inbound['settings']['clients'][0]['id']
+        if user:
+            stored = get_vless_manager().users.get(user)
+            if not stored:
+                raise HTTPException(status_code=404, detail="User not found")
+            user_id = stored['uuid']
+        
         export_data = {
             'port': inbound['port'],
-            'uuid': inbound['settings']['clients'][0]['id'],
+            'uuid': user_id,
             'reality_server_names': reality['serverNames'],
-            'public_key': reality['privateKey']  # Note: We need to derive public from private
+            'public_key': get_vless_manager().get_public_key(reality['privateKey'])
         }
         
         result = config_exporter.export_vless(export_data, server_ip)
@@ -437,25 +850,124 @@ async def export_vless_config():
             "server_ip": server_ip,
             "formats": result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/export/hysteria", dependencies=[Depends(verify_credentials)])
+async def export_hysteria_config(request: Request, user: Optional[str] = None):
+    """Export Hysteria configuration for client apps (optionally for one user)"""
+    version = (get_hysteria_manager().get_config_version(), config_exporter.get_server_ip())
+    return conditional_json(request, version, lambda: _export_hysteria(user), user)
+
+
+@app.get("/api/export/vless", dependencies=[Depends(verify_credentials)])
+async def export_vless_config(request: Request, user: Optional[str] = None):
+    """Export VLESS configuration for client apps (optionally for one user by UUID)"""
+    version = (get_vless_manager().get_config_version(), config_exporter.get_server_ip())
+    return conditional_json(request, version, lambda: _export_vless(user), user)
+
+
+# Debug endpoints
+@app.get("/api/debug/perf", dependencies=[Depends(verify_credentials)])
+async def get_perf_stats(limit: int = 20):
+    """Top routes by total time and the external commands they ran (this worker)"""
+    return {
+        "pid": os.getpid(),
+        "routes": perf_recorder.get_routes(limit),
+        "commands": command_stats.get_stats()[:limit]
+    }
+
+
+@app.get("/api/debug/commands", dependencies=[Depends(verify_credentials)])
+async def get_command_trace(
+    command: Optional[str] = None,
+    min_ms: float = 0,
+    failed: bool = False,
+    limit: int = 100
+):
+    """Recent external commands (argv, duration, exit code, stderr) and per-binary totals"""
+    return {
+        "pid": os.getpid(),
+        "capacity": command_stats.trace.maxlen,
+        "commands": command_stats.get_trace(command, min_ms, failed, limit),
+        "binaries": command_stats.get_stats()
+    }
+
+
+@app.get("/api/debug/profile", dependencies=[Depends(verify_credentials)])
+async def profile_process(
+    seconds: float = 5,
+    interval_ms: float = 10,
+    idle: bool = False,
+    tasks: bool = False,
+    format: str = "json"
+):
+    """Sample every thread's stack for a few seconds (collapsed-stack output)
+
+    ``format=collapsed`` returns plain text for flamegraph.pl / speedscope.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            None, sampling_profiler.profile,
+            seconds, interval_ms / 1000, idle, threading.get_ident()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "collapsed":
+        return PlainTextResponse(result["collapsed"] + "\n")
+    result["pid"] = os.getpid()
+    if tasks:
+        result["tasks"] = dump_tasks(loop)
+    return result
+
+
+@app.delete("/api/debug/perf", dependencies=[Depends(verify_credentials)])
+async def reset_perf_stats():
+    """Reset route and command statistics"""
+    perf_recorder.reset()
+    command_stats.reset()
+    return {"status": "success"}
+
+
 # Firewall management endpoints
 @app.get("/api/firewall/status", dependencies=[Depends(verify_credentials)])
-async def get_firewall_status():
+async def get_firewall_status(request: Request):
     """Get firewall status and rules"""
-    return {
+    return conditional_json(request, firewall_manager.get_version(), lambda: {
         "available": firewall_manager.ufw_available,
         "enabled": firewall_manager.is_ufw_enabled(),
         "rules": firewall_manager.get_rules()
-    }
+    })
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=settings.API_PORT,
-        reload=True
-    )
+    import argparse
+    import uvicorn
+    parser = argparse.ArgumentParser(description="ProxyVault API server")
+    parser.add_argument("--production", action="store_true",
+                        help="run several workers without auto-reload")
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS,
+                        help="worker processes in production mode (0 = one per CPU)")
+    args = parser.parse_args()
+    
+    if args.production:
+        uvicorn.run(
+            "app:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            workers=args.workers or os.cpu_count() or 1
+        )
+    else:
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=settings.API_PORT,
+            reload=True
+        )
@@ -0,0 +1,404 @@
+# Endpoint latency benchmark against the app running on mock managers
+#
+# Starts app.py in a child process with the managers from mock_services.py
+# and all state in a temp dir (no root, systemd or network needed), drives
+# concurrent keep-alive load at each endpoint and reports p50/p95/p99
+# latency, throughput and the server's event-loop lag. With --fake-tools the
+# real managers run instead, against the fake systemctl/ss/iptables/ufw/...
+# from fake_tools.py.
+#
+# Usage (from backend/):
+#   python benchmarks/endpoints.py
+#   python benchmarks/endpoints.py --save baseline.json
+#   python benchmarks/endpoints.py --compare baseline.json --threshold 20
+#   python benchmarks/endpoints.py --fake-tools --tool-latency 20
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+USERNAME, PASSWORD = "admin", "admin123"
+
+# Configs posted once before the run, so the exports measure a real export
+SEED = ("hysteria_config_post", "vless_config_post")
+
+# name -> (method, path, JSON body)
+ENDPOINTS = {
+    "root": ("GET", "/", None),
+    "status": ("GET", "/api/status", None),
+    "monitoring_stats": ("GET", "/api/monitoring/stats", None),
+    "monitoring_history": ("GET", "/api/monitoring/history", None),
+    "monitoring_traffic": ("GET", "/api/monitoring/traffic", None),
+    "monitoring_interfaces": ("GET", "/api/monitoring/interfaces", None),
+    "metrics": ("GET", "/metrics", None),
+    "connections": ("GET", "/api/monitoring/connections", None),
+    "process": ("GET", "/api/monitoring/process/hysteria", None),
+    "logs": ("GET", "/api/logs/hysteria?lines=100", None),
+    "routing_status": ("GET", "/api/routing/status", None),
+    "firewall_status": ("GET", "/api/firewall/status", None),
+    "export_hysteria": ("GET", "/api/export/hysteria", None),
+    "export_vless": ("GET", "/api/export/vless", None),
+    "hysteria_config_post": ("POST", "/api/hysteria/config", {
+        "port": 36712, "password": "bench_password", "bandwidth_up": "100 mbps"
+    }),
+    "vless_config_post": ("POST", "/api/vless/config", {
+        "port": 8443, "uuid": "00000000-0000-4000-8000-000000000000"
+    }),
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# --- Server side (child process) ---
+
+class LoopLagProbe:
+    """Measures how late asyncio.sleep() wakes up on the server's loop"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task = None
+
+    def reset(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self.samples = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def summary(self) -> Dict[str, float]:
+        samples = [s * 1000 for s in self.samples]
+        return {
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p99_ms": round(percentile(samples, 99), 3),
+            "max_ms": round(max(samples, default=0.0), 3),
+        }
+
+
+def serve(port: int, env: Dict[str, str], use_mocks: bool) -> None:
+    """Child process: run app.py on mock managers (or real ones on fake tools)"""
+    os.environ.update(env)
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, str(BACKEND_DIR))
+    # Mocks print every call; keep the benchmark output readable
+    sys.stdout = open(os.devnull, "w")
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    import uvicorn
+    import app as app_module
+    from services import managers
+    from mock_services import (
+        MockHysteriaManager, MockVLESSManager, MockOpenVPNManager, MockRoutingManager
+    )
+
+    if use_mocks:
+        managers.override("hysteria", MockHysteriaManager())
+        managers.override("vless", MockVLESSManager())
+        managers.override("openvpn", MockOpenVPNManager())
+        managers.override("routing", MockRoutingManager())
+        app_module.firewall_manager.ufw_available = False
+
+    probe = LoopLagProbe()
+
+    @app_module.app.post("/__bench__/lag/reset", include_in_schema=False)
+    async def reset_lag():
+        probe.reset()
+        return {"status": "ok"}
+
+    @app_module.app.get("/__bench__/lag", include_in_schema=False)
+    async def get_lag():
+        return probe.summary()
+
+    # The clients keep their connections for the whole run, idle while
+    # slow requests on the other connections finish
+    uvicorn.run(app_module.app, host="127.0.0.1", port=port,
+                log_level="error", access_log=False, timeout_keep_alive=300)
+
+
+# --- Client side ---
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client (keeps client overhead low)"""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+        auth = base64.b64encode(f"{USERNAME}:{PASSWORD}".encode()).decode()
+        self.headers = f"Host: {host}:{port}\r\nAuthorization: Basic {auth}\r\n"
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None):
+        """Send a request; returns (status, response body)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {path} HTTP/1.1\r\n{self.headers}"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode() + b"\r\n" + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and value == "chunked":
+                chunked = True
+            elif name == "connection" and value == "close":
+                close = True
+
+        data = b""
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                data += (await self.reader.readexactly(size + 2))[:-2]
+                if size == 0:
+                    break
+        elif length:
+            data = await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status, data
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def run_endpoint(port: int, method: str, path: str, body: Optional[Dict[str, Any]],
+                       concurrency: int, duration: float, warmup: int) -> Dict[str, Any]:
+    payload = json.dumps(body).encode() if body is not None else None
+    control = Connection("127.0.0.1", port)
+    connections = [Connection("127.0.0.1", port) for _ in range(concurrency)]
+
+    for conn in connections[:warmup]:
+        await conn.request(method, path, payload)
+    await control.request("POST", "/__bench__/lag/reset", b"{}")
+
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(conn: Connection) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status, _ = await conn.request(method, path, payload)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                conn.close()
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(conn) for conn in connections))
+    elapsed = time.perf_counter() - start
+
+    _, lag = await control.request("GET", "/__bench__/lag")
+    for conn in connections + [control]:
+        conn.close()
+
+    ms = [l * 1000 for l in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms, default=0.0), 3),
+        "loop_lag": json.loads(lag),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError("Benchmark server did not start")
+
+
+async def seed(port: int) -> None:
+    """Configure Hysteria and VLESS before any endpoint is measured"""
+    conn = Connection("127.0.0.1", port)
+    try:
+        for name in SEED:
+            method, path, body = ENDPOINTS[name]
+            status, data = await conn.request(method, path, json.dumps(body).encode())
+            if status >= 400:
+                raise RuntimeError(f"Seeding {path} failed ({status}): {data[:200]!r}")
+    finally:
+        conn.close()
+
+
+def compare(results: Dict[str, Any], baseline_path: str, threshold: float) -> List[str]:
+    """Print deltas against a saved baseline; return regressed endpoints"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\nComparison with {baseline_path} (regression threshold {threshold:.0f}%):")
+    print(f"  {'endpoint':24} {'p50':>9} {'p99':>9} {'rps':>9}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+
+        def delta(key):
+            return (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+
+        p50, p99, rps = delta("p50_ms"), delta("p99_ms"), delta("throughput_rps")
+        # Latencies of failed requests measure the error path, not the endpoint
+        regressed = p99 > threshold or -rps > threshold or result["errors"] > 0
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:24} {p50:+8.1f}% {p99:+8.1f}% {rps:+8.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProxyVault endpoint latency benchmark")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per endpoint")
+    parser.add_argument("--warmup", type=int, default=4, help="warm-up requests per endpoint")
+    parser.add_argument("--only", nargs="*", choices=sorted(ENDPOINTS), help="endpoints to run")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="percent p99/throughput change counted as a regression")
+    parser.add_argument("--fake-tools", action="store_true",
+                        help="run the real managers against fake system tools")
+    parser.add_argument("--sockets", type=int, default=50000, help="fake ss socket count")
+    parser.add_argument("--rules", type=int, default=5000, help="fake firewall rule count")
+    parser.add_argument("--tool-latency", type=float, default=0, help="ms added to every fake tool call")
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="proxyvault-bench-")
+    env = {
+        "CONFIG_DIR": state_dir,
+        "HYSTERIA_CONFIG": f"{state_dir}/hysteria.yaml",
+        "VLESS_CONFIG": f"{state_dir}/xray.json",
+        "OPENVPN_CONFIG": f"{state_dir}/client.conf",
+        "OPENVPN_MANAGEMENT_SOCKET": f"{state_dir}/mgmt.sock",
+        "SHARED_STATE_DIR": f"{state_dir}/shm",
+        "SERVER_ADDRESS": "203.0.113.1",
+        "VPN_PROBE_ENABLED": "false",
+        "MONITORING_INTERVAL": "1",
+    }
+    tools = None
+    results = {}
+    try:
+        if args.fake_tools:
+            sys.path.insert(0, str(BACKEND_DIR))
+            from fake_tools import FakeSystemTools
+            tools = FakeSystemTools(
+                state_dir=f"{state_dir}/tools", sockets=args.sockets, rules=args.rules,
+                latency_ms={"default": args.tool_latency}
+            )
+            tools.start()
+            env.update(tools.env())
+
+        port = _free_port()
+        server = multiprocessing.get_context("spawn").Process(
+            target=serve, args=(port, env, not args.fake_tools), daemon=True
+        )
+        server.start()
+        try:
+            _wait_ready(port)
+            asyncio.run(seed(port))
+            # Let the sampler publish its first snapshot
+            time.sleep(1.5)
+            for name in args.only or ENDPOINTS:
+                method, path, body = ENDPOINTS[name]
+                results[name] = asyncio.run(run_endpoint(
+                    port, method, path, body, args.concurrency, args.duration, args.warmup
+                ))
+        finally:
+            server.terminate()
+            server.join(timeout=10)
+    finally:
+        if tools is not None:
+            tools.uninstall()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    print(f"{'endpoint':24} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'lag p99':>9} {'lag max':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:24} {r['throughput_rps']:9.1f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+              f"{r['p99_ms']:9.2f} {r['loop_lag']['p99_ms']:9.2f} {r['loop_lag']['max_ms']:9.2f} "
+              f"{r['errors']:7d}")
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "concurrency": args.concurrency,
+                    "duration": args.duration,
+                    "fake_tools": {"sockets": args.sockets, "rules": args.rules,
+                                   "latency_ms": args.tool_latency} if args.fake_tools else None,
+                },
+                "results": results
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    failed = [name for name, r in results.items() if r["errors"]]
+    if failed:
+        print(f"\nRequests failed on: {', '.join(failed)}")
+    if regressions or failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
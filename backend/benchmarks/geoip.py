@@ -0,0 +1,86 @@
+# GeoIP lookup benchmark: time to open a database, and the cost of a lookup
+# through the memory-mapped ranges (cold) and through the resolver's LRU.
+# Uses GEOIP_DATABASE when it exists, otherwise a synthetic database.
+#
+# Usage (from backend/):
+#   python benchmarks/geoip.py
+#   python benchmarks/geoip.py --ranges 1000000 --lookups 200000 --output geoip.json
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services.geoip import GeoIPDatabase, GeoIPResolver, geoip_resolver, write_database  # noqa: E402
+
+
+def synthetic_database(path: Path, ranges: int) -> None:
+    """Back-to-back IPv4 ranges over the public space, a few thousand IPv6 /32s"""
+    rng = random.Random(1)
+    step = (0xE0000000 - 0x01000000) // ranges
+    v4 = [
+        (0x01000000 + i * step, 0x01000000 + (i + 1) * step - 1,
+         (rng.choice(['US', 'DE', 'FR', 'JP', 'BR', 'NL']), str(rng.randint(1, 70000)), f"Org {i % 5000}"))
+        for i in range(ranges)
+    ]
+    v6 = [((0x2000 + i) << 112, ((0x2000 + i) << 112) | ((1 << 112) - 1), ('US', '64500', 'Doc Net'))
+          for i in range(4000)]
+    write_database(path, {4: v4, 6: v6})
+
+
+def per_call(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProxyVault GeoIP lookup benchmark")
+    parser.add_argument("--ranges", type=int, default=500000, help="IPv4 ranges of the synthetic database")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--hot", type=int, default=1000, help="distinct IPs of the cached run")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    path = geoip_resolver.path
+    if not path.exists():
+        path = Path(tempfile.mkdtemp()) / "geoip.pvdb"
+        synthetic_database(path, args.ranges)
+    start = time.perf_counter()
+    database = GeoIPDatabase(path)
+    open_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(2)
+    ips = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+           for _ in range(args.lookups)]
+    resolver = GeoIPResolver(path, cache_size=args.hot * 2)
+    hot = ips[:args.hot] * max(1, args.lookups // args.hot)
+    resolver.lookup(hot[0])
+    results = {
+        "database": str(path),
+        "bytes": path.stat().st_size,
+        "ranges": database.ranges,
+        "open_ms": round(open_ms, 3),
+        "uncached_us": round(per_call(database.lookup, ips) * 1e6, 2),
+        "cached_us": round(per_call(resolver.lookup, hot) * 1e6, 2),
+    }
+    print(f"{path} ({results['bytes'] / 1024 / 1024:.1f} MB, {database.ranges})")
+    print(f"open:            {results['open_ms']} ms")
+    print(f"lookup (mmap):   {results['uncached_us']} us")
+    print(f"lookup (cached): {results['cached_us']} us")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
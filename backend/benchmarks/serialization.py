@@ -0,0 +1,134 @@
+# JSON serialization benchmark: encode throughput of FastAPI's default path
+# (jsonable_encoder + json.dumps) against services.serialization (orjson when
+# installed), gzip cost, and the per-request cost of a snapshot shared by N
+# subscribers.
+#
+# Usage (from backend/):
+#   python benchmarks/serialization.py
+#   python benchmarks/serialization.py --users 5000 --points 10000 --output serialization.json
+
+import argparse
+import gzip
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from services import serialization  # noqa: E402
+from services.serialization import EncodedBody  # noqa: E402
+
+
+def make_payloads(users: int, points: int) -> dict:
+    """Payloads shaped like the real responses"""
+    def series(n, **fields):
+        return [{"time": f"12:{i // 60 % 60:02d}:{i % 60:02d}", "t": 1760000000.0 + i, **fields} for i in range(n)]
+
+    stats = {
+        "cpu": {"percent": 12.5, "count": 4},
+        "memory": {"total": 8 << 30, "available": 5 << 30, "used": 3 << 30, "percent": 37.5},
+        "disk": {"total": 80 << 30, "used": 20 << 30, "free": 60 << 30, "percent": 25.0},
+        "network": {"bandwidth_in": 812.4, "bandwidth_out": 90.1, "bytes_sent": 123456789,
+                    "bytes_recv": 987654321, "packets_sent": 123456, "packets_recv": 654321}
+    }
+    hysteria_users = {f"user{i}": {"tx": 12.3, "rx": 45.6, "online": 1} for i in range(50)}
+    return {
+        "stats": stats,
+        "history (60 points)": {
+            "bandwidth": series(60, **{"in": 812.4, "out": 90.1}),
+            "cpu": series(60, value=12.5),
+            "memory": series(60, value=37.5),
+            "hysteria": series(60, tx=10.0, rx=20.0, online=50, users=hysteria_users)
+        },
+        f"history ({points} points)": {
+            "bandwidth": series(points, **{"in": 812.4, "out": 90.1}),
+            "cpu": series(points, value=12.5),
+            "memory": series(points, value=37.5)
+        },
+        f"users ({users})": {
+            "users": [
+                {"name": f"user{i}", "uuid": str(uuid.UUID(int=i)), "email": f"user{i}@proxyvault",
+                 "enabled": True, "created": "2026-01-01T00:00:00", "quota_gb": 50.0,
+                 "traffic": {"uplink": i * 1024, "downlink": i * 4096}}
+                for i in range(users)
+            ]
+        }
+    }
+
+
+def fastapi_default(obj) -> bytes:
+    # What JSONResponse does after FastAPI's serialize_response
+    return json.dumps(
+        jsonable_encoder(obj), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def timed(fn, obj, min_time: float) -> float:
+    """Seconds per call, repeating for at least min_time"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(obj)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def bench(name: str, obj, subscribers: int, min_time: float) -> dict:
+    raw = serialization.dumps(obj)
+    size = len(raw)
+    default = timed(fastapi_default, obj, min_time)
+    fast = timed(serialization.dumps, obj, min_time)
+    gz = timed(lambda data: gzip.compress(data, compresslevel=6, mtime=0), raw, min_time)
+    body = EncodedBody(raw)
+    return {
+        "payload": name,
+        "bytes": size,
+        "gzip_bytes": len(body.gzip()),
+        "default_us": round(default * 1e6, 1),
+        "fast_us": round(fast * 1e6, 1),
+        "gzip_us": round(gz * 1e6, 1),
+        "default_mb_s": round(size / default / 1e6, 1),
+        "fast_mb_s": round(size / fast / 1e6, 1),
+        # Encoded (and gzipped) once per tick, shared by every subscriber
+        "shared_us_per_request": round((fast + gz) / subscribers * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProxyVault JSON serialization benchmark")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--subscribers", type=int, default=10,
+                        help="dashboards polling the same snapshot")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds to repeat each measurement")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    encoder = "orjson" if serialization.orjson is not None else "stdlib json (orjson not installed)"
+    print(f"Fast path: {encoder}; shared cost over {args.subscribers} subscribers\n")
+    print(f"{'payload':<22} {'bytes':>9} {'gzip':>8} {'default':>10} {'fast':>9} "
+          f"{'default':>9} {'fast':>9} {'shared':>9}")
+    print(f"{'':<22} {'':>9} {'':>8} {'us':>10} {'us':>9} {'MB/s':>9} {'MB/s':>9} {'us/req':>9}")
+
+    results = []
+    for name, obj in make_payloads(args.users, args.points).items():
+        r = bench(name, obj, args.subscribers, args.min_time)
+        results.append(r)
+        print(f"{name:<22} {r['bytes']:>9} {r['gzip_bytes']:>8} {r['default_us']:>10} {r['fast_us']:>9} "
+              f"{r['default_mb_s']:>9} {r['fast_mb_s']:>9} {r['shared_us_per_request']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"encoder": encoder, "subscribers": args.subscribers, "results": results}, f, indent=2)
+        print(f"\nSaved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
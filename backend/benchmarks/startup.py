@@ -0,0 +1,117 @@
+# Startup benchmark: import cost (python -X importtime) and time-to-first-request
+#
+# Usage (from backend/):
+#   python benchmarks/startup.py
+#   python benchmarks/startup.py --runs 5 --output startup.json
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure_imports(module: str = "app", top: int = 15) -> dict:
+    """Run `python -X importtime -c "import app"` and summarise the output"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+
+    target = next((m for m in modules if m["module"] == module), None)
+    return {
+        "total_ms": target["cumulative_ms"] if target else None,
+        "top_self": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top],
+        "project_modules": [
+            m for m in modules
+            if m["module"].startswith(("services", "config")) or m["module"] == module
+        ]
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_request(module: str = "app", timeout: float = 30) -> float:
+    """Seconds from spawning uvicorn until GET / answers"""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("Server did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProxyVault startup benchmark")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    imports = [measure_imports(args.module) for _ in range(args.runs)]
+    first_request = [measure_first_request(args.module) for _ in range(args.runs)]
+
+    results = {
+        "module": args.module,
+        "python": sys.version.split()[0],
+        "import_ms": [i["total_ms"] for i in imports],
+        "first_request_ms": [round(t * 1000, 1) for t in first_request],
+        "top_self": imports[-1]["top_self"],
+        "project_modules": imports[-1]["project_modules"]
+    }
+
+    print(f"Import time (ms):       min {min(results['import_ms']):.1f}  "
+          f"runs {results['import_ms']}")
+    print(f"Time to first request:  min {min(results['first_request_ms']):.1f} ms  "
+          f"runs {results['first_request_ms']}")
+    print("\nSlowest imports (self time):")
+    for m in results["top_self"]:
+        print(f"  {m['self_ms']:8.1f} ms  {m['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
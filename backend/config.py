@@ -10,10 +10,25 @@ class Settings(BaseSettings):
     # API settings
     API_PORT: int = 8000
     API_HOST: str = "0.0.0.0"
+    API_WORKERS: int = 0  # production mode worker processes, 0 = one per CPU
+    
+    # Monitoring sampler (runs in one worker, shared with the others)
+    MONITORING_INTERVAL: int = 10  # seconds between samples
+    SHARED_STATE_DIR: str = ""  # empty = <runtime dir>/proxyvault-<port>, must be 0700
+    COMMAND_TRACE_SIZE: int = 500  # external commands kept for /api/debug/commands
+    LOOP_LAG_INTERVAL_MS: int = 50  # event-loop lag probe period
+    LOOP_STALL_THRESHOLD_MS: int = 100  # lag recorded as a stall, with its stack
     
     # Service ports
     HYSTERIA_PORT: int = 36712
     VLESS_PORT: int = 8443
+    HYSTERIA_STATS_PORT: int = 9999  # trafficStats API, bound to localhost
+    XRAY_API_PORT: int = 10085  # xray gRPC API, bound to localhost
+    
+    # Per-user VLESS traffic accounting
+    XRAY_STATS_INTERVAL: int = 30  # seconds between QueryStats polls
+    XRAY_STATS_PERSIST_INTERVAL: int = 300  # seconds between counter saves
+    VLESS_USER_QUOTA_GB: float = 0  # default per-user quota, 0 = unlimited
     
     # Paths
     CONFIG_DIR: str = "/etc/proxyvault"
@@ -26,6 +41,44 @@ class Settings(BaseSettings):
     VLESS_SERVICE: str = "xray"
     OPENVPN_SERVICE: str = "openvpn-client@client"
     
+    # OpenVPN management interface (unix socket)
+    OPENVPN_MANAGEMENT_SOCKET: str = "/run/openvpn-client/proxyvault-mgmt.sock"
+    
+    # Public server address used in exported client configs
+    SERVER_ADDRESS: str = ""  # explicit override, skips detection
+    SERVER_IP_PROBE_URL: str = "https://ifconfig.me/ip"  # empty = never probe
+    SERVER_IP_CACHE_TTL: int = 3600  # seconds
+    
+    # VPN health probing / routing failover
+    VPN_PROBE_ENABLED: bool = True
+    VPN_PROBE_TARGET: str = "1.1.1.1"
+    VPN_PROBE_INTERVAL: int = 10  # seconds between probes
+    VPN_PROBE_COUNT: int = 3  # echo requests per probe
+    VPN_HEALTH_THRESHOLD: int = 50  # fail over below this score (0-100)
+    VPN_RECOVERY_THRESHOLD: int = 80  # switch back at or above this score
+    VPN_STANDBY_INTERFACE: str = ""  # empty = fall back to the direct route
+    
+    # Alerting (evaluated on every monitoring sample)
+    ALERTS_ENABLED: bool = True
+    ALERT_CPU_PERCENT: float = 90
+    ALERT_CPU_MINUTES: float = 5  # CPU must stay above the limit this long
+    ALERT_DISK_PERCENT: float = 90
+    ALERT_UNIT_MINUTES: float = 1  # unit inactive / tunnel down for this long
+    ALERT_ZERO_BANDWIDTH_MINUTES: float = 10  # 0 = off
+    ALERT_XRAY_RSS_GROWTH_MB_PER_HOUR: float = 100  # 0 = off
+    ALERT_WEBHOOK_URL: str = ""  # JSON POST per fired/resolved alert
+    ALERT_LOG_FILE: str = ""  # empty = <CONFIG_DIR>/alerts.jsonl
+    
+    # Top talkers on the proxy ports, from the conntrack table
+    CONNTRACK_ENABLED: bool = True
+    CONNTRACK_PATH: str = "/proc/net/nf_conntrack"  # missing = `conntrack -L` (netlink)
+    CONNTRACK_INTERVAL: int = 30  # seconds between table scans
+    CONNTRACK_CAPACITY: int = 1000  # client counters kept (bounds memory)
+    
+    # Offline GeoIP/ASN lookups of client IPs (build with geoip_convert.py)
+    GEOIP_DATABASE: str = ""  # empty = <CONFIG_DIR>/geoip.pvdb
+    GEOIP_CACHE_SIZE: int = 4096  # recent lookups kept
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
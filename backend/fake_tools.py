@@ -0,0 +1,578 @@
+# Fake system tools for running the real managers without root
+#
+# FakeSystemTools writes small wrapper scripts named systemctl, ss, iptables,
+# iptables-save, ufw, journalctl, ip, sysctl and xray into a temp bin dir.
+# Each one re-enters this file, which emulates the tool's output format
+# against state kept in JSON files in the same temp dir. Output can be
+# scaled up (thousands of sockets/firewall rules) and every call can be
+# delayed to mimic slow tools on a loaded host.
+#
+#   tools = FakeSystemTools(sockets=50000, rules=5000, latency_ms={'ss': 40})
+#   tools.install()      # prepends the bin dir to PATH for this process
+#   ...
+#   tools.uninstall()
+
+import base64
+import fcntl
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+TOOLS = ["systemctl", "ss", "iptables", "iptables-save", "ufw", "journalctl", "ip", "sysctl", "xray"]
+
+DEFAULT_SERVICES = ["hysteria-server", "xray", "openvpn-client@client"]
+IPTABLES_CHAINS = {
+    "filter": ["INPUT", "FORWARD", "OUTPUT"],
+    "nat": ["PREROUTING", "INPUT", "OUTPUT", "POSTROUTING"],
+    "mangle": ["PREROUTING", "INPUT", "FORWARD", "OUTPUT", "POSTROUTING"],
+}
+
+
+class FakeSystemTools:
+    """Puts fake system tools on PATH, with state in a temp dir"""
+
+    def __init__(self, state_dir=None, sockets=200, rules=20, journal_lines=200,
+                 latency_ms=None, listen_ports=(36712, 8443), service_pid=None):
+        self.state_dir = Path(state_dir or tempfile.mkdtemp(prefix="proxyvault-tools-"))
+        self.bin_dir = self.state_dir / "bin"
+        self.config = {
+            "sockets": sockets,
+            "rules": rules,
+            "journal_lines": journal_lines,
+            # Tool name -> delay per call; "default" applies to the rest
+            "latency_ms": dict(latency_ms or {}),
+            "listen_ports": list(listen_ports),
+            # `systemctl show -p MainPID` points at a real process so psutil works
+            "service_pid": service_pid or os.getpid(),
+        }
+        self._old_path = None
+
+    def start(self):
+        """Write wrappers, config and initial state; returns the bin dir"""
+        self.bin_dir.mkdir(parents=True, exist_ok=True)
+        script = Path(__file__).resolve()
+        for tool in TOOLS:
+            wrapper = self.bin_dir / tool
+            wrapper.write_text(
+                f'#!/bin/sh\nFAKE_TOOLS_STATE="{self.state_dir}" '
+                f'exec "{sys.executable}" "{script}" {tool} "$@"\n'
+            )
+            wrapper.chmod(0o755)
+        self._save_config()
+        for name, data in _initial_state(self.config).items():
+            _write_json(self.state_dir / f"{name}.json", data)
+        return self.bin_dir
+
+    def set_latency(self, tool, ms):
+        """Change a tool's delay (``tool="default"`` for all others)"""
+        self.config["latency_ms"][tool] = ms
+        self._save_config()
+
+    def _save_config(self):
+        _write_json(self.state_dir / "config.json", self.config)
+
+    def env(self):
+        """Environment for a child process that should use the fakes"""
+        return {"PATH": f"{self.bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"}
+
+    def install(self):
+        """Start if needed and prepend the bin dir to this process's PATH"""
+        if not self.bin_dir.exists():
+            self.start()
+        self._old_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{self.bin_dir}{os.pathsep}{self._old_path}"
+        return self
+
+    def uninstall(self, cleanup=True):
+        if self._old_path is not None:
+            os.environ["PATH"] = self._old_path
+            self._old_path = None
+        if cleanup:
+            shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def state(self, name):
+        """Read a state file (services, iptables, ufw, ip, journal)"""
+        return _read_json(self.state_dir / f"{name}.json")
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+
+# --- State helpers ---
+
+def _read_json(path, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    tmp_path = Path(f"{path}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _state(name):
+    """Load a state file for modification under an exclusive lock"""
+    path = Path(os.environ["FAKE_TOOLS_STATE"]) / f"{name}.json"
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        data = _read_json(path, {})
+        yield data
+        _write_json(path, data)
+
+
+def _load(name):
+    return _read_json(Path(os.environ["FAKE_TOOLS_STATE"]) / f"{name}.json", {})
+
+
+def _initial_state(config):
+    rng = random.Random(1)
+    ports = config["listen_ports"]
+
+    iptables = {table: {chain: [] for chain in chains} for table, chains in IPTABLES_CHAINS.items()}
+    ufw_rules = []
+    for i in range(config["rules"]):
+        source = f"198.51.{(i >> 8) & 255}.{i & 255}/32"
+        port = 10000 + i % 50000
+        iptables["filter"]["INPUT"].append(
+            ["-s", source, "-p", "tcp", "-m", "tcp", "--dport", str(port), "-j", "ACCEPT"]
+        )
+        ufw_rules.append({"to": f"{port}/tcp", "action": "ALLOW IN", "from": source.split("/")[0], "comment": ""})
+
+    start = time.time() - config["journal_lines"]
+    journal = {
+        name: [[start + i, f"{name}: connection {i} accepted from 203.0.113.{i % 254 + 1}"]
+               for i in range(config["journal_lines"])]
+        for name in DEFAULT_SERVICES
+    }
+
+    return {
+        "services": {name: {"active": False, "enabled": True} for name in DEFAULT_SERVICES},
+        "iptables": iptables,
+        "ufw": {"active": True, "rules": ufw_rules},
+        "ip": {
+            "rules": [],
+            "routes": {"main": ["default via 10.0.0.1 dev eth0 proto static"]},
+            "sysctl": {"net.ipv4.ip_forward": "0"},
+        },
+        "journal": journal,
+        # Remote endpoints for the synthetic socket table
+        "sockets": {
+            "seed": rng.randrange(1 << 30),
+            "count": config["sockets"],
+            "ports": ports,
+        },
+    }
+
+
+def _log(service, message):
+    with _state("journal") as journal:
+        entries = journal.setdefault(service, [])
+        entries.append([time.time(), message])
+        del entries[:-10000]
+
+
+# --- Tools ---
+
+def systemctl(args):
+    args = [a for a in args if a not in ("--no-pager", "--quiet", "-q")]
+    if not args:
+        return 1, "", "Too few arguments.\n"
+    action, names = args[0], [a for a in args[1:] if not a.startswith("-")]
+
+    if action == "daemon-reload":
+        return 0, "", ""
+    if action == "is-active":
+        services = _load("services")
+        out = [("active" if services.get(n, {}).get("active") else "inactive") for n in names]
+        return (0 if out and all(s == "active" for s in out) else 3), "\n".join(out) + "\n", ""
+    if action == "is-enabled":
+        services = _load("services")
+        enabled = all(services.get(n, {}).get("enabled") for n in names)
+        return (0 if enabled else 1), ("enabled\n" if enabled else "disabled\n"), ""
+    if action == "show":
+        props, names = [], []
+        rest = iter(args[1:])
+        for arg in rest:
+            if arg.startswith("--property="):
+                props += arg.split("=", 1)[1].split(",")
+            elif arg in ("-p", "--property"):
+                props += next(rest, "").split(",")
+            elif not arg.startswith("-"):
+                names.append(arg)
+        services = _load("services")
+        config = _load("config")
+        active = services.get(names[0] if names else "", {}).get("active")
+        values = {
+            "MainPID": str(config.get("service_pid", 0) if active else 0),
+            "ActiveState": "active" if active else "inactive",
+            "SubState": "running" if active else "dead",
+        }
+        return 0, "".join(f"{p}={values.get(p, '')}\n" for p in props or values), ""
+    if action == "status":
+        services = _load("services")
+        name = names[0]
+        active = services.get(name, {}).get("active")
+        state = "active (running)" if active else "inactive (dead)"
+        out = (f"● {name}.service\n"
+               f"     Loaded: loaded (/etc/systemd/system/{name}.service; enabled)\n"
+               f"     Active: {state}\n")
+        return (0 if active else 3), out, ""
+    if action in ("start", "stop", "restart", "reload", "enable", "disable"):
+        with _state("services") as services:
+            for name in names:
+                service = services.setdefault(name, {"active": False, "enabled": False})
+                if action in ("start", "restart", "reload"):
+                    service["active"] = True
+                elif action == "stop":
+                    service["active"] = False
+                else:
+                    service["enabled"] = action == "enable"
+        for name in names:
+            _log(name, {"start": f"Started {name}.service.",
+                        "stop": f"Stopped {name}.service.",
+                        "restart": f"Started {name}.service.",
+                        "reload": f"Reloaded {name}.service."}.get(action, f"{action}d {name}"))
+        return 0, "", ""
+    return 1, "", f"Unknown command verb {action}.\n"
+
+
+def journalctl(args):
+    lines, units = 10, []
+    i = 0
+    while i < len(args):
+        if args[i] in ("-u", "--unit"):
+            units.append(args[i + 1])
+            i += 1
+        elif args[i] in ("-n", "--lines"):
+            lines = int(args[i + 1])
+            i += 1
+        elif args[i].startswith("--lines="):
+            lines = int(args[i].split("=", 1)[1])
+        i += 1
+
+    journal = _load("journal")
+    entries = []
+    for unit in units or list(journal):
+        for ts, message in journal.get(unit, []):
+            entries.append((ts, unit, message))
+    entries.sort()
+    entries = entries[-lines:] if lines else []
+    if not entries:
+        return 0, "-- No entries --\n", ""
+    host = os.uname().nodename
+    out = [
+        f"{datetime.fromtimestamp(ts).strftime('%b %d %H:%M:%S')} {host} "
+        f"{unit.split('@')[0]}[{1000 + zlib.crc32(unit.encode()) % 30000}]: {message}"
+        for ts, unit, message in entries
+    ]
+    return 0, "\n".join(out) + "\n", ""
+
+
+def _socket_rows(spec):
+    rng = random.Random(spec["seed"])
+    ports = spec["ports"]
+    local_ip = "10.0.0.5"
+    for i in range(spec["count"]):
+        # Most sockets belong to the proxy listeners, the rest are noise
+        lport = ports[i % len(ports)] if ports and i % 10 < 8 else 1024 + rng.randrange(60000)
+        remote = f"203.0.{rng.randrange(256)}.{rng.randrange(1, 255)}:{rng.randrange(1024, 65535)}"
+        state = "ESTAB" if i % 20 else "TIME-WAIT"
+        yield state, f"{local_ip}:{lport}", remote, lport
+
+
+def ss(args):
+    flags = "".join(a[1:] for a in args if a.startswith("-") and not a.startswith("--"))
+    expression = [a for a in args if not a.startswith("-")]
+    sport = dport = None
+    tokens = " ".join(expression).replace("=", " = ").split()
+    for j, token in enumerate(tokens):
+        if token in ("sport", "dport") and j + 2 < len(tokens):
+            port = int(tokens[j + 2].lstrip(":"))
+            if token == "sport":
+                sport = port
+            else:
+                dport = port
+
+    spec = _load("sockets")
+    out = []
+    if "H" not in flags:
+        out.append("State      Recv-Q Send-Q   Local Address:Port     Peer Address:Port Process")
+    for state, local, remote, lport in _socket_rows(spec):
+        if sport is not None and lport != sport:
+            continue
+        if dport is not None and not remote.endswith(f":{dport}"):
+            continue
+        if "a" not in flags and state != "ESTAB":
+            continue
+        out.append(f"{state:<10} 0      0        {local:>20} {remote:>21}")
+    return 0, "\n".join(out) + "\n", ""
+
+
+def _rule_spec(chain, rule):
+    return f"-A {chain} " + " ".join(rule)
+
+
+def iptables(args):
+    table = "filter"
+    if "-t" in args:
+        i = args.index("-t")
+        table = args[i + 1]
+        args = args[:i] + args[i + 2:]
+    args = [a for a in args if a not in ("-w", "--wait")]
+    if table not in IPTABLES_CHAINS:
+        return 3, "", f"iptables v1.8.7 (legacy): can't initialize iptables table `{table}': Table does not exist\n"
+
+    command = args[0] if args else ""
+    if command in ("-A", "-I", "-D", "-C"):
+        chain, rule = args[1], args[2:]
+        if command == "-I" and rule and rule[0].isdigit():
+            rule = rule[1:]
+        with _state("iptables") as state:
+            rules = state[table].setdefault(chain, [])
+            if command == "-A":
+                rules.append(rule)
+            elif command == "-I":
+                rules.insert(0, rule)
+            elif rule in rules:
+                if command == "-D":
+                    rules.remove(rule)
+            else:
+                return 1, "", "iptables: Bad rule (does a matching rule exist in that chain?).\n"
+        return 0, "", ""
+
+    state = _load("iptables")
+    if command == "-S":
+        chains = [args[1]] if len(args) > 1 and not args[1].startswith("-") else list(state[table])
+        out = [f"-P {c} ACCEPT" for c in chains if c in IPTABLES_CHAINS[table]]
+        for chain in chains:
+            out += [_rule_spec(chain, r) for r in state[table].get(chain, [])]
+        return 0, "\n".join(out) + "\n", ""
+    if command == "-L":
+        chains = [args[1]] if len(args) > 1 and not args[1].startswith("-") else list(state[table])
+        verbose = "-v" in args
+        out = []
+        for chain in chains:
+            if chain not in state[table]:
+                return 1, "", f"iptables: No chain/target/match by that name.\n"
+            out.append(f"Chain {chain} (policy ACCEPT{' 0 packets, 0 bytes' if verbose else ''})")
+            out.append((" pkts bytes " if verbose else "") + "target     prot opt " +
+                       ("in     out    " if verbose else "") + "source               destination")
+            for rule in state[table][chain]:
+                out.append(_format_rule(rule, verbose))
+            out.append("")
+        return 0, "\n".join(out), ""
+    if command == "-F":
+        with _state("iptables") as state:
+            for chain in ([args[1]] if len(args) > 1 else list(state[table])):
+                state[table][chain] = []
+        return 0, "", ""
+    return 2, "", f"iptables v1.8.7 (legacy): unknown option \"{command}\"\n"
+
+
+def _format_rule(rule, verbose):
+    opts = dict(zip(rule[::2], rule[1::2]))
+    target = opts.get("-j", "")
+    extra = " ".join(
+        f"{k.lstrip('-')}:{v}" if k in ("--dport", "--sport") else f"{k} {v}"
+        for k, v in opts.items() if k not in ("-j", "-p", "-s", "-d", "-i", "-o", "-m")
+    )
+    line = (f"{target:<10} {opts.get('-p', 'all'):<4} --  "
+            + (f"{opts.get('-i', '*'):<6} {opts.get('-o', '*'):<6} " if verbose else "")
+            + f"{opts.get('-s', '0.0.0.0/0'):<20} {opts.get('-d', '0.0.0.0/0'):<20} {extra}")
+    return ("    0     0 " if verbose else "") + line
+
+
+def iptables_save(args):
+    state = _load("iptables")
+    out = [f"# Generated by iptables-save v1.8.7 on {time.ctime()}"]
+    for table, chains in state.items():
+        out.append(f"*{table}")
+        out += [f":{chain} ACCEPT [0:0]" for chain in chains]
+        for chain, rules in chains.items():
+            out += [_rule_spec(chain, r) for r in rules]
+        out.append("COMMIT")
+        out.append(f"# Completed on {time.ctime()}")
+    return 0, "\n".join(out) + "\n", ""
+
+
+def ufw(args):
+    args = [a for a in args if a != "--force"]
+    command = args[0] if args else ""
+    if command == "status":
+        state = _load("ufw")
+        if not state.get("active"):
+            return 0, "Status: inactive\n", ""
+        numbered = "numbered" in args
+        out = ["Status: active", ""]
+        out.append(f"{'     ' if numbered else ''}{'To':<27}{'Action':<11}From")
+        out.append(f"{'     ' if numbered else ''}{'--':<27}{'------':<11}----")
+        for n, rule in enumerate(state.get("rules", []), 1):
+            prefix = f"[{n:>2}] " if numbered else ""
+            comment = f"  # {rule['comment']}" if rule.get("comment") else ""
+            out.append(f"{prefix}{rule['to']:<27}{rule['action']:<11}{rule['from']}{comment}")
+        return 0, "\n".join(out) + "\n\n", ""
+    if command in ("enable", "disable"):
+        with _state("ufw") as state:
+            state["active"] = command == "enable"
+        if command == "enable":
+            return 0, "Firewall is active and enabled on system startup\n", ""
+        return 0, "Firewall stopped and disabled on system startup\n", ""
+    if command == "allow":
+        to = args[1]
+        comment = args[args.index("comment") + 1] if "comment" in args else ""
+        with _state("ufw") as state:
+            rules = state.setdefault("rules", [])
+            if any(r["to"] == to and r["from"] == "Anywhere" for r in rules):
+                return 0, "Skipping adding existing rule\nSkipping adding existing rule (v6)\n", ""
+            rules.append({"to": to, "action": "ALLOW IN", "from": "Anywhere", "comment": comment})
+            rules.append({"to": f"{to} (v6)", "action": "ALLOW IN", "from": "Anywhere (v6)", "comment": comment})
+        return 0, "Rule added\nRule added (v6)\n", ""
+    if command == "delete" and len(args) >= 3 and args[1] == "allow":
+        to = args[2]
+        with _state("ufw") as state:
+            before = len(state.get("rules", []))
+            state["rules"] = [r for r in state.get("rules", [])
+                              if r["to"] not in (to, f"{to} (v6)") or not r["from"].startswith("Anywhere")]
+            deleted = before != len(state["rules"])
+        if deleted:
+            return 0, "Rule deleted\nRule deleted (v6)\n", ""
+        return 0, "Could not delete non-existent rule\nCould not delete non-existent rule (v6)\n", ""
+    return 1, "", f"ERROR: Invalid syntax\n"
+
+
+def ip(args):
+    args = [a for a in args if a not in ("-4", "-6", "-o", "-br")]
+    if not args:
+        return 255, "", "Usage: ip [ OPTIONS ] OBJECT { COMMAND | help }\n"
+    obj, rest = args[0], args[1:]
+    command = rest[0] if rest else "show"
+
+    if obj in ("route", "r", "ro"):
+        table = "main"
+        if "table" in rest:
+            i = rest.index("table")
+            table = rest[i + 1]
+            rest = rest[:i] + rest[i + 2:]
+        spec = " ".join(rest[1:])
+        if command in ("show", "list", "ls"):
+            routes = _load("ip").get("routes", {}).get(table, [])
+            if spec:
+                routes = [r for r in routes if r.startswith(spec)]
+            return 0, "".join(r + "\n" for r in routes), ""
+        with _state("ip") as state:
+            routes = state.setdefault("routes", {}).setdefault(table, [])
+            key = " ".join(spec.split()[:1])
+            existing = [r for r in routes if r.split()[0] == key]
+            if command == "add":
+                if existing:
+                    return 2, "", "RTNETLINK answers: File exists\n"
+                routes.append(spec)
+            elif command == "replace":
+                for r in existing:
+                    routes.remove(r)
+                routes.append(spec)
+            elif command in ("del", "delete"):
+                if not existing:
+                    return 2, "", "RTNETLINK answers: No such process\n"
+                routes.remove(existing[0])
+        return 0, "", ""
+
+    if obj in ("rule", "ru"):
+        spec = " ".join(rest[1:])
+        if command in ("show", "list"):
+            rules = ["0:\tfrom all lookup local"]
+            rules += [f"{32765 - i}:\tfrom all {r}" for i, r in enumerate(_load("ip").get("rules", []))]
+            rules += ["32766:\tfrom all lookup main", "32767:\tfrom all lookup default"]
+            return 0, "\n".join(rules) + "\n", ""
+        spec = spec.replace("table", "lookup")
+        with _state("ip") as state:
+            rules = state.setdefault("rules", [])
+            if command == "add":
+                rules.append(spec)
+            elif command in ("del", "delete"):
+                if spec not in rules:
+                    return 2, "", "RTNETLINK answers: No such file or directory\n"
+                rules.remove(spec)
+        return 0, "", ""
+
+    return 255, "", f'Object "{obj}" is unknown, try "ip help".\n'
+
+
+def sysctl(args):
+    if "-w" in args:
+        key, _, value = args[args.index("-w") + 1].partition("=")
+        with _state("ip") as state:
+            state.setdefault("sysctl", {})[key] = value
+        return 0, f"{key} = {value}\n", ""
+    values = _load("ip").get("sysctl", {})
+    keys = [a for a in args if not a.startswith("-")]
+    out = [f"{k} = {values.get(k, '0')}" for k in keys]
+    return 0, "\n".join(out) + "\n", ""
+
+
+def xray(args):
+    command = args[0] if args else ""
+    if command in ("version", "-version"):
+        return 0, "Xray 1.8.24 (Xray, Penetrates Everything.) Custom (go1.22.5 linux/amd64)\n", ""
+    if command == "x25519":
+        key = lambda: base64.urlsafe_b64encode(os.urandom(32)).rstrip(b"=").decode()
+        return 0, f"Private key: {key()}\nPublic key: {key()}\n", ""
+    if command == "uuid":
+        return 0, f"{uuid.uuid4()}\n", ""
+    if command == "run" and "-test" in args:
+        path = args[args.index("-config") + 1] if "-config" in args else "/usr/local/etc/xray/config.json"
+        try:
+            with open(path) as f:
+                json.load(f)
+        except (OSError, ValueError) as e:
+            return 23, "", f"Failed to start: main: failed to load config files: [{path}] > {e}\n"
+        return 0, "Configuration OK.\n", ""
+    return 1, "", f"xray: unknown command \"{command}\"\n"
+
+
+HANDLERS = {
+    "systemctl": systemctl,
+    "ss": ss,
+    "iptables": iptables,
+    "iptables-save": iptables_save,
+    "ufw": ufw,
+    "journalctl": journalctl,
+    "ip": ip,
+    "sysctl": sysctl,
+    "xray": xray,
+}
+
+
+def main(argv):
+    tool, args = argv[0], argv[1:]
+    config = _load("config")
+    latency = config.get("latency_ms", {})
+    delay = latency.get(tool, latency.get("default", 0))
+    if delay:
+        time.sleep(delay / 1000)
+    code, out, err = HANDLERS[tool](args)
+    sys.stdout.write(out)
+    sys.stderr.write(err)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,43 @@
+# Build the GeoIP database (GEOIP_DATABASE) from CSV range files, for
+# example DB-IP's free "IP to Country Lite" and "IP to ASN Lite" downloads:
+#   start,end,country            (country CSV; IP2Location's layout also works)
+#   start,end,asn,as_org         (ASN CSV; "network,asn,as_org" CIDR rows too)
+#
+# Usage (from backend/):
+#   python geoip_convert.py --country dbip-country-lite.csv --asn dbip-asn-lite.csv
+#   python geoip_convert.py --asn GeoLite2-ASN-Blocks-IPv4.csv --output /tmp/geoip.pvdb
+#
+# The service picks up a replaced file within a few seconds, no restart needed.
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from config import get_settings  # noqa: E402
+from services.geoip import convert_csv  # noqa: E402
+
+
+def main():
+    settings = get_settings()
+    default = settings.GEOIP_DATABASE or str(Path(settings.CONFIG_DIR) / "geoip.pvdb")
+    parser = argparse.ArgumentParser(description="Convert CSV IP ranges to a ProxyVault GeoIP database")
+    parser.add_argument("--country", help="CSV of start,end,country_code")
+    parser.add_argument("--asn", help="CSV of start,end,asn,as_org")
+    parser.add_argument("--output", default=default, help=f"Database file (default {default})")
+    args = parser.parse_args()
+    if not args.country and not args.asn:
+        parser.error("give --country and/or --asn")
+
+    start = time.perf_counter()
+    result = convert_csv(args.output, args.country, args.asn)
+    print(f"Wrote {args.output}: {result['ipv4']} IPv4 and {result['ipv6']} IPv6 ranges, "
+          f"{result['infos']} distinct country/ASN entries, {result['bytes'] / 1024 / 1024:.1f} MB "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
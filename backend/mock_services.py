@@ -7,6 +7,7 @@ class MockServiceManager:
     def __init__(self, service_name):
         self.service_name = service_name
         self.is_running = False
+        self.config_version = 0
         
     def get_status(self):
         return {
@@ -25,8 +26,12 @@ class MockServiceManager:
     
     def update_config(self, config_data):
         print(f"[MOCK] Updating {self.service_name} config:", config_data)
+        self.config_version += 1
         return True
     
+    def get_config_version(self):
+        return self.config_version
+    
     def control_service(self, action):
         print(f"[MOCK] {action} {self.service_name}")
         if action == "start":
@@ -40,17 +45,62 @@ class MockServiceManager:
 class MockHysteriaManager(MockServiceManager):
     def __init__(self):
         super().__init__("hysteria-server")
+    
+    def get_config(self):
+        # Same shape as the YAML HysteriaManager writes, so exports work
+        return {
+            "configured": True,
+            "config": {
+                "listen": ":36712",
+                "auth": {"type": "password", "password": "mock_password"},
+                "bandwidth": {"up": "100 mbps", "down": "100 mbps"},
+                "masquerade": {"type": "proxy", "proxy": {"url": "https://bing.com"}}
+            }
+        }
 
 class MockVLESSManager(MockServiceManager):
     def __init__(self):
         super().__init__("xray")
     
+    def get_config(self):
+        return {
+            "configured": True,
+            "config": {
+                "inbounds": [{
+                    "tag": "vless-in",
+                    "port": 8443,
+                    "protocol": "vless",
+                    "settings": {
+                        "clients": [{
+                            "id": "00000000-0000-4000-8000-000000000000",
+                            "flow": "xtls-rprx-vision"
+                        }],
+                        "decryption": "none"
+                    },
+                    "streamSettings": {
+                        "network": "tcp",
+                        "security": "reality",
+                        "realitySettings": {
+                            "dest": "www.microsoft.com:443",
+                            "serverNames": ["www.microsoft.com"],
+                            "privateKey": "mock_private_key_1234567890abcdef",
+                            "shortIds": [""]
+                        }
+                    }
+                }]
+            }
+        }
+    
     def generate_reality_keys(self):
         return {
             "private_key": "mock_private_key_1234567890abcdef",
             "public_key": "mock_public_key_0987654321fedcba"
         }
     
+    @staticmethod
+    def get_public_key(private_key):
+        return "mock_public_key_0987654321fedcba"
+    
     @staticmethod
     def generate_uuid():
         import uuid
@@ -60,6 +110,7 @@ class MockOpenVPNManager(MockServiceManager):
     def __init__(self):
         super().__init__("openvpn-client")
         self.connected = False
+        self.management = MockManagementClient()
     
     def get_status(self):
         return {
@@ -73,6 +124,15 @@ class MockOpenVPNManager(MockServiceManager):
         print(f"[MOCK] OpenVPN config updated (length: {len(config_content)} chars)")
         return True
     
+    def get_tunnel_stats(self):
+        return {
+            "attached": False,
+            "connected": self.connected,
+            "state": "CONNECTED" if self.connected else None,
+            "bytes_in": 0,
+            "bytes_out": 0
+        }
+    
     def control_service(self, action):
         result = super().control_service(action)
         if action == "start":
@@ -81,6 +141,16 @@ class MockOpenVPNManager(MockServiceManager):
             self.connected = False
         return result
 
+class MockManagementClient:
+    """Stand-in for OpenVPNManagementClient (no socket to attach to)"""
+    attached = False
+    
+    def start(self):
+        pass
+    
+    def stop(self):
+        pass
+
 class MockRoutingManager:
     def __init__(self):
         self.enabled = False
@@ -105,3 +175,276 @@ class MockRoutingManager:
         print("[MOCK] Disabling traffic routing")
         self.enabled = False
         return True
+
+class FakeOpenVPNManagementServer:
+    """Fake OpenVPN management socket (unix) for testing the live tunnel view
+
+    Answers ``state``/``bytecount`` commands like OpenVPN does and lets the
+    caller push ``>STATE:`` and ``>BYTECOUNT:`` notifications.
+    """
+    
+    def __init__(self, socket_path):
+        import threading
+        self.socket_path = socket_path
+        self.state = "1700000000,CONNECTED,SUCCESS,10.8.0.6,203.0.113.10,1194,,"
+        self.commands = []
+        self._clients = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+    
+    def start(self):
+        import os
+        import socket
+        import threading
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        self._server.listen(4)
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        import os
+        with self._lock:
+            for conn in self._clients:
+                conn.close()
+            self._clients = []
+        if self._server:
+            self._server.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+    
+    def _accept_loop(self):
+        import threading
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._clients.append(conn)
+            conn.sendall(b">INFO:OpenVPN Management Interface Version 3 -- type 'help' for more info\r\n")
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+    
+    def _serve(self, conn):
+        buffer = b""
+        while True:
+            try:
+                data = conn.recv(1024)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                self._handle_command(conn, line.decode().strip())
+    
+    def _handle_command(self, conn, command):
+        self.commands.append(command)
+        if command == "state":
+            conn.sendall(f"{self.state}\r\nEND\r\n".encode())
+        elif command == "state on":
+            conn.sendall(b"SUCCESS: real-time state notification set to ON\r\n")
+        elif command.startswith("bytecount"):
+            conn.sendall(b"SUCCESS: bytecount interval changed\r\n")
+        else:
+            conn.sendall(b"ERROR: unknown command, enter 'help' for more options\r\n")
+    
+    def push(self, line):
+        """Send a real-time notification to every attached client"""
+        with self._lock:
+            for conn in self._clients:
+                conn.sendall(f"{line}\r\n".encode())
+    
+    def push_state(self, state, detail="", local_ip="", remote_ip=""):
+        import time
+        self.state = f"{int(time.time())},{state},{detail},{local_ip},{remote_ip},1194,,"
+        self.push(f">STATE:{self.state}")
+    
+    def push_bytecount(self, bytes_in, bytes_out):
+        self.push(f">BYTECOUNT:{bytes_in},{bytes_out}")
+
+class FakeXrayAPIServer:
+    """Local stub of xray's gRPC API (HandlerService/StatsService) for testing
+
+    Decodes AlterInbound requests and keeps the resulting client list per
+    inbound tag, so callers can assert on what xray would have applied.
+    QueryStats answers from ``stats`` (counter name -> value).
+    """
+    
+    def __init__(self, port=0):
+        self.port = port
+        self.requests = []
+        self.clients = {}  # tag -> {email: uuid}
+        self.stats = {}  # e.g. "user>>>a@x>>>traffic>>>uplink" -> bytes
+        self._server = None
+    
+    def start(self):
+        from concurrent import futures
+        import grpc
+        handlers = {
+            "AlterInbound": grpc.unary_unary_rpc_method_handler(self._alter_inbound),
+        }
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        stats_handlers = {
+            "QueryStats": grpc.unary_unary_rpc_method_handler(self._query_stats),
+        }
+        self._server.add_generic_rpc_handlers((
+            grpc.method_handlers_generic_handler("xray.app.proxyman.command.HandlerService", handlers),
+            grpc.method_handlers_generic_handler("xray.app.stats.command.StatsService", stats_handlers),
+        ))
+        self.port = self._server.add_insecure_port(f"127.0.0.1:{self.port}")
+        self._server.start()
+        return self.port
+    
+    def stop(self):
+        if self._server:
+            self._server.stop(0)
+    
+    def _alter_inbound(self, request, context):
+        import grpc
+        from services.xray_api import decode_message
+        fields = dict(decode_message(request))
+        tag = fields[1].decode()
+        operation = dict(decode_message(fields[2]))
+        op_type = operation[1].decode()
+        op = dict(decode_message(operation.get(2, b"")))
+        clients = self.clients.setdefault(tag, {})
+        
+        if op_type.endswith("AddUserOperation"):
+            user = dict(decode_message(op[1]))
+            email = user[2].decode()
+            account = dict(decode_message(dict(decode_message(user[3]))[2]))
+            if email in clients:
+                context.abort(grpc.StatusCode.UNKNOWN, f"User {email} already exists.")
+            clients[email] = account[1].decode()
+            self.requests.append(("add", tag, email))
+        elif op_type.endswith("RemoveUserOperation"):
+            email = op[1].decode()
+            if email not in clients:
+                context.abort(grpc.StatusCode.UNKNOWN, f"User {email} not found.")
+            del clients[email]
+            self.requests.append(("remove", tag, email))
+        else:
+            context.abort(grpc.StatusCode.UNIMPLEMENTED, op_type)
+        return b""
+    
+    def _query_stats(self, request, context):
+        from services.xray_api import decode_message, encode_message
+        fields = dict(decode_message(request))
+        pattern = fields.get(1, b"").decode()
+        reset = bool(fields.get(2, 0))
+        response = b""
+        for name, value in list(self.stats.items()):
+            if pattern not in name:
+                continue
+            response += encode_message((1, encode_message((1, name), (2, value))))
+            if reset:
+                self.stats[name] = 0
+        self.requests.append(("query_stats", pattern, reset))
+        return response
+
+class FakeHysteriaStatsServer:
+    """Local stand-in for Hysteria's trafficStats HTTP API (/traffic, /online)"""
+    
+    def __init__(self, secret="secret", port=0):
+        self.secret = secret
+        self.port = port
+        self.traffic = {}  # user -> {"tx": bytes, "rx": bytes}
+        self.online = {}  # user -> connection count
+        self._server = None
+    
+    def start(self):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.headers.get("Authorization") != fake.secret:
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                if self.path.startswith("/traffic"):
+                    body = dict(fake.traffic)
+                    if "clear=1" in self.path:
+                        fake.traffic = {}
+                elif self.path == "/online":
+                    body = fake.online
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.port
+    
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+class FakeWebhookReceiver:
+    """Local stand-in for an alert webhook endpoint; records every POSTed event"""
+    
+    def __init__(self, port=0, status=200):
+        self.port = port
+        self.status = status  # reply code, e.g. 500 to test delivery failures
+        self.events = []
+        self._received = None
+        self._server = None
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/alerts"
+    
+    def start(self):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        fake = self
+        fake._received = threading.Condition()
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._received:
+                    fake.events.append(json.loads(body))
+                    fake._received.notify_all()
+                self.send_response(fake.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.port
+    
+    def wait_for(self, count, timeout=5):
+        """Block until at least ``count`` events arrived; returns them"""
+        with self._received:
+            self._received.wait_for(lambda: len(self.events) >= count, timeout)
+        return list(self.events)
+    
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,367 @@
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from config import get_settings
+
+settings = get_settings()
+
+# Fired/resolved events kept for the API
+MAX_EVENTS = 50
+
+# Webhook events waiting for delivery; newer ones are dropped beyond this
+WEBHOOK_QUEUE_SIZE = 100
+
+
+class Rule(ABC):
+    """Alert rule evaluated once per sample with constant state
+
+    ``check`` returns the observed value, or None when the sample has no
+    data for it (the rule then keeps its state). The rule fires once
+    ``breached`` has held for ``for_seconds`` and resolves on the first
+    sample where it doesn't.
+    """
+
+    def __init__(self, name: str, description: str, threshold: float, for_seconds: float = 0):
+        self.name = name
+        self.description = description
+        self.threshold = threshold
+        self.for_seconds = for_seconds
+        self.value = None
+        self.pending_since: Optional[float] = None
+        self.firing = False
+
+    @abstractmethod
+    def check(self, sample: Dict[str, Any]) -> Optional[float]:
+        """Observed value for this sample, or None if it has no data"""
+
+    def breached(self, value: float) -> bool:
+        return value > self.threshold
+
+    def update(self, sample: Dict[str, Any], now: float) -> Optional[str]:
+        """Advance the rule; returns 'firing' or 'resolved' on a transition"""
+        value = self.check(sample)
+        if value is None:
+            return None
+        self.value = value
+        if not self.breached(value):
+            self.pending_since = None
+            if self.firing:
+                self.firing = False
+                return 'resolved'
+            return None
+        if self.pending_since is None:
+            self.pending_since = now
+        if not self.firing and now - self.pending_since >= self.for_seconds:
+            self.firing = True
+            return 'firing'
+        return None
+
+    @property
+    def state(self) -> str:
+        if self.firing:
+            return 'firing'
+        return 'pending' if self.pending_since is not None else 'ok'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'description': self.description,
+            'state': self.state,
+            'value': self.value,
+            'threshold': self.threshold,
+            'for_seconds': self.for_seconds,
+            'since': self.pending_since
+        }
+
+
+class ThresholdRule(Rule):
+    """``sample[metric]`` above the threshold (or at/below it with ``below``)"""
+
+    def __init__(self, name: str, description: str, metric: str, threshold: float,
+                 for_seconds: float = 0, below: bool = False):
+        super().__init__(name, description, threshold, for_seconds)
+        self.metric = metric
+        self.below = below
+
+    def check(self, sample):
+        return sample.get(self.metric)
+
+    def breached(self, value):
+        return value <= self.threshold if self.below else value > self.threshold
+
+
+class UnitRule(Rule):
+    """A systemd unit that isn't active"""
+
+    def __init__(self, unit: str, for_seconds: float = 0):
+        super().__init__(f"unit_inactive:{unit}", f"{unit} is not active", 0, for_seconds)
+        self.unit = unit
+
+    def check(self, sample):
+        active = sample.get('units', {}).get(self.unit)
+        return None if active is None else (0 if active else 1)
+
+
+class GrowthRule(Rule):
+    """Growth rate of ``sample[metric]`` per hour, smoothed with an EWMA
+
+    Keeps only the previous value and the running average, so a slow leak
+    is caught without keeping a window of samples.
+    """
+
+    def __init__(self, name: str, description: str, metric: str, threshold: float,
+                 for_seconds: float = 0, alpha: float = 0.2):
+        super().__init__(name, description, threshold, for_seconds)
+        self.metric = metric
+        self.alpha = alpha
+        self._previous = None  # (time, value)
+        self._rate = None
+
+    def check(self, sample):
+        value = sample.get(self.metric)
+        now = sample['time']
+        previous, self._previous = self._previous, (now, value) if value is not None else None
+        if value is None or previous is None or now <= previous[0]:
+            return None
+        rate = (value - previous[1]) / (now - previous[0]) * 3600
+        self._rate = rate if self._rate is None else self.alpha * rate + (1 - self.alpha) * self._rate
+        return round(self._rate, 3)
+
+
+class FileSink:
+    """Appends each event as a JSON line"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def send(self, event: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+
+
+class WebhookSink:
+    """POSTs each event as JSON, off the sampler thread
+
+    One delivery thread sends the events in order, so an alert's
+    "resolved" never arrives before its "firing".
+    """
+
+    def __init__(self, url: str, timeout: float = 5):
+        self.url = url
+        self.timeout = timeout
+        self.last_error = None
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(WEBHOOK_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def send(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            print(f"Warning: Failed to queue alert for webhook: {WEBHOOK_QUEUE_SIZE} events pending")
+
+    def _run(self) -> None:
+        while True:
+            self._post(self._queue.get())
+
+    def _post(self, event: Dict[str, Any]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(event).encode(),
+            headers={'Content-Type': 'application/json', 'User-Agent': 'ProxyVault'},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Warning: Failed to deliver alert to webhook: {e}")
+
+
+class ThroughputMeter:
+    """KB/s of a cumulative byte counter between consecutive samples"""
+
+    def __init__(self):
+        self._previous = None  # (time, total)
+
+    def rate(self, total: int, now: float) -> Optional[float]:
+        previous, self._previous = self._previous, (now, total)
+        if previous is None or now <= previous[0]:
+            return None
+        return max(0, total - previous[1]) / (now - previous[0]) / 1024
+
+
+# Global instance
+proxy_throughput = ThroughputMeter()
+
+
+def proxy_downlink_bytes() -> Optional[int]:
+    """Bytes Hysteria and xray sent to clients, or None without a stats API"""
+    from services.hysteria_stats import hysteria_stats
+    from services.managers import is_created, get_vless_traffic
+
+    sources = []
+    if hysteria_stats.enabled:
+        sources.append(hysteria_stats.tx_bytes)
+    if is_created('vless_traffic') and get_vless_traffic().running:
+        sources.append(get_vless_traffic().downlink_bytes)
+    return sum(sources) if sources else None
+
+
+def collect_sample() -> Dict[str, Any]:
+    """Alert inputs for one tick (runs after the sampler's 'stats')"""
+    import psutil
+    from services.monitoring import monitoring_manager
+    from services.interfaces import interface_cache
+    from services.commands import run_command
+    from services.managers import get_routing_manager
+
+    sample = {'time': time.time()}
+    if monitoring_manager.cpu_history:
+        sample['cpu_percent'] = monitoring_manager.cpu_history[-1]['value']
+    # What the proxies deliver, not host-wide traffic: SSH, dashboard polls
+    # and keepalives never stop, a dead tunnel or stalled proxy still does
+    downlink = proxy_downlink_bytes()
+    if downlink is not None:
+        rate = proxy_throughput.rate(downlink, sample['time'])
+        if rate is not None:
+            sample['proxy_kbs'] = rate
+    sample['disk_percent'] = psutil.disk_usage('/').percent
+
+    # Units of the services that are configured on this host
+    units = {}
+    for unit, config in ((settings.HYSTERIA_SERVICE, settings.HYSTERIA_CONFIG),
+                         (settings.VLESS_SERVICE, settings.VLESS_CONFIG),
+                         (settings.OPENVPN_SERVICE, settings.OPENVPN_CONFIG)):
+        if not os.path.exists(config):
+            continue
+        try:
+            result = run_command(['systemctl', 'is-active', unit], capture_output=True, text=True, timeout=5)
+            units[unit] = result.stdout.strip() == 'active'
+        except Exception:
+            pass
+    sample['units'] = units
+
+    # The tunnel only has to be up while traffic is routed through it
+    sample['tun_down'] = 0
+    if get_routing_manager().is_routing_enabled():
+        tun = interface_cache.get_vpn_interface(exclude=settings.VPN_STANDBY_INTERFACE or None)
+        info = interface_cache.get(tun) if tun else None
+        if not (info and info.get('is_up')):
+            sample['tun_down'] = 1
+
+    if units.get(settings.VLESS_SERVICE):
+        try:
+            result = run_command(
+                ['systemctl', 'show', settings.VLESS_SERVICE, '--property=MainPID', '--value'],
+                capture_output=True, text=True, timeout=5
+            )
+            pid = int(result.stdout.strip() or 0)
+            if pid > 0:
+                sample['xray_rss_mb'] = psutil.Process(pid).memory_info().rss / 1024 / 1024
+        except Exception:
+            pass
+    return sample
+
+
+class AlertEngine:
+    """Evaluates alert rules on every sampler tick and notifies the sinks
+
+    Runs in the leader worker as a shared monitoring section, so each rule
+    sees every sample exactly once and followers serve the result.
+    """
+
+    def __init__(self, rules: List[Rule], sinks: Optional[list] = None, unit_for_seconds: float = 60):
+        self.rules: Dict[str, Rule] = {rule.name: rule for rule in rules}
+        self.sinks = list(sinks or [])
+        self.unit_for_seconds = unit_for_seconds
+        self.events = deque(maxlen=MAX_EVENTS)
+
+    def add_sink(self, sink) -> None:
+        self.sinks.append(sink)
+
+    def evaluate(self, sample: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Feed one sample to every rule; returns the current alert state"""
+        sample = sample if sample is not None else collect_sample()
+        now = sample.setdefault('time', time.time())
+        for unit in sample.get('units', {}):
+            name = f"unit_inactive:{unit}"
+            if name not in self.rules:
+                self.rules[name] = UnitRule(unit, self.unit_for_seconds)
+
+        for rule in list(self.rules.values()):
+            transition = rule.update(sample, now)
+            if transition:
+                self._notify(rule, transition, now)
+        return self.get_state()
+
+    def _notify(self, rule: Rule, transition: str, now: float) -> None:
+        event = {
+            'alert': rule.name,
+            'status': transition,
+            'description': rule.description,
+            'value': rule.value,
+            'threshold': rule.threshold,
+            'time': now,
+            'host': os.uname().nodename
+        }
+        self.events.append(event)
+        for sink in self.sinks:
+            try:
+                sink.send(event)
+            except Exception as e:
+                print(f"Warning: Failed to send alert to {type(sink).__name__}: {e}")
+
+    def get_state(self) -> Dict[str, Any]:
+        rules = [rule.to_dict() for rule in self.rules.values()]
+        return {
+            'firing': [rule for rule in rules if rule['state'] == 'firing'],
+            'rules': rules,
+            'events': list(reversed(self.events))
+        }
+
+
+def default_rules() -> List[Rule]:
+    minutes = 60
+    rules = [
+        ThresholdRule('cpu_high', f"CPU above {settings.ALERT_CPU_PERCENT}%",
+                      'cpu_percent', settings.ALERT_CPU_PERCENT, settings.ALERT_CPU_MINUTES * minutes),
+        ThresholdRule('disk_full', f"Disk usage above {settings.ALERT_DISK_PERCENT}%",
+                      'disk_percent', settings.ALERT_DISK_PERCENT),
+        ThresholdRule('tun_down', "VPN tunnel down while routing is enabled",
+                      'tun_down', 0, settings.ALERT_UNIT_MINUTES * minutes),
+    ]
+    if settings.ALERT_ZERO_BANDWIDTH_MINUTES:
+        rules.append(ThresholdRule('bandwidth_zero', "No traffic delivered by the proxies",
+                                   'proxy_kbs', 0, settings.ALERT_ZERO_BANDWIDTH_MINUTES * minutes,
+                                   below=True))
+    if settings.ALERT_XRAY_RSS_GROWTH_MB_PER_HOUR:
+        rules.append(GrowthRule('xray_rss_growth',
+                                f"xray memory growing over {settings.ALERT_XRAY_RSS_GROWTH_MB_PER_HOUR} MB/h",
+                                'xray_rss_mb', settings.ALERT_XRAY_RSS_GROWTH_MB_PER_HOUR, 30 * minutes))
+    return rules
+
+
+def default_sinks() -> list:
+    sinks = [FileSink(settings.ALERT_LOG_FILE or Path(settings.CONFIG_DIR) / "alerts.jsonl")]
+    if settings.ALERT_WEBHOOK_URL:
+        sinks.append(WebhookSink(settings.ALERT_WEBHOOK_URL))
+    return sinks
+
+
+# Global instance
+alert_engine = AlertEngine(default_rules(), default_sinks(), settings.ALERT_UNIT_MINUTES * 60)
@@ -0,0 +1,179 @@
+import datetime
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Tuple
+from services.shared_state import file_lock
+
+# CN the exported client configs use as SNI
+CERT_COMMON_NAME = "bing.com"
+CERT_VALID_DAYS = 36500
+
+
+class CertificateProvisioner:
+    """Provisions Hysteria's self-signed TLS certificate in-process
+
+    Generates an ECDSA P-256 key (cheaper QUIC handshakes than RSA-2048)
+    with ``cryptography``, in a background thread. Files are written to
+    temporary names and renamed into place, so Hysteria never sees a
+    half-written cert/key pair; a lock next to the cert keeps worker
+    processes from provisioning at the same time.
+
+    A self-signed non-EC (RSA) pair created by earlier versions is
+    replaced once, and ``on_rotated`` is called so the service can pick
+    up the new key.
+    """
+
+    def __init__(self, cert_dir: Path, owner: str = "hysteria",
+                 on_rotated: Optional[Callable[[], None]] = None):
+        self.cert_file = Path(cert_dir) / "cert.pem"
+        self.key_file = Path(cert_dir) / "key.pem"
+        self.owner = owner
+        self.on_rotated = on_rotated
+        self.last_error = None
+        self._upgrade_checked = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        if self.exists():
+            self._ready.set()
+
+    def exists(self) -> bool:
+        return self.cert_file.exists() and self.key_file.exists()
+
+    def paths(self) -> Tuple[str, str]:
+        """Certificate and key paths (valid once provisioning completes)"""
+        return str(self.cert_file), str(self.key_file)
+
+    def _needs_upgrade(self) -> bool:
+        """Whether the existing pair is one of our self-signed RSA ones"""
+        from cryptography import x509
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.x509.oid import NameOID
+
+        try:
+            with open(self.key_file, 'rb') as f:
+                key = serialization.load_pem_private_key(f.read(), password=None)
+            with open(self.cert_file, 'rb') as f:
+                cert = x509.load_pem_x509_certificate(f.read())
+        except (OSError, ValueError, TypeError):
+            return False
+        if isinstance(key, ec.EllipticCurvePrivateKey):
+            return False
+        # Only replace what this tool created, never an operator-supplied cert
+        names = cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+        return cert.issuer == cert.subject and [n.value for n in names] == [CERT_COMMON_NAME]
+
+    def _is_current(self) -> bool:
+        if not self.exists():
+            return False
+        if not self._upgrade_checked:
+            if self._needs_upgrade():
+                return False
+            self._upgrade_checked = True
+        return True
+
+    def ensure_async(self) -> None:
+        """Provision in the background if the certificate is missing or outdated"""
+        if self._is_current():
+            self._ready.set()
+            return
+        threading.Thread(target=self.ensure, name="cert-provision", daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def ensure(self) -> None:
+        """Generate the certificate if it doesn't exist yet (or is RSA)"""
+        with self._lock:
+            if self._is_current():
+                self._ready.set()
+                return
+            rotated = False
+            try:
+                with file_lock(self.cert_file):
+                    # Another worker may have provisioned it meanwhile
+                    self._upgrade_checked = False
+                    if not self._is_current():
+                        rotated = self.exists()
+                        self._generate()
+                        self._upgrade_checked = True
+                self.last_error = None
+                self._ready.set()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Warning: Failed to provision TLS certificate: {e}")
+                return
+        if rotated:
+            print("Replaced the self-signed RSA certificate with ECDSA P-256")
+            if self.on_rotated:
+                try:
+                    self.on_rotated()
+                except Exception as e:
+                    print(f"Warning: Failed to apply the new TLS certificate: {e}")
+
+    def _generate(self) -> None:
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.x509.oid import NameOID
+
+        key = ec.generate_private_key(ec.SECP256R1())
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, CERT_COMMON_NAME)])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=CERT_VALID_DAYS))
+            .add_extension(
+                x509.SubjectAlternativeName([x509.DNSName(CERT_COMMON_NAME)]),
+                critical=False
+            )
+            .sign(key, hashes.SHA256())
+        )
+
+        self.cert_file.parent.mkdir(parents=True, exist_ok=True)
+        # Key first: the cert's appearance is what marks provisioning done
+        self._publish(self.key_file, key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ), 0o640)
+        self._publish(self.cert_file, cert.public_bytes(serialization.Encoding.PEM), 0o644)
+
+    def _publish(self, path: Path, data: bytes, mode: int) -> None:
+        """Write to a temp file with final permissions, then rename atomically"""
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            os.unlink(tmp_path)  # Left over by a crashed process with our pid
+        except FileNotFoundError:
+            pass
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+
+        # Hysteria runs as its own user and must be able to read the key
+        try:
+            import pwd, grp
+            os.chown(tmp_path, pwd.getpwnam(self.owner).pw_uid, grp.getgrnam(self.owner).gr_gid)
+        except KeyError:
+            # If hysteria user doesn't exist, keep as root but make readable
+            os.chmod(tmp_path, 0o644)
+        except PermissionError:
+            pass
+        os.replace(tmp_path, path)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.exists(),
+            "cert": str(self.cert_file),
+            "key": str(self.key_file),
+            "error": self.last_error
+        }
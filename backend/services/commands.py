@@ -0,0 +1,208 @@
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, List, Optional, Sequence
+from config import get_settings
+
+settings = get_settings()
+
+# ASGI scope of the request being served (set by PerfMiddleware), so time
+# spent in child processes is charged to the route that caused it
+current_request: ContextVar[Optional[dict]] = ContextVar('current_request', default=None)
+
+COMMAND_TIME_KEY = 'proxyvault.command_time'
+COMMAND_COUNT_KEY = 'proxyvault.command_count'
+
+# Slowest invocations kept per binary
+SLOWEST_PER_BINARY = 5
+
+# Characters of stderr kept per traced command
+STDERR_LIMIT = 500
+
+
+def _truncate(output) -> Optional[str]:
+    if not output:
+        return None
+    if isinstance(output, bytes):
+        output = output[:STDERR_LIMIT * 4].decode('utf-8', errors='replace')
+    output = output.strip()
+    if len(output) > STDERR_LIMIT:
+        return output[:STDERR_LIMIT] + '...'
+    return output
+
+
+class CommandStats:
+    """Per-binary call counts, failures and timings of external commands
+
+    Also keeps the most recent invocations in a bounded ring buffer with
+    their argv, duration, exit code and (truncated) stderr.
+    """
+
+    def __init__(self, trace_size: int = 500):
+        self.binaries: Dict[str, Dict[str, Any]] = {}
+        self.trace = deque(maxlen=trace_size)
+        self._lock = threading.Lock()
+
+    def record(self, args: Sequence[str], elapsed: float, returncode: Optional[int],
+               stderr=None, error: Optional[str] = None, request: Optional[str] = None) -> None:
+        binary = os.path.basename(args[0]) if args else '?'
+        entry = {
+            'time': time.time(),
+            'binary': binary,
+            'argv': list(args),
+            'duration_ms': round(elapsed * 1000, 2),
+            'returncode': returncode,
+            'stderr': _truncate(stderr),
+            'error': error,
+            'request': request
+        }
+        with self._lock:
+            self.trace.append(entry)
+            stats = self.binaries.get(binary)
+            if stats is None:
+                stats = self.binaries[binary] = {
+                    'count': 0, 'failures': 0, 'total': 0.0, 'max': 0.0, 'slowest': []
+                }
+            stats['count'] += 1
+            stats['total'] += elapsed
+            if elapsed > stats['max']:
+                stats['max'] = elapsed
+            if returncode != 0:
+                stats['failures'] += 1
+            slowest = stats['slowest']
+            if len(slowest) < SLOWEST_PER_BINARY or elapsed > slowest[-1][0]:
+                slowest.append((elapsed, ' '.join(args)))
+                slowest.sort(reverse=True)
+                del slowest[SLOWEST_PER_BINARY:]
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Binaries ordered by total time spent in them"""
+        with self._lock:
+            rows = [
+                {
+                    'binary': binary,
+                    'count': s['count'],
+                    'failures': s['failures'],
+                    'total_ms': round(s['total'] * 1000, 2),
+                    'avg_ms': round(s['total'] / s['count'] * 1000, 2),
+                    'max_ms': round(s['max'] * 1000, 2),
+                    'slowest': [
+                        {'ms': round(elapsed * 1000, 2), 'command': command}
+                        for elapsed, command in s['slowest']
+                    ]
+                }
+                for binary, s in self.binaries.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def get_trace(self, command: Optional[str] = None, min_ms: float = 0,
+                  failed: bool = False, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent commands first
+
+        ``command`` is a binary name (``iptables``) or, when it contains a
+        space, a prefix of the command line (``ip rule``).
+        """
+        with self._lock:
+            entries = list(self.trace)
+        result = []
+        for entry in reversed(entries):
+            if entry['duration_ms'] < min_ms:
+                continue
+            if failed and entry['returncode'] == 0:
+                continue
+            if command:
+                if ' ' in command:
+                    if not ' '.join(entry['argv']).startswith(command):
+                        continue
+                elif entry['binary'] != command:
+                    continue
+            result.append(entry)
+            if len(result) >= limit:
+                break
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self.binaries.clear()
+            self.trace.clear()
+
+
+def _record(args: Sequence[str], elapsed: float, returncode: Optional[int], stderr, error: Optional[str]) -> None:
+    scope = current_request.get()
+    command_stats.record(
+        args, elapsed, returncode, stderr, error,
+        f"{scope['method']} {scope['path']}" if scope is not None else None
+    )
+    if scope is not None:
+        scope[COMMAND_TIME_KEY] = scope.get(COMMAND_TIME_KEY, 0.0) + elapsed
+        scope[COMMAND_COUNT_KEY] = scope.get(COMMAND_COUNT_KEY, 0) + 1
+
+
+def run_command(args: Sequence[str], **kwargs) -> subprocess.CompletedProcess:
+    """``subprocess.run`` with timing and tracing, charged to the current route
+
+    Takes the same arguments and raises the same exceptions.
+    """
+    returncode = None
+    stderr = None
+    error = None
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(args, **kwargs)
+        returncode = result.returncode
+        stderr = result.stderr
+        return result
+    except subprocess.CalledProcessError as e:
+        returncode = e.returncode
+        stderr = e.stderr
+        raise
+    except Exception as e:
+        # Missing binary, timeout, ...
+        error = f"{type(e).__name__}: {e}"
+        stderr = getattr(e, 'stderr', None)
+        raise
+    finally:
+        _record(args, time.perf_counter() - start, returncode, stderr, error)
+
+
+@contextmanager
+def stream_command(args: Sequence[str]) -> Iterator[Iterator[bytes]]:
+    """Iterate over a command's stdout lines as they are produced
+
+    For output too large to hold in memory (``conntrack -L`` on a busy
+    host). Traced like ``run_command``.
+    """
+    returncode = None
+    stderr = None
+    error = None
+    start = time.perf_counter()
+    # stderr goes to a file so a chatty command can't block on a full pipe
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=stderr_file)
+            try:
+                yield process.stdout
+            finally:
+                # A command still writing gets SIGPIPE; one that hangs is killed
+                process.stdout.close()
+                try:
+                    returncode = process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    returncode = process.wait()
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _record(args, time.perf_counter() - start, returncode, stderr, error)
+
+
+# Global instance
+command_stats = CommandStats(settings.COMMAND_TRACE_SIZE)
@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from services.serialization import EncodedBody
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag for a response identified by ``parts`` (key and version)"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of one representation: strong validators differ per content encoding"""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """The tag in ``If-None-Match`` naming ``etag``'s content in any encoding"""
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == '*':
+        return etag
+    base = etag.strip('"')
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.strip('"').partition('-')[0] == base:
+            return tag
+    return None
+
+
+class ConditionalCache:
+    """Serialized bodies of versioned responses, keyed by their ETag
+
+    Endpoints whose content has a cheap version (file signatures, a change
+    counter, the snapshot time) derive the ETag from the version alone, so
+    ``If-None-Match`` is answered without building the content, and a full
+    response for an unchanged version is served without re-serializing it.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._bodies: "OrderedDict[str, EncodedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_body(self, etag: str, build: Callable[[], Any]) -> EncodedBody:
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+                return body
+        body = EncodedBody.of(build())
+        with self._lock:
+            self._bodies[etag] = body
+            while len(self._bodies) > self.maxsize:
+                self._bodies.popitem(last=False)
+        return body
+
+
+# Global instance
+conditional_cache = ConditionalCache()
@@ -0,0 +1,264 @@
+import heapq
+import ipaddress
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from config import get_settings
+from services.commands import stream_command
+from services.geoip import geoip_resolver
+
+settings = get_settings()
+
+# Talkers published in the monitoring snapshot
+TOP_N = 100
+
+# One tcp/udp conntrack entry, as in /proc/net/nf_conntrack and
+# ``conntrack -L -o extended``: the original tuple (client -> server) then
+# the reply tuple (server -> client). packets=/bytes= are only present with
+# net.netfilter.nf_conntrack_acct=1.
+_ENTRY = re.compile(
+    rb'\b(tcp|udp)\s+\d+\s+(\d+)\s+(?:([A-Z_]+)\s+)?'
+    rb'src=(\S+) dst=\S+ sport=(\d+) dport=(\d+) (?:packets=(\d+) bytes=(\d+) )?'
+    rb'(?:\[UNREPLIED\] )?src=\S+ dst=\S+ sport=(\d+) dport=\d+(?: packets=(\d+) bytes=(\d+))?'
+)
+
+
+def _number_at(line: bytes, start: int) -> int:
+    end = line.find(b' ', start)
+    # int() ignores the trailing newline when the field ends the line
+    return int(line[start:end] if end > 0 else line[start:])
+
+
+def _address(raw: bytes) -> str:
+    """Canonical form (/proc prints IPv6 addresses fully expanded)"""
+    text = raw.decode('ascii')
+    try:
+        return ipaddress.ip_address(text).compressed
+    except ValueError:
+        return text
+
+
+class SpaceSaving:
+    """Heaviest keys of a weighted stream in bounded memory (Space-Saving)
+
+    Holds between ``capacity`` and twice as many counters. When full, it
+    keeps the ``capacity`` largest and raises ``floor`` to the largest count
+    it dropped; a new key starts at ``floor`` (its ``error``). Reported
+    counts are therefore upper bounds at most ``error`` too high, and a key
+    heavier than ``floor`` is never lost. Evicting in batches keeps the
+    per-item cost to a dict lookup.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # key -> [count, error, data]; data is the caller's, reset on eviction
+        self.counters: Dict[Any, list] = {}
+        self.floor = 0
+        self.total = 0
+
+    def add(self, key, weight: int = 1) -> list:
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+            return counter
+        if len(self.counters) >= 2 * self.capacity:
+            self._evict()
+        counter = self.counters[key] = [self.floor + weight, self.floor, None]
+        return counter
+
+    def _evict(self) -> None:
+        ranked = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        self.floor = max(self.floor, ranked[self.capacity][1][0])
+        self.counters = dict(ranked[:self.capacity])
+
+    def top(self, n: int) -> List[Tuple[Any, list]]:
+        return heapq.nlargest(n, self.counters.items(), key=lambda item: item[1][0])
+
+
+class ConntrackCollector:
+    """Top client IPs on the proxy ports, from the kernel's conntrack table
+
+    Streams the table once per CONNTRACK_INTERVAL and feeds every proxy
+    flow to a Space-Saving summary, so memory stays at CONNTRACK_CAPACITY
+    counters however many flows are tracked. Clients are the original
+    source; the service is picked by the reply tuple's source port, which
+    is the port the proxy really answered on (after any DNAT).
+
+    Byte counts are the totals of flows still in the table, so the rates
+    are net changes between scans and read low while flows are closing.
+    """
+
+    def __init__(self, path: str, capacity: int = 1000, interval: float = 30):
+        self.path = path
+        self.capacity = capacity
+        self.interval = interval
+        self._result: Optional[Dict[str, Any]] = None
+        self._previous: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _service_ports(self) -> Dict[Tuple[bytes, bytes], str]:
+        """(protocol, port) -> service, as bytes like the table; follows Hysteria's port range"""
+        from services.managers import get_hysteria_manager
+        hysteria = [settings.HYSTERIA_PORT]
+        listen = str(get_hysteria_manager().get_config().get('config', {}).get('listen', ''))
+        start, _, end = listen.rpartition(':')[2].partition('-')
+        if start.isdigit():
+            hysteria = range(int(start), int(end if end.isdigit() else start) + 1)
+        ports = {(b'udp', str(port).encode()): 'hysteria' for port in hysteria}
+        ports[(b'tcp', str(settings.VLESS_PORT).encode())] = 'vless'
+        return ports
+
+    def _lines(self) -> Iterator[bytes]:
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                yield from f
+        else:
+            # /proc/net/nf_conntrack needs CONFIG_NF_CONNTRACK_PROCFS; ask netlink
+            with stream_command(['conntrack', '-L', '-o', 'extended']) as lines:
+                yield from lines
+
+    def scan(self) -> Dict[str, Any]:
+        """Stream the table once and summarize the proxy flows"""
+        start = time.perf_counter()
+        ports = self._service_ports()
+        summary = SpaceSaving(self.capacity)
+        services = {name: {'flows': 0, 'bytes': 0, 'packets': 0} for name in set(ports.values())}
+        flows = 0
+        accounting = False
+        # Cheap checks first: most lines are rejected on their reply port
+        numbers = {port for _, port in ports}
+        for line in self._lines():
+            flows += 1
+            reply = line.rfind(b' sport=')
+            if reply < 0:
+                continue
+            port = line[reply + 7:line.find(b' ', reply + 7)]
+            if port not in numbers:
+                continue
+            service = ports.get((line.split(None, 3)[2], port))
+            if service is None:
+                continue
+            source = line.find(b'src=') + 4
+            client = line[source:line.find(b' ', source)]
+            counted = line.find(b' packets=', source)
+            if 0 < counted < reply:
+                accounting = True
+                down = line.rfind(b' packets=')
+                packets = _number_at(line, counted + 9) + _number_at(line, down + 9)
+                size = _number_at(line, line.find(b' bytes=', counted) + 7) + \
+                    _number_at(line, line.find(b' bytes=', down) + 7)
+            else:
+                size = packets = 0
+            totals = services[service]
+            totals['flows'] += 1
+            totals['bytes'] += size
+            totals['packets'] += packets
+            # Without accounting every flow weighs the same: ranked by flow count
+            weight = size if accounting else 1
+            counter = summary.add(client, weight)
+            data = counter[2]
+            if data is None:
+                data = counter[2] = {'flows': 0, 'packets': 0, 'services': {}}
+            data['flows'] += 1
+            data['packets'] += packets
+            data['services'][service] = data['services'].get(service, 0) + weight
+        now = time.time()
+
+        with self._lock:
+            previous, previous_time = self._previous, self._result['time'] if self._result else None
+            talkers = []
+            for raw, (count, error, data) in summary.top(TOP_N):
+                client = _address(raw)
+                # ``count``/``error`` are bytes, or flows without accounting;
+                # the other fields only cover the time since the counter was taken
+                entry = {
+                    'client': client,
+                    'bytes': count if accounting else None,
+                    'flows': data['flows'] if accounting else count,
+                    'error': error,
+                    'packets': data['packets'],
+                    'services': data['services'],
+                    'bytes_per_sec': None
+                }
+                if accounting and client in previous and now > previous_time:
+                    entry['bytes_per_sec'] = round(max(0, count - previous[client]) / (now - previous_time), 1)
+                talkers.append(entry)
+            geoip_resolver.annotate(talkers)
+            self._previous = {_address(raw): counter[0] for raw, counter in summary.counters.items()} \
+                if accounting else {}
+            self._result = {
+                'time': now,
+                'scan_ms': round((time.perf_counter() - start) * 1000, 2),
+                'flows': flows,
+                'proxy_flows': sum(totals['flows'] for totals in services.values()),
+                'accounting': accounting,
+                'ranked_by': 'bytes' if accounting else 'flows',
+                'capacity': self.capacity,
+                'services': services,
+                'talkers': talkers
+            }
+            return self._result
+
+    def get_talkers(self) -> Dict[str, Any]:
+        """Latest summary, rescanning when it is older than the interval"""
+        result = self._result
+        if result is not None and time.time() - result['time'] < self.interval:
+            return result
+        try:
+            return self.scan()
+        except Exception as e:
+            print(f"Warning: Failed to read conntrack table: {e}")
+            # Retried after the interval, not on every sample
+            self._result = {'time': time.time(), 'error': str(e), 'services': {}, 'talkers': []}
+            return self._result
+
+    def get_client_flows(self, client: str, limit: int = 200) -> Dict[str, Any]:
+        """Proxy flows of one client IP (one pass over the table)"""
+        address = ipaddress.ip_address(client)
+        # conntrack prints IPv6 compressed, /proc fully expanded
+        needles = [f"src={form} ".encode() for form in {address.compressed, address.exploded}]
+        ports = self._service_ports()
+        flows = []
+        count = 0
+        for line in self._lines():
+            if not any(needle in line for needle in needles):
+                continue
+            match = _ENTRY.search(line)
+            if match is None or _address(match.group(4)) != address.compressed:
+                continue
+            proto, timeout, state, _, client_port, dport, out_packets, out_bytes, port, in_packets, in_bytes = match.groups()
+            service = ports.get((proto, port))
+            if service is None:
+                continue
+            count += 1
+            if len(flows) >= limit:
+                continue
+            flows.append({
+                'service': service,
+                'protocol': proto.decode(),
+                'client_port': int(client_port),
+                'server_port': int(dport),
+                'state': state.decode() if state else None,
+                'expires_in': int(timeout),
+                # Up is client -> proxy (original direction), down the reply
+                'bytes_up': int(out_bytes) if out_bytes is not None else None,
+                'bytes_down': int(in_bytes) if in_bytes is not None else None,
+                'packets_up': int(out_packets) if out_packets is not None else None,
+                'packets_down': int(in_packets) if in_packets is not None else None
+            })
+        flows.sort(key=lambda flow: (flow['bytes_up'] or 0) + (flow['bytes_down'] or 0), reverse=True)
+        return {
+            'client': address.compressed,
+            'geo': geoip_resolver.lookup(address.compressed),
+            'flow_count': count,
+            'flows': flows
+        }
+
+
+# Global instance
+conntrack_collector = ConntrackCollector(
+    settings.CONNTRACK_PATH, settings.CONNTRACK_CAPACITY, settings.CONNTRACK_INTERVAL
+)
@@ -2,6 +2,7 @@ import base64
 import json
 from typing import Dict, Any, Optional
 from urllib.parse import quote
+from services.server_address import server_address
 
 
 class ConfigExporter:
@@ -17,8 +18,10 @@ class ConfigExporter:
         else:
             port_str = str(config_data['port'])
         
+        host = ConfigExporter._format_host(server_ip)
+        
         # Hysteria 2 YAML config
-        yaml_config = f"""server: {server_ip}:{port_str}
+        yaml_config = f"""server: {host}:{port_str}
 
 auth: {config_data['password']}
 
@@ -51,7 +54,7 @@ http:
         # Format: hysteria2://password@server:port/?sni=xxx&insecure=1&obfs=salamander&obfs-password=xxx
         # Password must be URL-encoded to handle special characters
         encoded_password = quote(config_data['password'], safe='')
-        uri_parts = [f"hysteria2://{encoded_password}@{server_ip}:{port_str}"]
+        uri_parts = [f"hysteria2://{encoded_password}@{host}:{port_str}"]
         params = ["sni=bing.com", "insecure=1"]  # SNI matches cert CN, insecure for self-signed
         
         if config_data.get('obfs'):
@@ -64,7 +67,7 @@ http:
             "yaml": yaml_config,
             "uri": uri,
             "json": {
-                "server": f"{server_ip}:{port_str}",
+                "server": f"{host}:{port_str}",
                 "auth": config_data['password'],
                 "bandwidth": {
                     "up": config_data.get('bandwidth_up', '100 mbps'),
@@ -94,7 +97,8 @@ http:
             f"sid="  # Short ID, empty is valid
         ]
         
-        uri = f"vless://{config_data['uuid']}@{server_ip}:{config_data['port']}?" + "&".join(params) + "#ProxyVault-VLESS"
+        host = ConfigExporter._format_host(server_ip)
+        uri = f"vless://{config_data['uuid']}@{host}:{config_data['port']}?" + "&".join(params) + "#ProxyVault-VLESS"
         
         # JSON config for v2rayN/Nekobox
         json_config = {
@@ -139,20 +143,13 @@ Short ID: (empty)
     
     @staticmethod
     def get_server_ip() -> str:
-        """Get server's public IP address"""
-        try:
-            import subprocess
-            result = subprocess.run(
-                ['curl', '-s', 'ifconfig.me'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()
-        except Exception:
-            pass
-        return "YOUR_SERVER_IP"
+        """Get server's public IP address (cached, see ServerAddressResolver)"""
+        return server_address.get_address()
+    
+    @staticmethod
+    def _format_host(server_ip: str) -> str:
+        """Bracket IPv6 literals for use in host:port strings and URIs"""
+        return f"[{server_ip}]" if ':' in server_ip else server_ip
 
 
 # Global instance
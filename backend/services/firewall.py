@@ -1,5 +1,10 @@
-import subprocess
+import shutil
 from typing import List, Dict, Any, Optional
+from services.commands import run_command
+from services.shared_state import file_signature
+
+# Files ufw rewrites on every rule or enable/disable change
+UFW_STATE_FILES = ('/etc/ufw/ufw.conf', '/etc/ufw/user.rules', '/etc/ufw/user6.rules')
 
 
 class FirewallManager:
@@ -10,15 +15,17 @@ class FirewallManager:
         
     def _check_ufw(self) -> bool:
         """Check if UFW is installed and available"""
-        try:
-            result = subprocess.run(
-                ['which', 'ufw'],
-                capture_output=True,
-                text=True
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
+        # PATH lookup in-process instead of forking `which`
+        return shutil.which('ufw') is not None
+    
+    def get_version(self) -> tuple:
+        """Cheap token that changes whenever the status/rules may have changed
+
+        Covers changes made through ProxyVault and outside it alike (``ufw``
+        rewrites its state files), without running ``ufw status``, and is the
+        same in every worker process.
+        """
+        return (self.ufw_available,) + tuple(file_signature(p) for p in UFW_STATE_FILES)
     
     def is_ufw_enabled(self) -> bool:
         """Check if UFW is enabled"""
@@ -26,7 +33,7 @@ class FirewallManager:
             return False
         
         try:
-            result = subprocess.run(
+            result = run_command(
                 ['ufw', 'status'],
                 capture_output=True,
                 text=True
@@ -45,7 +52,7 @@ class FirewallManager:
             if comment:
                 cmd.extend(['comment', comment])
             
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_command(cmd, check=True, capture_output=True)
             return True
         except Exception as e:
             print(f"Warning: Failed to configure firewall for port {port}: {e}")
@@ -61,7 +68,7 @@ class FirewallManager:
             if comment:
                 cmd.extend(['comment', comment])
             
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_command(cmd, check=True, capture_output=True)
             return True
         except Exception as e:
             print(f"Warning: Failed to configure firewall for range {port_start}-{port_end}: {e}")
@@ -73,7 +80,7 @@ class FirewallManager:
             return True
         
         try:
-            subprocess.run(
+            run_command(
                 ['ufw', 'delete', 'allow', f'{port}/{protocol}'],
                 check=False,  # Don't fail if rule doesn't exist
                 capture_output=True
@@ -88,7 +95,7 @@ class FirewallManager:
             return True
         
         try:
-            subprocess.run(
+            run_command(
                 ['ufw', 'delete', 'allow', f'{port_start}:{port_end}/{protocol}'],
                 check=False,
                 capture_output=True
@@ -103,7 +110,7 @@ class FirewallManager:
             return ["UFW not available"]
         
         try:
-            result = subprocess.run(
+            result = run_command(
                 ['ufw', 'status', 'numbered'],
                 capture_output=True,
                 text=True
@@ -0,0 +1,364 @@
+import csv
+import ipaddress
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from config import get_settings
+from services.shared_state import file_signature
+
+settings = get_settings()
+
+MAGIC = b'PVGEOIP1'
+# magic, IPv4 ranges, IPv6 ranges, infos, name bytes, build time
+_HEADER = struct.Struct('<8sIIIIQ')
+_LOW_64 = (1 << 64) - 1
+
+# Seconds between checks for a replaced database file
+RELOAD_CHECK_INTERVAL = 5
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def parse_ip(ip: str) -> Tuple[int, int]:
+    """(version, integer) of an address; IPv4-mapped IPv6 counts as IPv4
+
+    ``inet_pton`` is several times cheaper than ``ipaddress`` on this path.
+    """
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, TypeError):
+        pass
+    try:
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    except (OSError, TypeError):
+        raise ValueError(f"{ip!r} does not appear to be an IPv4 or IPv6 address")
+    if value >> 32 == 0xFFFF:
+        return 4, value & 0xFFFFFFFF
+    return 6, value
+
+
+class GeoIPDatabase:
+    """Sorted IP range file, memory-mapped and searched in place
+
+    Layout (little-endian, each column 8-byte aligned after the header):
+
+    - IPv4: start, end, info as ``u32`` columns
+    - IPv6: start high/low, end high/low as ``u64`` columns, info ``u32``
+    - infos: ASN ``u32``, end offset of the AS name ``u32``, country as 2 bytes
+    - AS names, UTF-8, back to back
+
+    Opening reads the 32-byte header only. The columns are memoryviews over
+    the mapping, so a lookup is a C ``bisect`` over pages the kernel loads
+    on demand and shares between workers.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError("GeoIP databases are little-endian; this host is not")
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, v4, v6, infos, names, self.built = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a ProxyVault GeoIP database")
+        self.ranges = {'ipv4': v4, 'ipv6': v6}
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+
+        def column(code: str, count: int, width: int):
+            nonlocal offset
+            end = offset + count * width
+            if end > len(view):
+                raise ValueError(f"{path} is truncated")
+            data = view[offset:end]
+            offset = _align(end)
+            return data.cast(code) if code else data
+
+        self._v4_start = column('I', v4, 4)
+        self._v4_end = column('I', v4, 4)
+        self._v4_info = column('I', v4, 4)
+        self._v6_start_high = column('Q', v6, 8)
+        self._v6_start_low = column('Q', v6, 8)
+        self._v6_end_high = column('Q', v6, 8)
+        self._v6_end_low = column('Q', v6, 8)
+        self._v6_info = column('I', v6, 4)
+        self._asn = column('I', infos, 4)
+        self._name_end = column('I', infos, 4)
+        self._country = column(None, infos * 2, 1)
+        self._names = column(None, names, 1)
+
+    def _find(self, version: int, value: int) -> Optional[int]:
+        """Info index of the range holding an address"""
+        if version == 4:
+            i = bisect_right(self._v4_start, value) - 1
+            if i < 0 or self._v4_end[i] < value:
+                return None
+            return self._v4_info[i]
+
+        # Starts sort by (high, low): find the high block, then search its lows
+        high, low = value >> 64, value & _LOW_64
+        left = bisect_left(self._v6_start_high, high)
+        right = bisect_right(self._v6_start_high, high, left)
+        i = bisect_right(self._v6_start_low, low, left, right) - 1
+        if i < left:
+            i = left - 1
+        if i < 0 or (self._v6_end_high[i], self._v6_end_low[i]) < (high, low):
+            return None
+        return self._v6_info[i]
+
+    def _info(self, index: int) -> Dict[str, Any]:
+        start = self._name_end[index - 1] if index else 0
+        country = bytes(self._country[index * 2:index * 2 + 2]).rstrip(b'\0').decode('ascii')
+        return {
+            'country': country or None,
+            'asn': self._asn[index] or None,
+            'as_org': bytes(self._names[start:self._name_end[index]]).decode('utf-8') or None
+        }
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Country/ASN of ``ip``, or None if no range holds it"""
+        index = self._find(*parse_ip(ip))
+        return None if index is None else self._info(index)
+
+
+class GeoIPResolver:
+    """Country/ASN of client IPs from GEOIP_DATABASE, with a small LRU
+
+    The database is opened on the first lookup, not at startup, and is
+    reopened when the file is replaced. Without a database every lookup
+    returns None.
+    """
+
+    def __init__(self, path, cache_size: int = 4096):
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self._database: Optional[GeoIPDatabase] = None
+        self._signature = None
+        self._checked = None
+        self._cache: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[GeoIPDatabase]:
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < RELOAD_CHECK_INTERVAL:
+            return self._database
+        with self._lock:
+            self._checked = now
+            signature = file_signature(self.path)
+            if signature != self._signature:
+                self._signature = signature
+                self._cache.clear()
+                # The old mapping is unmapped once no lookup holds it
+                self._database = None
+                if signature is not None:
+                    try:
+                        self._database = GeoIPDatabase(self.path)
+                    except Exception as e:
+                        print(f"Warning: Failed to load GeoIP database {self.path}: {e}")
+        return self._database
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Country, ASN and AS name of ``ip`` (raises ValueError if it isn't an IP)"""
+        database = self._current()
+        if database is None:
+            parse_ip(ip)
+            return None
+        with self._lock:
+            if ip in self._cache:
+                self._cache.move_to_end(ip)
+                return self._cache[ip]
+        result = database.lookup(ip)
+        with self._lock:
+            self._cache[ip] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def annotate(self, entries: List[Dict[str, Any]], key: str = 'client') -> List[Dict[str, Any]]:
+        """Add ``geo`` to each entry from its ``key`` address"""
+        for entry in entries:
+            try:
+                entry['geo'] = self.lookup(entry[key])
+            except ValueError:
+                entry['geo'] = None
+        return entries
+
+    def get_info(self) -> Dict[str, Any]:
+        database = self._current()
+        return {
+            'path': str(self.path),
+            'loaded': database is not None,
+            'ranges': database.ranges if database else None,
+            'built': database.built if database else None,
+            'cached': len(self._cache)
+        }
+
+
+# Converter: CSV ranges -> database file
+
+Range = Tuple[int, int, Any]
+
+
+def _parse_bound(text: str) -> Tuple[int, int]:
+    """(version, integer) of an address given as text or as an integer"""
+    text = text.strip()
+    if text.isdigit():
+        value = int(text)
+        return (4 if value <= 0xFFFFFFFF else 6), value
+    address = ipaddress.ip_address(text)
+    return address.version, int(address)
+
+
+def read_csv_ranges(path, fields: int) -> Dict[int, List[Range]]:
+    """Ranges per IP version from a CSV file, sorted and without overlaps
+
+    Rows are ``start,end,<fields...>`` (addresses as text or integers, as
+    in DB-IP and IP2Location files) or ``network,<fields...>`` in CIDR form.
+    Header and malformed rows are skipped.
+    """
+    ranges: Dict[int, List[Range]] = {4: [], 6: []}
+    skipped = 0
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            try:
+                if '/' in row[0]:
+                    network = ipaddress.ip_network(row[0].strip(), strict=False)
+                    version = network.version
+                    start, end = int(network.network_address), int(network.broadcast_address)
+                    values = row[1:1 + fields]
+                else:
+                    version, start = _parse_bound(row[0])
+                    end_version, end = _parse_bound(row[1])
+                    if end_version != version or end < start:
+                        raise ValueError(row)
+                    values = row[2:2 + fields]
+                if len(values) < fields:
+                    raise ValueError(row)
+            except (ValueError, IndexError):
+                skipped += 1
+                continue
+            ranges[version].append((start, end, tuple(value.strip() for value in values)))
+
+    for version, items in ranges.items():
+        items.sort(key=lambda item: item[0])
+        clean = []
+        for start, end, value in items:
+            if clean and start <= clean[-1][1]:
+                start = clean[-1][1] + 1
+                if start > end:
+                    continue
+            clean.append((start, end, value))
+        ranges[version] = clean
+    if skipped:
+        print(f"Warning: Skipped {skipped} rows of {path}")
+    return ranges
+
+
+def _value_at(items: List[Range], position: List[int], address: int):
+    i = position[0]
+    while i < len(items) and items[i][1] < address:
+        i += 1
+    position[0] = i
+    return items[i][2] if i < len(items) and items[i][0] <= address else None
+
+
+def merge_ranges(countries: List[Range], asns: List[Range]) -> List[Range]:
+    """Overlay country and ASN ranges into ranges of (country, asn, as_org)
+
+    Adjacent ranges with the same values are joined.
+    """
+    bounds = sorted(
+        {start for start, _, _ in countries} | {end + 1 for _, end, _ in countries} |
+        {start for start, _, _ in asns} | {end + 1 for _, end, _ in asns}
+    )
+    merged: List[Range] = []
+    country_at, asn_at = [0], [0]
+    for start, following in zip(bounds, bounds[1:]):
+        country = _value_at(countries, country_at, start)
+        asn = _value_at(asns, asn_at, start)
+        if country is None and asn is None:
+            continue
+        value = (
+            country[0] if country else '',
+            asn[0] if asn else '',
+            asn[1] if asn and len(asn) > 1 else ''
+        )
+        if merged and merged[-1][1] == start - 1 and merged[-1][2] == value:
+            merged[-1] = (merged[-1][0], following - 1, value)
+        else:
+            merged.append((start, following - 1, value))
+    return merged
+
+
+def write_database(path, ranges: Dict[int, List[Range]]) -> Dict[str, int]:
+    """Write merged ranges (values are (country, asn, as_org)) to ``path``"""
+    infos: Dict[tuple, int] = {}
+    asn_column, name_end, countries, names = array('I'), array('I'), bytearray(), bytearray()
+
+    def info_index(value) -> int:
+        country, asn, name = value
+        country = country.upper() if len(country) == 2 and country.isalpha() and country.upper() != 'ZZ' else ''
+        asn = asn.upper().removeprefix('AS')
+        key = (country, int(asn) if asn.isdigit() else 0, name)
+        index = infos.get(key)
+        if index is None:
+            index = infos[key] = len(infos)
+            asn_column.append(key[1])
+            names.extend(name.encode('utf-8'))
+            name_end.append(len(names))
+            countries.extend(country.encode('ascii').ljust(2, b'\0'))
+        return index
+
+    v4, v6 = ranges.get(4, []), ranges.get(6, [])
+    columns = [
+        array('I', (start for start, _, _ in v4)),
+        array('I', (end for _, end, _ in v4)),
+        array('I', (info_index(value) for _, _, value in v4)),
+        array('Q', (start >> 64 for start, _, _ in v6)),
+        array('Q', (start & _LOW_64 for start, _, _ in v6)),
+        array('Q', (end >> 64 for _, end, _ in v6)),
+        array('Q', (end & _LOW_64 for _, end, _ in v6)),
+        array('I', (info_index(value) for _, _, value in v6)),
+        asn_column, name_end, countries, names
+    ]
+
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(v4), len(v6), len(infos), len(names), int(time.time())))
+        for data in columns:
+            if isinstance(data, array) and sys.byteorder != 'little':
+                data.byteswap()
+            data = bytes(data)
+            f.write(data)
+            f.write(b'\0' * (_align(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+    return {'ipv4': len(v4), 'ipv6': len(v6), 'infos': len(infos), 'bytes': path.stat().st_size}
+
+
+def convert_csv(output, country_csv=None, asn_csv=None) -> Dict[str, int]:
+    """Build a database from a country CSV (``..., country``) and/or an ASN
+    CSV (``..., asn, as_org``)"""
+    if not country_csv and not asn_csv:
+        raise ValueError("Need a country and/or an ASN CSV file")
+    countries = read_csv_ranges(country_csv, 1) if country_csv else {4: [], 6: []}
+    asns = read_csv_ranges(asn_csv, 2) if asn_csv else {4: [], 6: []}
+    return write_database(output, {
+        version: merge_ranges(countries[version], asns[version]) for version in (4, 6)
+    })
+
+
+# Global instance
+geoip_resolver = GeoIPResolver(
+    settings.GEOIP_DATABASE or Path(settings.CONFIG_DIR) / "geoip.pvdb", settings.GEOIP_CACHE_SIZE
+)
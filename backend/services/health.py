@@ -0,0 +1,256 @@
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from config import get_settings
+from services.commands import run_command
+
+settings = get_settings()
+
+# Routing table used by RoutingManager for marked proxy traffic
+ROUTE_TABLE = "100"
+
+# Latency above this budget starts lowering the health score
+LATENCY_BUDGET_MS = 300.0
+
+# Number of probes the rolling health score is averaged over
+SCORE_WINDOW = 6
+
+
+def remove_standby_nat(interface: str) -> None:
+    """Delete the MASQUERADE rule added for the standby tunnel on failover"""
+    run_command(
+        ["iptables", "-t", "nat", "-D", "POSTROUTING",
+         "-o", interface, "-j", "MASQUERADE"],
+        check=False,
+        capture_output=True
+    )
+
+
+class VPNHealthMonitor:
+    """Probes the OpenVPN tunnel and fails routing over when it stalls"""
+
+    def __init__(self, routing_manager):
+        self.routing = routing_manager
+        self.target = settings.VPN_PROBE_TARGET
+        self.interval = settings.VPN_PROBE_INTERVAL
+        self.count = settings.VPN_PROBE_COUNT
+        self.threshold = settings.VPN_HEALTH_THRESHOLD
+        self.recovery_threshold = settings.VPN_RECOVERY_THRESHOLD
+        self.standby_interface = settings.VPN_STANDBY_INTERFACE or None
+
+        # Probe history (last 60 probes) and switch events (last 50)
+        self.probe_history = deque(maxlen=60)
+        self.switch_events = deque(maxlen=50)
+        self.scores = deque(maxlen=SCORE_WINDOW)
+
+        # 'primary' = table 100 routes via the VPN, 'failover' = via standby/direct
+        self.active_route = "primary"
+        self.primary_interface = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the background prober"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="vpn-health", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background prober"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Warning: VPN health probe failed: {e}")
+            self._stop.wait(self.interval)
+
+    def check(self) -> Optional[Dict[str, Any]]:
+        """Run one probe, update the health score and fail over if needed
+
+        Nothing is probed while routing is disabled: proxy traffic doesn't
+        use the tunnel then, and the score starts afresh once it does.
+        """
+        if not self.routing.is_routing_enabled():
+            # enable_routing() always installs the VPN route again
+            with self._lock:
+                self.active_route = "primary"
+                self.scores.clear()
+            return None
+
+        interface = self.routing._get_vpn_interface()
+        if interface:
+            self.primary_interface = interface
+            probe = self.probe(interface)
+        else:
+            probe = {
+                'time': datetime.now().strftime('%H:%M:%S'),
+                'interface': None,
+                'loss': 100.0,
+                'latency_ms': None,
+                'score': 0.0
+            }
+
+        with self._lock:
+            self.probe_history.append(probe)
+            self.scores.append(probe['score'])
+            score = self.health_score()
+
+        if len(self.scores) >= min(3, SCORE_WINDOW):
+            if self.active_route == "primary" and score < self.threshold:
+                self._switch_to_failover(score)
+            elif self.active_route == "failover" and score >= self.recovery_threshold and interface:
+                self._switch_to_primary(interface, score)
+
+        return probe
+
+    def probe(self, interface: str) -> Dict[str, Any]:
+        """Measure latency and packet loss through the given interface"""
+        loss = 100.0
+        latency = None
+        try:
+            result = run_command(
+                ['ping', '-n', '-q', '-I', interface, '-c', str(self.count),
+                 '-W', '1', self.target],
+                capture_output=True,
+                text=True,
+                timeout=self.count + 5
+            )
+            loss_match = re.search(r'([\d.]+)% packet loss', result.stdout)
+            if loss_match:
+                loss = float(loss_match.group(1))
+            rtt_match = re.search(r'= [\d.]+/([\d.]+)/', result.stdout)
+            if rtt_match:
+                latency = float(rtt_match.group(1))
+        except Exception:
+            pass
+
+        score = 100.0 - loss
+        if latency and latency > LATENCY_BUDGET_MS:
+            score *= LATENCY_BUDGET_MS / latency
+
+        return {
+            'time': datetime.now().strftime('%H:%M:%S'),
+            'interface': interface,
+            'loss': loss,
+            'latency_ms': latency,
+            'score': round(score, 1)
+        }
+
+    def health_score(self) -> float:
+        """Rolling health score (0-100) over the last probes"""
+        if not self.scores:
+            return 100.0
+        return round(sum(self.scores) / len(self.scores), 1)
+
+    def _switch_to_failover(self, score: float) -> None:
+        """Point table 100 at the standby tunnel or the direct route"""
+        if self.standby_interface:
+            route = ["default", "dev", self.standby_interface]
+            target = self.standby_interface
+            # Standby tunnel needs NAT just like the primary one
+            exists = run_command(
+                ["iptables", "-t", "nat", "-C", "POSTROUTING",
+                 "-o", self.standby_interface, "-j", "MASQUERADE"],
+                capture_output=True
+            )
+            if exists.returncode != 0:
+                run_command(
+                    ["iptables", "-t", "nat", "-A", "POSTROUTING",
+                     "-o", self.standby_interface, "-j", "MASQUERADE"],
+                    capture_output=True
+                )
+        else:
+            route = self._get_direct_route()
+            target = "direct"
+            if not route:
+                self._record_event("failover", target, score, "No direct route found")
+                return
+
+        if self._replace_route(route):
+            self.active_route = "failover"
+            self._record_event("failover", target, score)
+
+    def _switch_to_primary(self, interface: str, score: float) -> None:
+        """Point table 100 back at the VPN tunnel"""
+        if self._replace_route(["default", "dev", interface]):
+            self.active_route = "primary"
+            self._record_event("recovery", interface, score)
+            if self.standby_interface:
+                remove_standby_nat(self.standby_interface)
+
+    def _replace_route(self, route: List[str]) -> bool:
+        """Atomically replace the default route in table 100"""
+        result = run_command(
+            ["ip", "route", "replace"] + route + ["table", ROUTE_TABLE],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            self._record_event("error", " ".join(route), self.health_score(), result.stderr.strip())
+            return False
+        return True
+
+    def _get_direct_route(self) -> Optional[List[str]]:
+        """Get the main table default route (via gateway on the uplink)"""
+        try:
+            result = run_command(
+                ["ip", "-4", "route", "show", "default"],
+                capture_output=True,
+                text=True
+            )
+            for line in result.stdout.split('\n'):
+                parts = line.split()
+                if 'dev' not in parts:
+                    continue
+                route = ["default"]
+                if 'via' in parts:
+                    route += ["via", parts[parts.index('via') + 1]]
+                route += ["dev", parts[parts.index('dev') + 1]]
+                return route
+        except Exception:
+            pass
+        return None
+
+    def _record_event(self, event: str, target: str, score: float, error: str = None) -> None:
+        entry = {
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': time.time(),
+            'event': event,
+            'target': target,
+            'score': score
+        }
+        if error:
+            entry['error'] = error
+        with self._lock:
+            self.switch_events.append(entry)
+
+    def get_health(self) -> Dict[str, Any]:
+        """Get current health score, active route, probe history and switch events"""
+        with self._lock:
+            return {
+                'enabled': settings.VPN_PROBE_ENABLED,
+                'probing': settings.VPN_PROBE_ENABLED and self.routing.is_routing_enabled(),
+                'score': self.health_score(),
+                'healthy': self.health_score() >= self.threshold,
+                'active_route': self.active_route,
+                'primary_interface': self.primary_interface,
+                'standby': self.standby_interface or 'direct',
+                'threshold': self.threshold,
+                'recovery_threshold': self.recovery_threshold,
+                'probes': list(self.probe_history),
+                'events': list(self.switch_events)
+            }
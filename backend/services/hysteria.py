@@ -1,12 +1,19 @@
 import subprocess
-import os
+import secrets
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from config import get_settings
+from services.user_store import HysteriaUserStore
+from services.certificates import CertificateProvisioner
+from services.commands import run_command
+from services.shared_state import file_signature
 
 settings = get_settings()
 
+# Name of the user that carries the shared password in HTTP auth mode
+DEFAULT_USER = "default"
+
 
 class HysteriaManager:
     """Manages Hysteria 2 proxy service"""
@@ -17,11 +24,14 @@ class HysteriaManager:
         # Import firewall manager
         from services.firewall import firewall_manager
         self.firewall = firewall_manager
+        self.users = HysteriaUserStore(Path(settings.CONFIG_DIR) / "hysteria_users.jsonl")
+        self.certs = CertificateProvisioner(self.config_path.parent, on_rotated=self._restart_if_running)
+        self.auth_url = f"http://127.0.0.1:{settings.API_PORT}/internal/hysteria/auth"
         
     def get_status(self) -> Dict[str, Any]:
         """Get Hysteria service status"""
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["systemctl", "is-active", self.service_name],
                 capture_output=True,
                 text=True
@@ -31,7 +41,8 @@ class HysteriaManager:
             return {
                 "running": is_running,
                 "service": self.service_name,
-                "config_exists": self.config_path.exists()
+                "config_exists": self.config_path.exists(),
+                "tls_ready": self.certs.exists()
             }
         except Exception as e:
             return {
@@ -54,6 +65,10 @@ class HysteriaManager:
         except Exception as e:
             return {"configured": False, "error": str(e)}
     
+    def get_config_version(self) -> tuple:
+        """Changes whenever the config or user list changes (two ``stat`` calls)"""
+        return file_signature(self.config_path), file_signature(self.users.path)
+    
     def update_config(self, config_data: Dict[str, Any]) -> bool:
         """Update Hysteria configuration with port hopping support"""
         try:
@@ -82,47 +97,32 @@ class HysteriaManager:
                 hysteria_config["listen"] = f":{config_data['port']}"
             
             # TLS configuration - use self-signed certificates
-            # Generate self-signed cert if it doesn't exist
-            cert_dir = self.config_path.parent
-            cert_file = cert_dir / "cert.pem"
-            key_file = cert_dir / "key.pem"
-            
-            if not cert_file.exists() or not key_file.exists():
-                # Generate self-signed certificate
-                subprocess.run([
-                    'openssl', 'req', '-x509', '-nodes', '-newkey', 'rsa:2048',
-                    '-keyout', str(key_file),
-                    '-out', str(cert_file),
-                    '-days', '36500',
-                    '-subj', '/CN=bing.com'
-                ], check=True, capture_output=True)
-                
-                # Set proper permissions and ownership for hysteria-server to read
-                os.chmod(cert_file, 0o644)  # readable by all
-                os.chmod(key_file, 0o640)   # readable by owner and group
-                
-                # Change ownership to hysteria user (who runs the service)
-                try:
-                    import pwd, grp
-                    hysteria_uid = pwd.getpwnam('hysteria').pw_uid
-                    hysteria_gid = grp.getgrnam('hysteria').gr_gid
-                    os.chown(cert_file, hysteria_uid, hysteria_gid)
-                    os.chown(key_file, hysteria_uid, hysteria_gid)
-                except KeyError:
-                    # If hysteria user doesn't exist, keep as root but make readable
-                    os.chmod(key_file, 0o644)
+            # Provisioned in the background (ECDSA P-256) if missing
+            self.certs.ensure_async()
+            cert_file, key_file = self.certs.paths()
             
             # Use TLS with self-signed cert (not ACME)
             hysteria_config["tls"] = {
-                "cert": str(cert_file),
-                "key": str(key_file)
+                "cert": cert_file,
+                "key": key_file
             }
             
             # Authentication
-            hysteria_config["auth"] = {
-                "type": "password",
-                "password": config_data['password']
-            }
+            if config_data.get('auth_type') == 'http':
+                # Per-user auth: Hysteria asks ProxyVault for every new connection;
+                # the shared password keeps working as the "default" user
+                self._set_default_password(config_data['password'])
+                hysteria_config["auth"] = {
+                    "type": "http",
+                    "http": {
+                        "url": self.auth_url
+                    }
+                }
+            else:
+                hysteria_config["auth"] = {
+                    "type": "password",
+                    "password": config_data['password']
+                }
             
             # Add optional obfuscation
             if config_data.get('obfs'):
@@ -133,6 +133,12 @@ class HysteriaManager:
                     }
                 }
             
+            # Traffic stats API (per-user bytes / online clients), localhost only
+            hysteria_config["trafficStats"] = {
+                "listen": f"127.0.0.1:{settings.HYSTERIA_STATS_PORT}",
+                "secret": self._get_stats_secret()
+            }
+            
             # Add bandwidth limits
             if config_data.get('bandwidth_up'):
                 hysteria_config["bandwidth"] = {
@@ -159,13 +165,56 @@ class HysteriaManager:
         except Exception as e:
             raise Exception(f"Failed to update Hysteria config: {str(e)}")
     
+    def _get_stats_secret(self) -> str:
+        """Keep the existing trafficStats secret across config updates"""
+        current = self.get_config()
+        if current.get('configured'):
+            secret = (current['config'].get('trafficStats') or {}).get('secret')
+            if secret:
+                return secret
+        return secrets.token_hex(16)
+    
+    def _set_default_password(self, password: str) -> None:
+        self.users.set_password(DEFAULT_USER, password)
+    
+    def _restart_if_running(self) -> None:
+        """Restart Hysteria so it loads a replaced certificate"""
+        result = run_command(["systemctl", "is-active", self.service_name], capture_output=True, text=True)
+        if result.stdout.strip() == "active":
+            run_command(["systemctl", "restart", self.service_name], capture_output=True, check=True)
+    
+    def authenticate(self, password: str) -> Optional[str]:
+        """Resolve a client password to its user ID (in-memory, O(1))"""
+        return self.users.authenticate(password)
+    
+    def add_user(self, name: str, password: Optional[str] = None) -> Dict[str, Any]:
+        """Add a Hysteria user (takes effect immediately in HTTP auth mode)"""
+        return self.users.add(name, password)
+    
+    def remove_user(self, name: str) -> Dict[str, Any]:
+        """Remove a Hysteria user"""
+        return self.users.remove(name)
+    
+    def set_user_enabled(self, name: str, enabled: bool) -> Dict[str, Any]:
+        """Enable or disable a Hysteria user"""
+        return self.users.set_enabled(name, enabled)
+    
+    def list_users(self) -> List[Dict[str, Any]]:
+        """List Hysteria users"""
+        return self.users.list()
+    
     def control_service(self, action: str) -> str:
         """Control Hysteria service (start/stop/restart/status)"""
         if action not in ["start", "stop", "restart", "status"]:
             raise ValueError(f"Invalid action: {action}")
         
+        # Hysteria can't start without its certificate
+        if action in ("start", "restart") and self.config_path.exists():
+            self.certs.ensure_async()
+            self.certs.wait(timeout=10)
+        
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["systemctl", action, self.service_name],
                 capture_output=True,
                 text=True,
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+from config import get_settings
+
+settings = get_settings()
+
+
+class HysteriaStatsCollector:
+    """Polls Hysteria's trafficStats API for per-user bytes and online clients
+
+    Called on each monitoring sample: ``/traffic?clear=1`` returns the bytes
+    since the previous call, which become per-user rates; ``/online`` gives
+    current connection counts per user.
+    """
+
+    def __init__(self):
+        self.config_path = Path(settings.HYSTERIA_CONFIG)
+        self.history = deque(maxlen=60)
+        self.totals: Dict[str, Dict[str, int]] = {}
+        self.latest: Dict[str, Any] = {'users': {}, 'tx': 0, 'rx': 0, 'online': 0}
+        self.tx_bytes = 0  # sent to clients since start, all users
+        self.last_error = None
+
+        self._endpoint = None
+        self._config_mtime = None
+        self._last_collect = None
+        self._lock = threading.Lock()
+
+    def _load_endpoint(self) -> Optional[Dict[str, str]]:
+        """Read the trafficStats listener/secret, re-parsing only on change"""
+        try:
+            mtime = os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+        if mtime != self._config_mtime:
+            self._config_mtime = mtime
+            self._endpoint = None
+            try:
+                import yaml
+                with open(self.config_path, 'r') as f:
+                    stats = (yaml.safe_load(f) or {}).get('trafficStats')
+                if stats and stats.get('listen'):
+                    self._endpoint = {
+                        'url': f"http://{stats['listen']}",
+                        'secret': stats.get('secret', '')
+                    }
+            except Exception:
+                pass
+        return self._endpoint
+
+    def _get(self, endpoint: Dict[str, str], path: str) -> Dict[str, Any]:
+        import urllib.request
+        request = urllib.request.Request(
+            endpoint['url'] + path,
+            headers={'Authorization': endpoint['secret']}
+        )
+        with urllib.request.urlopen(request, timeout=2) as response:
+            return json.loads(response.read() or b'{}')
+
+    def collect(self) -> Optional[Dict[str, Any]]:
+        """Take one sample; returns None when the stats API isn't configured"""
+        endpoint = self._load_endpoint()
+        if not endpoint:
+            return None
+        try:
+            traffic = self._get(endpoint, '/traffic?clear=1')
+            online = self._get(endpoint, '/online')
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            return None
+
+        now = time.monotonic()
+        elapsed = now - self._last_collect if self._last_collect else None
+        self._last_collect = now
+
+        users = {}
+        with self._lock:
+            for user in set(traffic) | set(online):
+                delta = traffic.get(user, {})
+                tx, rx = delta.get('tx', 0), delta.get('rx', 0)
+                total = self.totals.setdefault(user, {'tx': 0, 'rx': 0})
+                total['tx'] += tx
+                total['rx'] += rx
+                self.tx_bytes += tx
+                users[user] = {
+                    # KB/s like the rest of the monitoring history
+                    'tx': round(tx / elapsed / 1024, 2) if elapsed else 0,
+                    'rx': round(rx / elapsed / 1024, 2) if elapsed else 0,
+                    'online': online.get(user, 0)
+                }
+
+            sample = {
+                'time': datetime.now().strftime('%H:%M:%S'),
+                't': round(time.time(), 3),
+                'tx': round(sum(u['tx'] for u in users.values()), 2),
+                'rx': round(sum(u['rx'] for u in users.values()), 2),
+                'online': sum(u['online'] for u in users.values()),
+                'users': users
+            }
+            self.latest = sample
+            self.history.append(sample)
+        return sample
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the config exposes the trafficStats API"""
+        return self._endpoint is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latest per-user rates, online counts and cumulative totals"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'current': self.latest,
+                'totals': {user: dict(total) for user, total in self.totals.items()},
+                'error': self.last_error
+            }
+
+    def get_history(self):
+        with self._lock:
+            return list(self.history)
+
+
+# Global instance
+hysteria_stats = HysteriaStatsCollector()
@@ -0,0 +1,191 @@
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+SYS_CLASS_NET = Path("/sys/class/net")
+
+# ARPHRD_* link types from /sys/class/net/<if>/type
+ARPHRD_ETHER = 1
+ARPHRD_LOOPBACK = 772
+
+# /sys/class/net/<if>/tun_flags only exists for tun/tap devices
+IFF_TAP = 0x0002
+IFF_UP = 0x1
+
+# rtnetlink multicast groups that signal link/address changes
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+# Rebuild interval when no netlink events are available
+FALLBACK_TTL = 30
+# Safety net rebuild interval while netlink keeps the cache fresh
+NETLINK_TTL = 600
+
+
+class InterfaceCache:
+    """Shared cache of network interfaces and their addresses
+
+    Built from a single ``/sys/class/net`` scan plus one ``getifaddrs``
+    call, and invalidated by rtnetlink link/address notifications so
+    callers never parse ``ip`` output or walk interfaces per request.
+    """
+
+    def __init__(self):
+        self._interfaces: Dict[str, Dict[str, Any]] = {}
+        self._built_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+        self._netlink = None
+        self._thread = None
+
+    def start(self) -> None:
+        """Subscribe to rtnetlink link/address events (Linux only)"""
+        if self._thread and self._thread.is_alive():
+            return
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        except (AttributeError, OSError):
+            return  # Fall back to TTL-based refresh
+        self._netlink = sock
+        self._thread = threading.Thread(
+            target=self._watch, name="netlink-watch", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        sock, self._netlink = self._netlink, None
+        if sock:
+            sock.close()
+
+    def _watch(self) -> None:
+        # Any RTM_NEWLINK/DELLINK/NEWADDR/DELADDR message invalidates the cache
+        while self._netlink:
+            try:
+                if not self._netlink.recv(65536):
+                    break
+            except OSError:
+                break
+            self._dirty = True
+        self._netlink = None
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def _is_stale(self) -> bool:
+        ttl = NETLINK_TTL if self._netlink else FALLBACK_TTL
+        return self._dirty or time.monotonic() - self._built_at > ttl
+
+    def get_interfaces(self) -> Dict[str, Dict[str, Any]]:
+        """Get all interfaces keyed by name"""
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._dirty = False
+                    self._interfaces = self._scan()
+                    self._built_at = time.monotonic()
+        return self._interfaces
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.get_interfaces().get(name)
+
+    def get_vpn_interface(self, exclude: Optional[str] = None) -> Optional[str]:
+        """Get the first tun (then tap) interface, detected by link type"""
+        interfaces = self.get_interfaces()
+        for kind in ("tun", "tap"):
+            for name in sorted(interfaces):
+                if interfaces[name]["kind"] == kind and name != exclude:
+                    return name
+        return None
+
+    def get_ipv4(self, name: str) -> Optional[str]:
+        """Get the first IPv4 address of an interface"""
+        info = self.get(name)
+        if not info:
+            return None
+        for addr in info["addresses"]:
+            if addr["type"] == "IPv4":
+                return addr["address"]
+        return None
+
+    def _scan(self) -> Dict[str, Dict[str, Any]]:
+        addrs = psutil.net_if_addrs()
+        if SYS_CLASS_NET.is_dir():
+            names = os.listdir(SYS_CLASS_NET)
+        else:
+            names = list(addrs)
+            stats = psutil.net_if_stats()
+
+        interfaces = {}
+        for name in names:
+            if SYS_CLASS_NET.is_dir():
+                info = self._read_sysfs(name)
+            else:
+                st = stats.get(name)
+                info = {
+                    "kind": "tun" if name.startswith("tun") else "other",
+                    "is_up": st.isup if st else False,
+                    "speed": st.speed if st else 0,
+                    "mtu": st.mtu if st else 0
+                }
+            info["name"] = name
+            info["addresses"] = self._format_addresses(addrs.get(name, []))
+            interfaces[name] = info
+        return interfaces
+
+    def _read_sysfs(self, name: str) -> Dict[str, Any]:
+        base = SYS_CLASS_NET / name
+        link_type = _read_int(base / "type")
+        flags = _read_int(base / "flags", base=16)
+
+        tun_flags = _read_int(base / "tun_flags", base=16)
+        if tun_flags is not None:
+            kind = "tap" if tun_flags & IFF_TAP else "tun"
+        elif link_type == ARPHRD_LOOPBACK:
+            kind = "loopback"
+        elif link_type == ARPHRD_ETHER:
+            kind = "ether"
+        else:
+            kind = "other"
+
+        speed = _read_int(base / "speed")
+        return {
+            "kind": kind,
+            "is_up": bool(flags & IFF_UP) if flags is not None else False,
+            "speed": speed if speed and speed > 0 else 0,
+            "mtu": _read_int(base / "mtu") or 0
+        }
+
+    @staticmethod
+    def _format_addresses(addrs) -> List[Dict[str, Any]]:
+        result = []
+        for addr in addrs:
+            if addr.family == socket.AF_INET:
+                result.append({
+                    'type': 'IPv4',
+                    'address': addr.address,
+                    'netmask': addr.netmask
+                })
+            elif addr.family == socket.AF_INET6:
+                result.append({
+                    'type': 'IPv6',
+                    'address': addr.address
+                })
+        return result
+
+
+def _read_int(path: Path, base: int = 10) -> Optional[int]:
+    try:
+        return int(path.read_text().strip(), base)
+    except (OSError, ValueError):
+        return None
+
+
+# Global instance
+interface_cache = InterfaceCache()
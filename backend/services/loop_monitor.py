@@ -0,0 +1,143 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+from config import get_settings
+from services.perf import Histogram, BUCKETS
+from services.profiler import format_stack
+
+settings = get_settings()
+
+# Stalls kept with their stacks
+MAX_STALLS = 50
+
+
+class LoopMonitor:
+    """Continuous event-loop lag measurement with blocking-call capture
+
+    A task on the loop sleeps for ``interval`` and records how late it
+    wakes up; that delay is the time the loop spent running something
+    else without yielding. A watchdog thread notices when a wake-up is
+    overdue by more than ``threshold`` and snapshots the loop thread's
+    stack while it is still blocked, so the stall is attributed to the
+    call that caused it rather than to whatever runs next.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self.stall_count = 0
+        self.started = None
+
+        self._beat = 0
+        self._beat_time = 0.0
+        self._captured: Optional[tuple] = None  # (beat, stack) taken by the watchdog
+        self._loop_thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start measuring the running loop (call from a coroutine)"""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat_time = time.monotonic()
+        self.started = time.time()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+        if self._watchdog:
+            self._watchdog.join(timeout=2)
+            self._watchdog = None
+
+    def reset(self) -> None:
+        self.lag = Histogram()
+        self.stalls.clear()
+        self.stall_count = 0
+        self.started = time.time()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Time first: the watchdog reads the beat, then the time
+            self._beat_time = time.monotonic()
+            self._beat += 1
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.lag.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag)
+
+    def _record_stall(self, lag: float) -> None:
+        captured = self._captured
+        self.stall_count += 1
+        self.stalls.append({
+            'time': time.time(),
+            'duration_ms': round(lag * 1000, 2),
+            # Stack of the blocking call, if the watchdog caught it in the act
+            'stack': captured[1] if captured and captured[0] == self._beat else None
+        })
+
+    def _watch(self) -> None:
+        check = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(check):
+            beat = self._beat
+            overdue = time.monotonic() - self._beat_time - self.interval
+            if overdue < self.threshold:
+                continue
+            if self._captured and self._captured[0] == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._captured = (beat, format_stack(frame))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000,
+            'threshold_ms': self.threshold * 1000,
+            'since': self.started,
+            'lag': self.lag.to_dict(),
+            'bucket_bounds_ms': [b * 1000 for b in BUCKETS],
+            'stalls': self.stall_count,
+            'recent_stalls': list(reversed(self.stalls))
+        }
+
+    def get_prometheus_metrics(self) -> str:
+        """Lag histogram of this worker in the Prometheus text format"""
+        lag = self.lag
+        lines = ['# TYPE proxyvault_event_loop_lag_seconds histogram']
+        cumulative = 0
+        for bound, count in zip(BUCKETS, lag.counts):
+            cumulative += count
+            lines.append(f'proxyvault_event_loop_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'proxyvault_event_loop_lag_seconds_bucket{{le="+Inf"}} {lag.count}')
+        lines.append(f'proxyvault_event_loop_lag_seconds_sum {lag.total}')
+        lines.append(f'proxyvault_event_loop_lag_seconds_count {lag.count}')
+        lines.append('# TYPE proxyvault_event_loop_stalls_total counter')
+        lines.append(f'proxyvault_event_loop_stalls_total {self.stall_count}')
+        return '\n'.join(lines) + '\n'
+
+
+# Global instance
+loop_monitor = LoopMonitor(
+    settings.LOOP_LAG_INTERVAL_MS / 1000,
+    settings.LOOP_STALL_THRESHOLD_MS / 1000
+)
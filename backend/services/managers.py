@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Service managers are created on first use (or warmed up in the background
+# at startup) so importing the app never waits on disk reads, subprocesses
+# or heavy imports such as cryptography.
+_instances: Dict[str, Any] = {}
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _get(name: str, factory: Callable[[], Any]) -> Any:
+    instance = _instances.get(name)
+    if instance is None:
+        # Per-manager lock so warm_up() can build managers concurrently
+        with _locks_guard:
+            lock = _locks.setdefault(name, threading.Lock())
+        with lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def _create_hysteria():
+    from services.hysteria import HysteriaManager
+    return HysteriaManager()
+
+
+def _create_vless():
+    from services.vless import VLESSManager
+    return VLESSManager()
+
+
+def _create_openvpn():
+    from services.openvpn import OpenVPNManager
+    return OpenVPNManager()
+
+
+def _create_routing():
+    from services.routing import RoutingManager
+    return RoutingManager()
+
+
+def _create_vpn_health():
+    from services.health import VPNHealthMonitor
+    return VPNHealthMonitor(get_routing_manager())
+
+
+def _create_vless_traffic():
+    from services.traffic import VLESSTrafficAccountant
+    return VLESSTrafficAccountant(get_vless_manager())
+
+
+def get_hysteria_manager():
+    return _get('hysteria', _create_hysteria)
+
+
+def get_vless_manager():
+    return _get('vless', _create_vless)
+
+
+def get_openvpn_manager():
+    return _get('openvpn', _create_openvpn)
+
+
+def get_routing_manager():
+    return _get('routing', _create_routing)
+
+
+def get_vpn_health():
+    return _get('vpn_health', _create_vpn_health)
+
+
+def get_vless_traffic():
+    return _get('vless_traffic', _create_vless_traffic)
+
+
+def is_created(name: str) -> bool:
+    return name in _instances
+
+
+def override(name: str, instance: Any) -> None:
+    """Use ``instance`` as a manager (e.g. mocks for benchmarks)"""
+    _instances[name] = instance
+
+
+def warm_up() -> None:
+    """Create the independent managers in parallel"""
+    getters = [
+        get_hysteria_manager,
+        get_vless_manager,
+        get_openvpn_manager,
+        get_routing_manager,
+    ]
+    with ThreadPoolExecutor(max_workers=len(getters)) as pool:
+        for future in [pool.submit(getter) for getter in getters]:
+            future.result()
@@ -1,10 +1,12 @@
-import subprocess
 import psutil
 import time
 from typing import Dict, Any, List
 from pathlib import Path
 from collections import deque
 from datetime import datetime
+from services.interfaces import interface_cache
+from services.hysteria_stats import hysteria_stats
+from services.commands import run_command
 
 class MonitoringManager:
     """Manages system and service monitoring"""
@@ -38,22 +40,29 @@ class MonitoringManager:
         self.last_net_io = net_io
         self.last_check_time = time.time()
         
-        # Store history
+        # Store history ('t' is the cursor for /api/monitoring/history?since=)
         timestamp = datetime.now().strftime('%H:%M:%S')
+        t = round(time.time(), 3)
         self.bandwidth_history.append({
             'time': timestamp,
+            't': t,
             'in': round(bandwidth_in / 1024, 2),  # KB/s
             'out': round(bandwidth_out / 1024, 2)
         })
         self.cpu_history.append({
             'time': timestamp,
+            't': t,
             'value': cpu_percent
         })
         self.memory_history.append({
             'time': timestamp,
+            't': t,
             'value': memory.percent
         })
         
+        # Per-user Hysteria rates/online clients (no-op until trafficStats is enabled)
+        hysteria_stats.collect()
+        
         return {
             'cpu': {
                 'percent': cpu_percent,
@@ -86,13 +95,40 @@ class MonitoringManager:
         return {
             'bandwidth': list(self.bandwidth_history),
             'cpu': list(self.cpu_history),
-            'memory': list(self.memory_history)
+            'memory': list(self.memory_history),
+            'hysteria': hysteria_stats.get_history()
         }
     
+    def get_prometheus_metrics(self) -> str:
+        """Render current metrics in the Prometheus text exposition format"""
+        net_io = psutil.net_io_counters()
+        lines = [
+            '# TYPE proxyvault_cpu_percent gauge',
+            f'proxyvault_cpu_percent {self.cpu_history[-1]["value"] if self.cpu_history else 0}',
+            '# TYPE proxyvault_memory_percent gauge',
+            f'proxyvault_memory_percent {psutil.virtual_memory().percent}',
+            '# TYPE proxyvault_network_bytes_total counter',
+            f'proxyvault_network_bytes_total{{direction="rx"}} {net_io.bytes_recv}',
+            f'proxyvault_network_bytes_total{{direction="tx"}} {net_io.bytes_sent}',
+        ]
+        
+        stats = hysteria_stats.get_stats()
+        if stats['enabled']:
+            lines.append('# TYPE proxyvault_hysteria_user_bytes_total counter')
+            for user, total in stats['totals'].items():
+                label = _prom_label(user)
+                lines.append(f'proxyvault_hysteria_user_bytes_total{{user="{label}",direction="tx"}} {total["tx"]}')
+                lines.append(f'proxyvault_hysteria_user_bytes_total{{user="{label}",direction="rx"}} {total["rx"]}')
+            lines.append('# TYPE proxyvault_hysteria_user_online gauge')
+            for user, current in stats['current']['users'].items():
+                lines.append(f'proxyvault_hysteria_user_online{{user="{_prom_label(user)}"}} {current["online"]}')
+        
+        return '\n'.join(lines) + '\n'
+    
     def get_service_connections(self, port: int) -> int:
         """Count active connections to a specific port"""
         try:
-            result = subprocess.run(
+            result = run_command(
                 ['ss', '-tn', f'sport = :{port}'],
                 capture_output=True,
                 text=True,
@@ -118,7 +154,7 @@ class MonitoringManager:
     def get_service_logs(self, service_name: str, lines: int = 50) -> List[str]:
         """Get recent logs for a service"""
         try:
-            result = subprocess.run(
+            result = run_command(
                 ['journalctl', '-u', service_name, '-n', str(lines), '--no-pager'],
                 capture_output=True,
                 text=True,
@@ -134,7 +170,7 @@ class MonitoringManager:
         """Get detailed process information for a service"""
         try:
             # Get PID from systemd
-            result = subprocess.run(
+            result = run_command(
                 ['systemctl', 'show', service_name, '--property=MainPID'],
                 capture_output=True,
                 text=True
@@ -160,7 +196,7 @@ class MonitoringManager:
                             'create_time': process.create_time()
                         }
         except Exception as e:
-            pass
+            print(f"Warning: Failed to read process info for {service_name}: {e}")
         
         return {
             'pid': 0,
@@ -177,27 +213,13 @@ class MonitoringManager:
         """Get information about network interfaces"""
         interfaces = {}
         
-        for interface, addrs in psutil.net_if_addrs().items():
-            stats = psutil.net_if_stats().get(interface)
-            
-            interfaces[interface] = {
-                'addresses': [],
-                'is_up': stats.isup if stats else False,
-                'speed': stats.speed if stats else 0
+        for name, info in interface_cache.get_interfaces().items():
+            interfaces[name] = {
+                'addresses': info['addresses'],
+                'is_up': info['is_up'],
+                'speed': info['speed'],
+                'kind': info['kind']
             }
-            
-            for addr in addrs:
-                if addr.family == 2:  # AF_INET (IPv4)
-                    interfaces[interface]['addresses'].append({
-                        'type': 'IPv4',
-                        'address': addr.address,
-                        'netmask': addr.netmask
-                    })
-                elif addr.family == 10:  # AF_INET6 (IPv6)
-                    interfaces[interface]['addresses'].append({
-                        'type': 'IPv6',
-                        'address': addr.address
-                    })
         
         return interfaces
     
@@ -239,5 +261,10 @@ class MonitoringManager:
             'boot_time': datetime.fromtimestamp(boot_time).strftime('%Y-%m-%d %H:%M:%S')
         }
 
+def _prom_label(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
 # Global instance
 monitoring_manager = MonitoringManager()
@@ -3,6 +3,9 @@ import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 from config import get_settings
+from services.interfaces import interface_cache
+from services.openvpn_mgmt import OpenVPNManagementClient
+from services.commands import run_command
 
 settings = get_settings()
 
@@ -14,24 +17,31 @@ class OpenVPNManager:
         self.config_path = Path(settings.OPENVPN_CONFIG)
         self.service_name = settings.OPENVPN_SERVICE
         self.auth_file = self.config_path.parent / "auth.txt"
+        self.management_socket = settings.OPENVPN_MANAGEMENT_SOCKET
+        self.management = OpenVPNManagementClient(self.management_socket)
         
     def get_status(self) -> Dict[str, Any]:
         """Get OpenVPN service status"""
+        # Live view from the management socket: no subprocesses needed
+        if self.management.attached:
+            return {
+                "running": True,
+                "connected": self.management.is_connected(),
+                "state": self.management.state,
+                "service": self.service_name,
+                "config_exists": self.config_path.exists()
+            }
+        
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["systemctl", "is-active", self.service_name],
                 capture_output=True,
                 text=True
             )
             is_running = result.stdout.strip() == "active"
             
-            # Check if tun0 interface exists (VPN connected)
-            tun_result = subprocess.run(
-                ["ip", "link", "show", "tun0"],
-                capture_output=True,
-                text=True
-            )
-            has_tunnel = tun_result.returncode == 0
+            # Check if a tun interface exists (VPN connected)
+            has_tunnel = interface_cache.get_vpn_interface() is not None
             
             return {
                 "running": is_running,
@@ -77,6 +87,11 @@ class OpenVPNManager:
                     with open(self.config_path, 'a') as f:
                         f.write(f"\nauth-user-pass {self.auth_file}\n")
             
+            # Enable the management socket for live tunnel stats
+            if 'management ' not in config_content:
+                with open(self.config_path, 'a') as f:
+                    f.write(f"\nmanagement {self.management_socket} unix\n")
+            
             # Set proper permissions
             os.chmod(self.config_path, 0o600)
             
@@ -90,7 +105,7 @@ class OpenVPNManager:
             raise ValueError(f"Invalid action: {action}")
         
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["systemctl", action, self.service_name],
                 capture_output=True,
                 text=True,
@@ -100,20 +115,16 @@ class OpenVPNManager:
         except subprocess.CalledProcessError as e:
             raise Exception(f"Failed to {action} OpenVPN: {e.stderr}")
     
+    def get_tunnel_stats(self) -> Dict[str, Any]:
+        """Get live tunnel stats (state, tunnel IP, bytes in/out, reconnects)"""
+        return self.management.get_stats()
+    
     def get_vpn_ip(self) -> Optional[str]:
         """Get VPN tunnel IP address"""
-        try:
-            result = subprocess.run(
-                ["ip", "-4", "addr", "show", "tun0"],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                # Parse IP from output
-                for line in result.stdout.split('\n'):
-                    if 'inet ' in line:
-                        ip = line.strip().split()[1].split('/')[0]
-                        return ip
-            return None
-        except Exception:
-            return None
+        if self.management.attached:
+            return self.management.tunnel_ip
+        
+        interface = interface_cache.get_vpn_interface()
+        if interface:
+            return interface_cache.get_ipv4(interface)
+        return None
@@ -0,0 +1,174 @@
+import socket
+import threading
+import time
+from typing import Dict, Any
+
+
+class OpenVPNManagementClient:
+    """Keeps a live view of the tunnel from OpenVPN's management socket
+
+    Subscribes to real-time ``state`` and ``bytecount`` notifications so
+    tunnel status can be answered from memory instead of forking ``ip``.
+    """
+
+    def __init__(self, socket_path: str, bytecount_interval: int = 5):
+        self.socket_path = socket_path
+        self.bytecount_interval = bytecount_interval
+
+        self.state = None  # e.g. CONNECTED, RECONNECTING, WAIT, AUTH
+        self.state_detail = None
+        self.tunnel_ip = None
+        self.remote_ip = None
+        self.connected_since = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rate_in = 0.0  # bytes per second
+        self.rate_out = 0.0
+        self.reconnects = 0
+        self.last_update = None
+
+        self._sock = None
+        self._was_connected = False
+        self._last_bytecount_time = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def attached(self) -> bool:
+        """Whether the management socket is currently connected"""
+        return self._sock is not None
+
+    def start(self) -> None:
+        """Start the background reader (reconnects automatically)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="openvpn-mgmt", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background reader"""
+        self._stop.set()
+        self._close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._connect()
+                self._read_loop()
+            except OSError:
+                pass
+            self._close()
+            # OpenVPN not running (or restarting): retry shortly
+            self._stop.wait(2)
+
+    def _connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(5)
+        sock.connect(self.socket_path)
+        sock.settimeout(None)
+        self._sock = sock
+        # Current state first, then real-time notifications
+        sock.sendall(
+            f"state on\nstate\nbytecount {self.bytecount_interval}\n".encode()
+        )
+
+    def _close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                # Wakes the reader thread blocked in recv(); close() alone doesn't
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _read_loop(self) -> None:
+        buffer = b""
+        while not self._stop.is_set():
+            data = self._sock.recv(4096)
+            if not data:
+                return
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                self.handle_line(line.decode(errors="replace").strip())
+
+    def handle_line(self, line: str) -> None:
+        """Apply one line of management-interface output to the live view"""
+        if line.startswith(">STATE:"):
+            self._update_state(line[len(">STATE:"):])
+        elif line.startswith(">BYTECOUNT:"):
+            self._update_bytecount(line[len(">BYTECOUNT:"):])
+        elif line and line[0].isdigit() and "," in line:
+            # Reply to the plain "state" command has no ">STATE:" prefix
+            self._update_state(line)
+
+    def _update_state(self, payload: str) -> None:
+        # Format: time,state,detail,local_ip,remote_ip,remote_port,...
+        fields = payload.split(",")
+        if len(fields) < 2:
+            return
+        state = fields[1]
+        with self._lock:
+            if state == "CONNECTED":
+                if self._was_connected and self.state != "CONNECTED":
+                    self.reconnects += 1
+                self._was_connected = True
+                self.connected_since = int(fields[0]) if fields[0].isdigit() else None
+                self.tunnel_ip = fields[3] if len(fields) > 3 and fields[3] else None
+                self.remote_ip = fields[4] if len(fields) > 4 and fields[4] else None
+            elif state in ("RECONNECTING", "EXITING"):
+                self.tunnel_ip = None
+                self.connected_since = None
+            self.state = state
+            self.state_detail = fields[2] if len(fields) > 2 else None
+            self.last_update = time.time()
+
+    def _update_bytecount(self, payload: str) -> None:
+        try:
+            bytes_in, bytes_out = (int(v) for v in payload.split(",")[:2])
+        except ValueError:
+            return
+        now = time.time()
+        with self._lock:
+            if self._last_bytecount_time and bytes_in >= self.bytes_in:
+                elapsed = now - self._last_bytecount_time
+                if elapsed > 0:
+                    self.rate_in = (bytes_in - self.bytes_in) / elapsed
+                    self.rate_out = (bytes_out - self.bytes_out) / elapsed
+            self.bytes_in = bytes_in
+            self.bytes_out = bytes_out
+            self._last_bytecount_time = now
+            self.last_update = now
+
+    def is_connected(self) -> bool:
+        """Whether the tunnel is up according to the last state notification"""
+        return self.state == "CONNECTED"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the live tunnel view"""
+        with self._lock:
+            return {
+                "attached": self.attached,
+                "state": self.state,
+                "state_detail": self.state_detail,
+                "connected": self.is_connected(),
+                "tunnel_ip": self.tunnel_ip,
+                "remote_ip": self.remote_ip,
+                "connected_since": self.connected_since,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "rate_in": round(self.rate_in, 2),
+                "rate_out": round(self.rate_out, 2),
+                "reconnects": self.reconnects,
+                "last_update": self.last_update
+            }
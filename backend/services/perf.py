@@ -0,0 +1,150 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional
+from services.commands import current_request, COMMAND_TIME_KEY, COMMAND_COUNT_KEY
+
+# Histogram bucket upper bounds in seconds (last bucket is open-ended)
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram
+
+    Recording is a bisect and a few in-place updates on preallocated
+    fields, so it costs well under a microsecond.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, elapsed: float) -> None:
+        self.counts[bisect_left(BUCKETS, elapsed)] += 1
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 2),
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p95_ms': round(self.percentile(95) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'buckets': self.counts
+        }
+
+
+class RouteStats(Histogram):
+    """Latency histogram for one route, plus the external command time in it"""
+
+    __slots__ = ('route', 'command_time', 'command_count')
+
+    def __init__(self, route: str):
+        super().__init__()
+        self.route = route
+        self.command_time = 0.0
+        self.command_count = 0
+
+    def observe_request(self, elapsed: float, command_time: float, command_count: int) -> None:
+        self.observe(elapsed)
+        if command_count:
+            self.command_time += command_time
+            self.command_count += command_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'route': self.route,
+            **super().to_dict(),
+            'command_ms': round(self.command_time * 1000, 2),
+            'commands': self.command_count
+        }
+
+
+class PerfRecorder:
+    """Per-route latency histograms, keyed by method and path template"""
+
+    def __init__(self):
+        # id of the route object (or mount root path) -> method -> stats;
+        # looked up without building a key string per request. Routes
+        # live as long as the app, so their ids are stable.
+        self._routes: Dict[Any, Dict[str, RouteStats]] = {}
+
+    def observe(self, scope, elapsed: float) -> None:
+        route = scope.get('route') or scope.get('root_path') or None
+        key = route if route is None or isinstance(route, str) else id(route)
+        by_method = self._routes.get(key)
+        if by_method is None:
+            by_method = self._routes[key] = {}
+        stats = by_method.get(scope['method'])
+        if stats is None:
+            stats = by_method[scope['method']] = RouteStats(self._label(scope, route))
+        stats.observe_request(elapsed, scope.get(COMMAND_TIME_KEY, 0.0), scope.get(COMMAND_COUNT_KEY, 0))
+
+    @staticmethod
+    def _label(scope, route) -> str:
+        if route is None:
+            return f"{scope['method']} (unmatched)"
+        if isinstance(route, str):
+            return f"{scope['method']} {route}/*"  # mounted app, e.g. /static
+        return f"{scope['method']} {route.path}"
+
+    def get_routes(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Routes ordered by total time spent serving them"""
+        rows = [stats for by_method in list(self._routes.values()) for stats in list(by_method.values())]
+        rows.sort(key=lambda s: s.total, reverse=True)
+        return [stats.to_dict() for stats in rows[:limit]]
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+
+class PerfMiddleware:
+    """ASGI middleware recording per-route latency and command time
+
+    Plain ASGI (not BaseHTTPMiddleware) so it adds no task or buffering.
+    The route is the matched path template, read back from the scope after
+    routing, which keeps the number of histograms bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        token = current_request.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            perf_recorder.observe(scope, elapsed)
+
+
+# Global instance
+perf_recorder = PerfRecorder()
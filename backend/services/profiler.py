@@ -0,0 +1,170 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+# Limits for one profiling run
+MAX_SECONDS = 60
+MIN_INTERVAL = 0.001
+
+# Leaf frames of threads that are just waiting (dropped unless idle=True)
+IDLE_FRAMES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('socket.py', 'accept'),
+    ('thread.py', '_worker'),  # idle concurrent.futures worker
+}
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_BACKEND_DIR):
+        return os.path.relpath(filename, _BACKEND_DIR)
+    marker = 'site-packages' + os.sep
+    index = filename.rfind(marker)
+    if index >= 0:
+        return filename[index + len(marker):]
+    return os.path.basename(filename)
+
+
+class FrameLabels:
+    """Cached ``file:function`` labels, one per code object"""
+
+    def __init__(self):
+        self._labels: Dict[Any, str] = {}
+
+    def get(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = self._labels[code] = f"{_short_path(code.co_filename)}:{name}"
+        return label
+
+
+def thread_names(loop_thread_id: Optional[int] = None) -> Dict[int, str]:
+    names = {t.ident: t.name for t in threading.enumerate()}
+    if loop_thread_id is not None:
+        names[loop_thread_id] = 'event-loop'
+    return names
+
+
+def format_stack(frame, labels: Optional[FrameLabels] = None) -> List[str]:
+    """Frames from the outermost call to ``frame``, as ``file:function``"""
+    labels = labels or FrameLabels()
+    stack = []
+    while frame is not None:
+        stack.append(labels.get(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    """Statistical profiler over all threads of this process
+
+    The calling thread reads ``sys._current_frames()`` every ``interval``
+    seconds and counts identical stacks, so it needs no signals (which
+    would only interrupt the main thread) and no external tools. Output is
+    in collapsed-stack format (``thread;frame;frame count``), the input of
+    flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = 0.01, idle: bool = False,
+                loop_thread_id: Optional[int] = None) -> Dict[str, Any]:
+        """Sample for ``seconds`` (blocking) and return the collapsed stacks"""
+        if seconds <= 0 or seconds > MAX_SECONDS:
+            raise ValueError(f"seconds must be between 0 and {MAX_SECONDS}")
+        interval = max(interval, MIN_INTERVAL)
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            return self._sample(seconds, interval, idle, loop_thread_id)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds, interval, idle, loop_thread_id) -> Dict[str, Any]:
+        own_id = threading.get_ident()
+        labels = FrameLabels()
+        stacks = Counter()
+        samples = 0
+        names = thread_names(loop_thread_id)
+        start = time.monotonic()
+        deadline = start + seconds
+        next_tick = start
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if not idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                if thread_id not in names:
+                    names = thread_names(loop_thread_id)
+                stack = format_stack(frame, labels)
+                stack.insert(0, names.get(thread_id, f"thread-{thread_id}"))
+                stacks[';'.join(stack)] += 1
+            samples += 1
+            next_tick = max(next_tick + interval, now)
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+        elapsed = time.monotonic() - start
+        return {
+            'seconds': round(elapsed, 3),
+            'interval_ms': round(interval * 1000, 3),
+            'samples': samples,
+            'stacks': len(stacks),
+            'collapsed': '\n'.join(
+                f"{stack} {count}" for stack, count in stacks.most_common()
+            )
+        }
+
+
+def _await_chain(coro, limit: int) -> List[str]:
+    """Where a suspended coroutine is waiting, outermost first
+
+    Follows ``cr_await`` down the chain of awaited coroutines, which
+    ``Task.get_stack`` does not do.
+    """
+    chain = []
+    while coro is not None and len(chain) < limit:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        chain.append(f"{_short_path(frame.f_code.co_filename)}:{frame.f_code.co_name}:{frame.f_lineno}")
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return chain
+
+
+def dump_tasks(loop: Optional[asyncio.AbstractEventLoop] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Pending asyncio tasks and the await chain each one is suspended in
+
+    Must be called from the loop's own thread.
+    """
+    tasks = []
+    for task in asyncio.all_tasks(loop):
+        coro = task.get_coro()
+        tasks.append({
+            'name': task.get_name(),
+            'coro': getattr(coro, '__qualname__', repr(coro)),
+            'stack': _await_chain(coro, limit)
+        })
+    return tasks
+
+
+# Global instance
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,80 @@
+import base64
+import os
+import threading
+from collections import deque
+from typing import Dict
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+
+# Number of key pairs kept ready; refilled in the background below LOW_WATER
+POOL_SIZE = 16
+LOW_WATER = 4
+
+_RAW = serialization.Encoding.Raw
+
+
+def _encode(key_bytes: bytes) -> str:
+    # xray prints Reality keys as unpadded URL-safe base64
+    return base64.urlsafe_b64encode(key_bytes).rstrip(b'=').decode()
+
+
+def _decode(key: str) -> bytes:
+    key = key.strip()
+    return base64.urlsafe_b64decode(key + '=' * (-len(key) % 4))
+
+
+def generate_keypair() -> Dict[str, str]:
+    """Generate a Reality (x25519) key pair in xray's encoding"""
+    # Clamp like `xray x25519` so stored private keys look identical
+    private_bytes = bytearray(os.urandom(32))
+    private_bytes[0] &= 248
+    private_bytes[31] &= 127
+    private_bytes[31] |= 64
+    private = X25519PrivateKey.from_private_bytes(bytes(private_bytes))
+    public_bytes = private.public_key().public_bytes(_RAW, serialization.PublicFormat.Raw)
+    return {
+        "private_key": _encode(bytes(private_bytes)),
+        "public_key": _encode(public_bytes)
+    }
+
+
+def derive_public_key(private_key: str) -> str:
+    """Derive the client-side public key (pbk) from a stored private key"""
+    private = X25519PrivateKey.from_private_bytes(_decode(private_key))
+    return _encode(private.public_key().public_bytes(_RAW, serialization.PublicFormat.Raw))
+
+
+class RealityKeyPool:
+    """Small pool of pre-generated key pairs so rotations never wait"""
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self._keys = deque()
+        self._refilling = threading.Lock()
+
+    def get(self) -> Dict[str, str]:
+        """Take a key pair from the pool (generating inline if it's empty)"""
+        try:
+            keys = self._keys.popleft()
+        except IndexError:
+            keys = generate_keypair()
+        if len(self._keys) < LOW_WATER:
+            self.fill_async()
+        return keys
+
+    def fill(self) -> None:
+        if not self._refilling.acquire(blocking=False):
+            return
+        try:
+            while len(self._keys) < self.size:
+                self._keys.append(generate_keypair())
+        finally:
+            self._refilling.release()
+
+    def fill_async(self) -> None:
+        threading.Thread(target=self.fill, name="reality-keys", daemon=True).start()
+
+
+# Global instance
+reality_key_pool = RealityKeyPool()
@@ -1,6 +1,9 @@
-import subprocess
+import os
 from typing import Dict, Any, List
 from config import get_settings
+from services.interfaces import interface_cache
+from services.commands import run_command
+from services.health import remove_standby_nat
 
 settings = get_settings()
 
@@ -11,7 +14,7 @@ class RoutingManager:
     def __init__(self):
         self.hysteria_port = settings.HYSTERIA_PORT
         self.vless_port = settings.VLESS_PORT
-        self.marker_file = "/etc/proxyvault/routing_enabled"
+        self.marker_file = os.path.join(settings.CONFIG_DIR, "routing_enabled")
         
     def is_routing_enabled(self) -> bool:
         """Check if routing is currently enabled"""
@@ -21,7 +24,7 @@ class RoutingManager:
     def get_routing_rules(self) -> List[Dict[str, str]]:
         """Get current iptables routing rules"""
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["iptables", "-t", "nat", "-L", "POSTROUTING", "-n", "-v"],
                 capture_output=True,
                 text=True
@@ -45,7 +48,7 @@ class RoutingManager:
                 raise Exception("OpenVPN interface not found. Ensure OpenVPN is connected.")
             
             # Enable IP forwarding
-            subprocess.run(
+            run_command(
                 ["sysctl", "-w", "net.ipv4.ip_forward=1"],
                 check=True,
                 capture_output=True
@@ -69,13 +72,13 @@ class RoutingManager:
             ])
             
             # Route marked packets through VPN
-            subprocess.run(
+            run_command(
                 ["ip", "rule", "add", "fwmark", "1", "table", "100"],
                 check=False,  # Don't fail if rule exists
                 capture_output=True
             )
             
-            subprocess.run(
+            run_command(
                 ["ip", "route", "add", "default", "dev", tun_interface, "table", "100"],
                 check=False,  # Don't fail if route exists
                 capture_output=True
@@ -102,7 +105,7 @@ class RoutingManager:
         """Disable traffic routing"""
         try:
             # Remove mangle rules
-            subprocess.run(
+            run_command(
                 ["iptables", "-t", "mangle", "-D", "PREROUTING",
                  "-p", "tcp", "--dport", str(self.hysteria_port),
                  "-j", "MARK", "--set-mark", "1"],
@@ -110,7 +113,7 @@ class RoutingManager:
                 capture_output=True
             )
             
-            subprocess.run(
+            run_command(
                 ["iptables", "-t", "mangle", "-D", "PREROUTING",
                  "-p", "tcp", "--dport", str(self.vless_port),
                  "-j", "MARK", "--set-mark", "1"],
@@ -119,13 +122,13 @@ class RoutingManager:
             )
             
             # Remove routing rules
-            subprocess.run(
+            run_command(
                 ["ip", "rule", "del", "fwmark", "1", "table", "100"],
                 check=False,
                 capture_output=True
             )
             
-            subprocess.run(
+            run_command(
                 ["ip", "route", "del", "default", "table", "100"],
                 check=False,
                 capture_output=True
@@ -134,12 +137,15 @@ class RoutingManager:
             # Remove NAT rules (find and delete)
             tun_interface = self._get_vpn_interface()
             if tun_interface:
-                subprocess.run(
+                run_command(
                     ["iptables", "-t", "nat", "-D", "POSTROUTING",
                      "-o", tun_interface, "-j", "MASQUERADE"],
                     check=False,
                     capture_output=True
                 )
+            # ...and the one added for the standby tunnel on failover
+            if settings.VPN_STANDBY_INTERFACE:
+                remove_standby_nat(settings.VPN_STANDBY_INTERFACE)
             
             # Remove marker file
             import os
@@ -152,27 +158,20 @@ class RoutingManager:
     
     def _get_vpn_interface(self) -> str:
         """Get VPN interface name (usually tun0)"""
-        try:
-            result = subprocess.run(
-                ["ip", "link", "show"],
-                capture_output=True,
-                text=True
-            )
-            for line in result.stdout.split('\n'):
-                if 'tun' in line:
-                    # Extract interface name
-                    interface = line.split(':')[1].strip().split('@')[0]
-                    return interface
-            return None
-        except Exception:
-            return None
+        # A standby tunnel used for failover is never the primary VPN
+        return interface_cache.get_vpn_interface(
+            exclude=settings.VPN_STANDBY_INTERFACE or None
+        )
     
     def _add_iptables_rule(self, command: List[str]) -> None:
         """Add iptables rule, ignore if exists"""
+        # Failures are kept in the command trace (/api/debug/commands)
         try:
-            subprocess.run(command, check=False, capture_output=True)
-        except Exception:
-            pass
+            result = run_command(command, check=False, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"Warning: {' '.join(command)} exited {result.returncode}: {result.stderr.strip()}")
+        except Exception as e:
+            print(f"Warning: {' '.join(command)} failed: {e}")
     
     def _update_sysctl_conf(self) -> None:
         """Make IP forwarding permanent in sysctl.conf"""
@@ -185,5 +184,6 @@ class RoutingManager:
                 with open(sysctl_file, 'a') as f:
                     f.write('\n# Enable IP forwarding for ProxyVault\n')
                     f.write('net.ipv4.ip_forward=1\n')
-        except Exception:
-            pass  # Non-critical if this fails
+        except Exception as e:
+            # Non-critical if this fails
+            print(f"Warning: Failed to update {sysctl_file}: {e}")
@@ -0,0 +1,71 @@
+import gzip
+import json
+from typing import Any, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json
+    orjson = None
+
+# Bodies smaller than this are sent uncompressed (gzip wouldn't pay off)
+GZIP_MIN_SIZE = 1024
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Content codings in an ``Accept-Encoding`` header, minus those with q=0"""
+    accepted = set()
+    for part in accept_encoding.split(','):
+        token, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+class EncodedBody:
+    """A serialized JSON body, shared by every response that sends it
+
+    The gzip variant is made on first use and kept, so a snapshot fetched
+    by many clients is encoded and compressed once.
+    """
+
+    __slots__ = ('raw', '_gzip')
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._gzip = None
+
+    @classmethod
+    def of(cls, obj: Any) -> 'EncodedBody':
+        return cls(dumps(obj))
+
+    def gzip(self) -> bytes:
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.raw, compresslevel=6, mtime=0)
+        return self._gzip
+
+    def negotiate(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Body and Content-Encoding to send to a client"""
+        if len(self.raw) >= GZIP_MIN_SIZE:
+            accepted = accepted_encodings(accept_encoding)
+            if 'gzip' in accepted or '*' in accepted:
+                return self.gzip(), 'gzip'
+        return self.raw, None
@@ -0,0 +1,126 @@
+import ipaddress
+import threading
+import time
+from typing import Dict, Any, Optional
+from config import get_settings
+from services.interfaces import interface_cache
+
+settings = get_settings()
+
+PLACEHOLDER = "YOUR_SERVER_IP"
+
+# Retry interval after detection failed, so exports don't stall on every call
+FAILURE_TTL = 60
+
+
+class ServerAddressResolver:
+    """Resolves and caches the server's public address for config export
+
+    Order: explicit ``SERVER_ADDRESS`` override, public addresses on local
+    interfaces (IPv4 preferred over IPv6), then the external probe URL.
+    """
+
+    def __init__(self):
+        self.override = settings.SERVER_ADDRESS.strip()
+        self.probe_url = settings.SERVER_IP_PROBE_URL
+        self.ttl = settings.SERVER_IP_CACHE_TTL
+
+        self._address = None
+        self._source = None
+        self._expires = 0.0
+        self._resolving = False
+        self._lock = threading.Lock()
+
+    def get_address(self) -> str:
+        """Get the cached public address; never blocks
+
+        A missing or expired value is re-detected in a background thread,
+        and this call returns what is cached meanwhile (the placeholder
+        until the first detection finishes).
+        """
+        if self.override:
+            return self.override
+        if time.monotonic() >= self._expires:
+            self._start_resolve()
+        return self._address or PLACEHOLDER
+
+    def refresh(self) -> str:
+        """Force re-detection in the background"""
+        self._expires = 0.0
+        return self.get_address()
+
+    def warm(self) -> None:
+        """Resolve in the background so the first export has an address"""
+        if not self.override:
+            self._start_resolve()
+
+    def _start_resolve(self) -> None:
+        with self._lock:
+            if self._resolving or time.monotonic() < self._expires:
+                return
+            self._resolving = True
+        threading.Thread(target=self._resolve_in_background, name="server-address", daemon=True).start()
+
+    def _resolve_in_background(self) -> None:
+        try:
+            self._resolve()
+        except Exception as e:
+            print(f"Warning: Failed to detect server address: {e}")
+            self._expires = time.monotonic() + FAILURE_TTL
+        finally:
+            self._resolving = False
+
+    def _resolve(self) -> None:
+        address = self.get_local_public_address()
+        source = "interface"
+        if not address and self.probe_url:
+            address = self._probe()
+            source = "probe"
+
+        if address:
+            self._address, self._source = address, source
+            self._expires = time.monotonic() + self.ttl
+        else:
+            # Keep serving the last detected address, if any
+            self._expires = time.monotonic() + FAILURE_TTL
+
+    @staticmethod
+    def get_local_public_address() -> Optional[str]:
+        """Find a globally routable address on a local (non-VPN) interface"""
+        ipv6 = None
+        for info in interface_cache.get_interfaces().values():
+            # Tunnel addresses are the VPN egress, not where clients connect
+            if info['kind'] in ('tun', 'tap', 'loopback') or not info['is_up']:
+                continue
+            for addr in info['addresses']:
+                try:
+                    ip = ipaddress.ip_address(addr['address'].split('%')[0])
+                except ValueError:
+                    continue
+                # is_global excludes RFC1918, CGNAT (100.64/10), ULA and link-local
+                if not ip.is_global:
+                    continue
+                if ip.version == 4:
+                    return str(ip)
+                ipv6 = ipv6 or str(ip)
+        return ipv6
+
+    def _probe(self) -> Optional[str]:
+        """Ask the configured external service for our address"""
+        import urllib.request
+        try:
+            with urllib.request.urlopen(self.probe_url, timeout=5) as response:
+                text = response.read(64).decode().strip()
+            return str(ipaddress.ip_address(text))
+        except Exception:
+            return None
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "address": self.get_address(),
+            "source": "override" if self.override else self._source
+        }
+
+
+# Global instance
+server_address = ServerAddressResolver()
@@ -0,0 +1,276 @@
+import fcntl
+import os
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from config import get_settings
+from services.serialization import dumps, loads, EncodedBody
+
+settings = get_settings()
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Exclusive lock shared by all worker processes (and threads)
+
+    Locks a ``.lock`` file next to ``path`` so the data file itself can
+    still be replaced atomically while the lock is held.
+    """
+    lock_path = Path(str(path) + '.lock')
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = open_private(lock_path)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def file_signature(path) -> Optional[Tuple[int, int, int]]:
+    """(inode, mtime, size) of a file, or None if it does not exist
+
+    Changes whenever the file is rewritten or replaced, for a single ``stat``.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def open_private(path, flags: int = os.O_RDWR) -> int:
+    """Open ``path``, creating it 0600; never follows a symlink"""
+    try:
+        return os.open(path, flags | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+    except FileExistsError:
+        return os.open(path, flags | os.O_NOFOLLOW)
+
+
+def ensure_private_dir(path: Path) -> None:
+    """Create ``path`` 0700, or refuse it unless it is ours and private
+
+    Raises PermissionError for a symlink, another owner, or a mode this
+    process can't tighten, so nobody else can plant files in it.
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a directory owned by uid {os.getuid()}")
+    if stat.S_IMODE(st.st_mode) != 0o700:
+        # Ours, so tightening it is safe (older versions created it 0755)
+        os.chmod(path, 0o700, follow_symlinks=False)
+
+
+def _shared_dir() -> Path:
+    if settings.SHARED_STATE_DIR:
+        return Path(settings.SHARED_STATE_DIR)
+    # In memory: systemd's RuntimeDirectory (/run/proxyvault), /run for root,
+    # else the user's runtime dir; checked by ensure_private_dir before use
+    base = os.environ.get('RUNTIME_DIRECTORY')
+    if not base:
+        if os.getuid() == 0 and os.path.isdir('/run'):
+            base = '/run/proxyvault'
+        else:
+            base = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return Path(base) / f"proxyvault-{settings.API_PORT}"
+
+
+class SharedSnapshot:
+    """JSON document published by one process and read by all workers
+
+    The writer replaces the file atomically; readers re-parse only when
+    the file's inode/mtime changes, so a read is normally one ``stat``.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._signature = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def publish(self, data: Dict[str, Any]) -> None:
+        ensure_private_dir(self.path.parent)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            os.unlink(tmp_path)  # left over from a crashed process with our pid
+        except FileNotFoundError:
+            pass
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps(data))
+        os.replace(tmp_path, self.path)
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if signature != self._signature:
+                try:
+                    with open(self.path, 'rb') as f:
+                        self._data = loads(f.read())
+                    self._signature = signature
+                except (OSError, ValueError):
+                    return self._data
+            return self._data
+
+
+class SharedMonitoring:
+    """Runs the metrics sampler in exactly one worker and shares its output
+
+    Every worker tries to take a non-blocking ``flock`` on a lock file;
+    the holder (the leader) samples every ``MONITORING_INTERVAL`` seconds
+    and publishes all registered sections as one snapshot. Followers
+    answer from the snapshot, and take over when the leader exits since
+    the kernel drops its lock.
+    """
+
+    def __init__(self):
+        self.interval = settings.MONITORING_INTERVAL
+        self.directory = _shared_dir()
+        self.snapshot = SharedSnapshot(self.directory / "monitoring.json")
+        self.is_leader = False
+        self.last_error = None
+
+        self._sections: Dict[str, Callable[[], Any]] = {}
+        self._placeholders: Dict[str, Any] = {}
+        self._published: Dict[str, Any] = {}
+        self._on_elected: List[Callable[[], None]] = []
+        self._lock_fd = None
+        # Sections of the current snapshot, serialized once per tick
+        self._encoded: Dict[str, EncodedBody] = {}
+        self._encoded_for = None
+        self._encoded_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, provider: Callable[[], Any], placeholder: Any = None) -> None:
+        """Publish ``provider()`` under ``name`` on every leader tick
+
+        Until the first snapshot has the section, readers get ``placeholder``
+        (default ``{"pending": true}``); providers only ever run in the leader.
+        """
+        self._sections[name] = provider
+        self._placeholders[name] = {'pending': True} if placeholder is None else placeholder
+
+    def on_elected(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` once when this process becomes the leader"""
+        self._on_elected.append(callback)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="shared-monitoring", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self.is_leader = False
+
+    def _try_acquire(self) -> bool:
+        try:
+            ensure_private_dir(self.directory)
+            fd = open_private(self.directory / "leader.lock")
+        except OSError as e:
+            if self.last_error != str(e):
+                print(f"Warning: Failed to use shared state dir: {e}")
+            self.last_error = str(e)
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        return True
+
+    def _run(self) -> None:
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            if not self.is_leader and self._try_acquire():
+                self.is_leader = True
+                for callback in self._on_elected:
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"Warning: leader task failed to start: {e}")
+            if self.is_leader:
+                self.publish()
+            # Fixed period: sampling time isn't added to the interval
+            next_tick = max(next_tick + self.interval, time.monotonic())
+            self._stop.wait(next_tick - time.monotonic())
+
+    def publish(self) -> None:
+        """Collect every section and replace the shared snapshot"""
+        data = {}
+        for name, provider in self._sections.items():
+            try:
+                data[name] = provider()
+            except Exception as e:
+                self.last_error = f"{name}: {e}"
+                # Keep serving the last good value
+                if name in self._published:
+                    data[name] = self._published[name]
+        data.update(time=time.time(), leader_pid=os.getpid())
+        self._published = data
+        try:
+            self.snapshot.publish(data)
+        except OSError as e:
+            self.last_error = str(e)
+
+    def get(self, name: str) -> Any:
+        """Latest published section, or its placeholder before the first tick"""
+        data = self.snapshot.read()
+        if data and name in data:
+            return data[name]
+        return self._placeholders[name]
+
+    def get_encoded(self, name: str) -> EncodedBody:
+        """Like ``get``, already serialized and shared by all requests this tick"""
+        data = self.snapshot.read()
+        if not data or name not in data:
+            return EncodedBody.of(self._placeholders[name])
+        with self._encoded_lock:
+            if self._encoded_for is not data:
+                self._encoded = {}
+                self._encoded_for = data
+            body = self._encoded.get(name)
+            if body is None:
+                body = self._encoded[name] = EncodedBody.of(data[name])
+        return body
+
+    def get_version(self) -> Optional[float]:
+        """Publication time of the current snapshot (None before the first)"""
+        data = self.snapshot.read()
+        return data.get('time') if data else None
+
+    def get_info(self) -> Dict[str, Any]:
+        data = self.snapshot.read() or {}
+        return {
+            'pid': os.getpid(),
+            'is_leader': self.is_leader,
+            'leader_pid': data.get('leader_pid'),
+            'snapshot_age': round(time.time() - data['time'], 1) if 'time' in data else None,
+            'interval': self.interval,
+            'error': self.last_error
+        }
+
+
+# Global instance
+shared_monitoring = SharedMonitoring()
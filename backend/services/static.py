@@ -0,0 +1,183 @@
+import copy
+import gzip
+import hashlib
+import mimetypes
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from services.serialization import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Long-lived caching for content-hashed names: the URL changes with the content
+IMMUTABLE = b"public, max-age=31536000, immutable"
+# Unhashed names (index.html, old links) are revalidated on every load
+REVALIDATE = b"no-cache"
+
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# src="..." / href="..." attributes pointing at a local file
+_REFERENCE = re.compile(r'\b(src|href)="([^":?#]+)"')
+
+
+class Asset:
+    """One file held in memory with its precompressed variants"""
+
+    __slots__ = ('content_type', 'digest', 'cache_control', 'variants')
+
+    def __init__(self, data: bytes, content_type: str, cache_control: bytes):
+        self.content_type = content_type.encode()
+        self.digest = hashlib.sha256(data).hexdigest()[:16]
+        self.cache_control = cache_control
+        # encoding -> body, smallest usable variants only
+        self.variants: Dict[str, bytes] = {'identity': data}
+        if content_type.startswith(COMPRESSIBLE):
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                self.variants['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    self.variants['br'] = compressed
+
+    def select(self, accept_encoding: str) -> str:
+        """Best encoding the client accepts (br, then gzip, then identity)"""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+    def etag(self, encoding: str) -> bytes:
+        # Strong validators are per representation, so each encoding gets its own
+        suffix = '' if encoding == 'identity' else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'.encode()
+
+    def matches(self, if_none_match: bytes) -> bool:
+        """Whether any ETag in ``If-None-Match`` names this content"""
+        if if_none_match.strip() == b'*':
+            return True
+        for tag in if_none_match.split(b','):
+            tag = tag.strip()
+            if tag.startswith(b'W/'):
+                tag = tag[2:]
+            if tag.strip(b'"').partition(b'-')[0] == self.digest.encode():
+                return True
+        return False
+
+
+def _hashed_name(name: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    stem, dot, suffix = name.rpartition('.')
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def build_assets(directory: Path) -> Dict[str, Asset]:
+    """Hash, rewrite and compress every file under ``directory``
+
+    Each file is served under a content-hashed name (``app.3f2c9a1b0d.js``)
+    with immutable caching, and under its plain name with revalidation.
+    HTML pages get their references rewritten to the hashed names.
+    """
+    files = {
+        path.relative_to(directory).as_posix(): path.read_bytes()
+        for path in sorted(directory.rglob('*')) if path.is_file()
+    }
+    hashed = {
+        name: _hashed_name(name, data)
+        for name, data in files.items() if not name.endswith('.html')
+    }
+
+    def rewrite(page: str, html: bytes) -> bytes:
+        base = page.rpartition('/')[0]
+
+        def replace(match):
+            attr, ref = match.groups()
+            target = f"{base}/{ref}" if base else ref
+            if target not in hashed:
+                return match.group(0)
+            directory = ref.rpartition('/')[0]
+            name = hashed[target].rpartition('/')[2]
+            return f'{attr}="{directory}/{name}"' if directory else f'{attr}="{name}"'
+        return _REFERENCE.sub(replace, html.decode('utf-8')).encode('utf-8')
+
+    assets = {}
+    for name, data in files.items():
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        if name.endswith('.html'):
+            assets[name] = Asset(rewrite(name, data), content_type, REVALIDATE)
+            continue
+        assets[name] = asset = Asset(data, content_type, REVALIDATE)
+        assets[hashed[name]] = immutable = copy.copy(asset)
+        immutable.cache_control = IMMUTABLE
+    return assets
+
+
+class StaticBundle:
+    """ASGI app serving the frontend from memory
+
+    Built on the first request (so it adds nothing to startup). Supports
+    GET/HEAD, ``Accept-Encoding`` negotiation over the precompressed
+    variants, strong ETags and ``If-None-Match``, so a repeat load of an
+    unchanged page is one 304 for ``index.html`` and nothing else.
+    """
+
+    def __init__(self, directory: Path, index: str = 'index.html'):
+        self.directory = Path(directory)
+        self.index = index
+        self._assets: Optional[Dict[str, Asset]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def assets(self) -> Dict[str, Asset]:
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    if self.directory.is_dir():
+                        self._assets = build_assets(self.directory)
+                    else:
+                        print(f"Warning: Frontend directory not found at {self.directory}")
+                        self._assets = {}
+        return self._assets
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        if scope['method'] not in ('GET', 'HEAD'):
+            await self._respond(send, 405, [(b'allow', b'GET, HEAD'), (b'content-length', b'0')])
+            return
+
+        path = scope['path'][len(scope.get('root_path', '')):].lstrip('/') or self.index
+        asset = self.assets.get(path)
+        if asset is None:
+            await self._respond(send, 404, [(b'content-type', b'text/plain'), (b'content-length', b'9')], b'Not Found')
+            return
+
+        request_headers = dict(scope['headers'])
+        encoding = asset.select(request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+        headers = [
+            (b'etag', asset.etag(encoding)),
+            (b'cache-control', asset.cache_control),
+            (b'vary', b'accept-encoding'),
+        ]
+        if asset.matches(request_headers.get(b'if-none-match', b'')):
+            await self._respond(send, 304, headers)
+            return
+
+        body = asset.variants[encoding]
+        headers.append((b'content-type', asset.content_type))
+        headers.append((b'content-length', str(len(body)).encode()))
+        if encoding != 'identity':
+            headers.append((b'content-encoding', encoding.encode()))
+        await self._respond(send, 200, headers, b'' if scope['method'] == 'HEAD' else body)
+
+    @staticmethod
+    async def _respond(send, status: int, headers: List[tuple], body: bytes = b'') -> None:
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from config import get_settings
+from services.shared_state import file_lock
+
+settings = get_settings()
+
+# xray per-user counter names: user>>>{email}>>>traffic>>>{uplink|downlink}
+USER_STATS_PATTERN = "user>>>"
+
+
+class VLESSTrafficAccountant:
+    """Per-user VLESS traffic counters fed from xray's StatsService
+
+    Every interval, one batched ``QueryStats(pattern="user>>>", reset=True)``
+    call returns the deltas since the previous poll; they are added to a
+    compact ``email -> [uplink, downlink]`` table that is persisted
+    periodically. Users over quota are disabled through VLESSManager.
+
+    Only one worker process runs the poller; resets requested in other
+    workers are queued in a file and applied on its next poll.
+    """
+
+    def __init__(self, vless_manager):
+        self.vless = vless_manager
+        self.interval = settings.XRAY_STATS_INTERVAL
+        self.persist_interval = settings.XRAY_STATS_PERSIST_INTERVAL
+        self.default_quota = int(settings.VLESS_USER_QUOTA_GB * 1024 ** 3)
+        self.path = Path(settings.CONFIG_DIR) / "vless_traffic.json"
+        self.resets_path = Path(settings.CONFIG_DIR) / "vless_traffic.resets"
+
+        self.counters: Dict[str, List[int]] = {}
+        self.downlink_bytes = 0  # sent to clients since start, never reset
+        self.quota_events = []
+        self.last_poll = None
+        self.last_error = None
+
+        self._dirty = False
+        self._last_persist = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                self.counters = {k: list(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            self.counters = {}
+
+    def persist(self) -> None:
+        """Atomically save the counter table"""
+        with self._lock:
+            data = json.dumps(self.counters, separators=(',', ':'))
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        self._last_persist = time.monotonic()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # Pick up what the previous poller (possibly another process) saved
+        with self._lock:
+            self._load()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="vless-traffic", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._dirty:
+            self.persist()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._apply_queued_resets()
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                # xray not running or API not enabled yet
+                self.last_error = str(e)
+            if self._dirty and time.monotonic() - self._last_persist >= self.persist_interval:
+                self.persist()
+
+    def poll(self) -> None:
+        """Fetch and reset xray's per-user counters, then enforce quotas"""
+        stats = self.vless.api.query_stats(USER_STATS_PATTERN, reset=True)
+        touched = set()
+        with self._lock:
+            for name, value in stats.items():
+                if not value:
+                    continue
+                parts = name.split(">>>")
+                if len(parts) != 4:
+                    continue
+                email, direction = parts[1], parts[3]
+                counter = self.counters.setdefault(email, [0, 0])
+                counter[0 if direction == "uplink" else 1] += value
+                if direction == "downlink":
+                    self.downlink_bytes += value
+                touched.add(email)
+            if touched:
+                self._dirty = True
+        self.last_poll = time.time()
+
+        # Only users whose counters moved can newly exceed their quota
+        for email in touched:
+            self._check_quota(email)
+
+    def _check_quota(self, email: str) -> None:
+        user = self.vless.users.get_by_email(email)
+        if not user or not user['enabled']:
+            return
+        quota = user.get('quota_bytes') or self.default_quota
+        if quota and sum(self.counters[email]) >= quota:
+            self.vless.set_user_enabled(user['uuid'], False)
+            self.quota_events.append({
+                'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'email': email,
+                'uuid': user['uuid'],
+                'used_bytes': sum(self.counters[email]),
+                'quota_bytes': quota
+            })
+            del self.quota_events[:-50]
+            print(f"VLESS user {email} exceeded quota, disabled")
+
+    def reset(self, email: str) -> bool:
+        """Reset a user's counters (e.g. at the start of a billing period)
+
+        Returns False if the reset was queued for the polling process.
+        """
+        if not self.running:
+            with file_lock(self.resets_path):
+                with open(self.resets_path, 'a') as f:
+                    f.write(email + '\n')
+            return False
+        with self._lock:
+            self.counters.pop(email, None)
+            self._dirty = True
+        return True
+
+    def _apply_queued_resets(self) -> None:
+        if not self.resets_path.exists():
+            return
+        with file_lock(self.resets_path):
+            try:
+                with open(self.resets_path, 'r') as f:
+                    emails = f.read().split()
+                os.unlink(self.resets_path)
+            except OSError:
+                return
+        with self._lock:
+            for email in emails:
+                self.counters.pop(email, None)
+            self._dirty = True
+
+    def get_usage(self, email: Optional[str] = None) -> Dict[str, Any]:
+        """Get per-user uplink/downlink totals"""
+        with self._lock:
+            if email is not None:
+                up, down = self.counters.get(email, [0, 0])
+                return {'email': email, 'uplink': up, 'downlink': down, 'total': up + down}
+            users = {
+                email: {'uplink': up, 'downlink': down, 'total': up + down}
+                for email, (up, down) in self.counters.items()
+            }
+        return {
+            'users': users,
+            'default_quota_bytes': self.default_quota,
+            'quota_events': list(self.quota_events),
+            'last_poll': self.last_poll,
+            'error': self.last_error
+        }
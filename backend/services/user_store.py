@@ -0,0 +1,244 @@
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from services.shared_state import file_lock
+
+# Other processes' changes are picked up at most this late (seconds)
+REFRESH_INTERVAL = 0.25
+
+
+class UserStore:
+    """Append-only proxy user store with an in-memory index
+
+    Every change is appended to a JSON-lines log; the log is replayed into
+    dicts keyed by the primary key and a unique secondary field at startup,
+    so lookups and changes are O(1). The log is compacted once it holds
+    mostly superseded records. Other worker processes' appends are picked
+    up incrementally from the last replayed offset, at most once per
+    REFRESH_INTERVAL, so reads (the Hysteria auth callback) are dict lookups.
+    """
+
+    key = 'id'  # primary key field
+    index = 'name'  # unique secondary index field
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.by_index: Dict[str, str] = {}
+        self._log_records = 0
+        # Position/identity of the log we've replayed, to pick up records
+        # appended by other worker processes
+        self._offset = 0
+        self._inode = None
+        self._refreshed = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        self.users, self.by_index = {}, {}
+        self._log_records = self._offset = 0
+        self._inode = None
+        try:
+            self._inode = os.stat(self.path).st_ino
+        except OSError:
+            return
+        self._read_from(0)
+
+    def _read_from(self, offset: int) -> None:
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Incomplete append, picked up on the next refresh
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn write at the end of the log
+                self._apply(record)
+                self._log_records += 1
+        self._offset = offset
+
+    def _refresh(self) -> None:
+        """Replay changes made by other processes (one stat when unchanged)"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            if self._inode is not None:
+                self._load()
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            self._load()  # Compacted or replaced
+        elif st.st_size > self._offset:
+            self._read_from(self._offset)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        if record['op'] == 'put':
+            user = record['user']
+            old = self.users.get(user[self.key])
+            if old and old[self.index] != user[self.index]:
+                self.by_index.pop(old[self.index], None)
+            self.users[user[self.key]] = user
+            self.by_index[user[self.index]] = user[self.key]
+        elif record['op'] == 'del':
+            # Logs written before the generic store name the key field itself
+            user = self.users.pop(record.get('key', record.get(self.key)), None)
+            if user:
+                self.by_index.pop(user[self.index], None)
+
+    @contextmanager
+    def _writing(self):
+        """Serialize changes across threads and worker processes"""
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            yield
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        created = not self.path.exists()
+        with open(self.path, 'ab') as f:
+            f.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+            self._offset = f.tell()
+        if created:
+            os.chmod(self.path, 0o600)  # holds credentials
+            self._inode = os.stat(self.path).st_ino
+        self._apply(record)
+        self._log_records += 1
+        if self._log_records > 2 * len(self.users) + 100:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the log with one record per live user (call with the lock held)"""
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            for user in self.users.values():
+                f.write(json.dumps({'op': 'put', 'user': user}, separators=(',', ':')).encode() + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+        os.replace(tmp_path, self.path)
+        os.chmod(self.path, 0o600)
+        self._log_records = len(self.users)
+        self._offset = offset
+        self._inode = os.stat(self.path).st_ino
+
+    def _add(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        with self._writing():
+            if user[self.key] in self.users:
+                raise ValueError(f"User with {self.key} {user[self.key]} already exists")
+            if user[self.index] in self.by_index:
+                raise ValueError(f"User with {self.index} {user[self.index]} already exists")
+            user = dict(user, enabled=True, created=int(time.time()))
+            self._append({'op': 'put', 'user': user})
+            return user
+
+    def remove(self, key: str) -> Dict[str, Any]:
+        with self._writing():
+            user = self.users.get(key)
+            if not user:
+                raise KeyError(key)
+            self._append({'op': 'del', 'key': key})
+            return user
+
+    def set_enabled(self, key: str, enabled: bool) -> Dict[str, Any]:
+        with self._writing():
+            user = self.users.get(key)
+            if not user:
+                raise KeyError(key)
+            user = dict(user, enabled=enabled)
+            self._append({'op': 'put', 'user': user})
+            return user
+
+    def refresh(self) -> None:
+        """Pick up other processes' changes (throttled, never waits on a writer)"""
+        now = time.monotonic()
+        if now - self._refreshed < REFRESH_INTERVAL:
+            return
+        # A write in progress refreshes the index itself
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._refreshed = now
+            self._refresh()
+        finally:
+            self._lock.release()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        self.refresh()
+        return self.users.get(key)
+
+    def lookup(self, value: str) -> Optional[Dict[str, Any]]:
+        """Get a user by its secondary index field"""
+        self.refresh()
+        key = self.by_index.get(value)
+        return self.users.get(key) if key else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        self.refresh()
+        return list(self.users.values())
+
+    def enabled_users(self) -> List[Dict[str, Any]]:
+        self.refresh()
+        return [user for user in self.users.values() if user['enabled']]
+
+
+class VLESSUserStore(UserStore):
+    """VLESS users keyed by UUID, indexed by email"""
+
+    key = 'uuid'
+    index = 'email'
+
+    def add(self, email: str, user_id: Optional[str] = None,
+            quota_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """Add a user; generates a UUID if none is given"""
+        user = {'uuid': user_id or str(uuid.uuid4()), 'email': email}
+        if quota_bytes:
+            user['quota_bytes'] = quota_bytes
+        return self._add(user)
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return self.lookup(email)
+
+
+class HysteriaUserStore(UserStore):
+    """Hysteria users keyed by name, indexed by password for auth lookups"""
+
+    key = 'name'
+    index = 'password'
+
+    def add(self, name: str, password: Optional[str] = None) -> Dict[str, Any]:
+        """Add a user; generates a password if none is given"""
+        return self._add({'name': name, 'password': password or secrets.token_urlsafe(16)})
+
+    def set_password(self, name: str, password: str) -> Dict[str, Any]:
+        """Create the user or change its password, in one locked step"""
+        with self._writing():
+            owner = self.by_index.get(password)
+            if owner is not None and owner != name:
+                raise ValueError(f"Password already in use by user {owner}")
+            user = self.users.get(name)
+            if user is None:
+                user = {'name': name, 'enabled': True, 'created': int(time.time())}
+            elif user['password'] == password:
+                return user
+            user = dict(user, password=password)
+            self._append({'op': 'put', 'user': user})
+            return user
+
+    def authenticate(self, password: str) -> Optional[str]:
+        """Get the user name for a password, if the user is enabled"""
+        user = self.lookup(password)
+        if user and user['enabled']:
+            return user['name']
+        return None
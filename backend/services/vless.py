@@ -3,11 +3,20 @@ import os
 import json
 import uuid
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from config import get_settings
+from services.user_store import VLESSUserStore
+from services.shared_state import file_lock, file_signature
+from services.xray_api import XrayAPIClient
+from services.reality_keys import reality_key_pool, derive_public_key
+from services.commands import run_command
 
 settings = get_settings()
 
+# Inbound tags used by the xray gRPC API
+VLESS_INBOUND_TAG = "vless-in"
+API_TAG = "api"
+
 
 class VLESSManager:
     """Manages VLESS + Reality proxy service (using Xray-core)"""
@@ -18,11 +27,17 @@ class VLESSManager:
         # Import firewall manager
         from services.firewall import firewall_manager
         self.firewall = firewall_manager
+        self.users = VLESSUserStore(Path(settings.CONFIG_DIR) / "vless_users.jsonl")
+        # Parsed config and UUID -> position in the clients array
+        self._config = None
+        self._config_signature = None
+        self._client_index: Dict[str, int] = {}
+        self.api = XrayAPIClient(f"127.0.0.1:{settings.XRAY_API_PORT}")
         
     def get_status(self) -> Dict[str, Any]:
         """Get VLESS service status"""
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["systemctl", "is-active", self.service_name],
                 capture_output=True,
                 text=True
@@ -56,52 +71,63 @@ class VLESSManager:
             return {"configured": False, "error": str(e)}
     
     def generate_reality_keys(self) -> Dict[str, str]:
-        """Generate Reality key pair using xray"""
+        """Generate Reality key pair (in-process x25519, from a pre-filled pool)"""
         try:
-            result = subprocess.run(
-                ["xray", "x25519"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # Parse output: "Private key: xxx\nPublic key: yyy"
-            lines = result.stdout.strip().split('\n')
-            private_key = lines[0].split(': ')[1]
-            public_key = lines[1].split(': ')[1]
-            
-            return {
-                "private_key": private_key,
-                "public_key": public_key
-            }
+            return reality_key_pool.get()
         except Exception as e:
             raise Exception(f"Failed to generate Reality keys: {str(e)}")
     
+    @staticmethod
+    def get_public_key(private_key: str) -> str:
+        """Derive the Reality public key (client pbk) from the private key"""
+        return derive_public_key(private_key)
+    
     def update_config(self, config_data: Dict[str, Any]) -> bool:
         """Update VLESS configuration"""
         try:
             # Ensure config directory exists
             self.config_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Generate keys if not provided
-            if not config_data.get('private_key') or not config_data.get('public_key'):
+            # Generate keys if not provided; the public key is always derivable
+            if not config_data.get('private_key'):
                 keys = self.generate_reality_keys()
                 config_data['private_key'] = keys['private_key']
                 config_data['public_key'] = keys['public_key']
+            elif not config_data.get('public_key'):
+                config_data['public_key'] = self.get_public_key(config_data['private_key'])
             
             # Build Xray configuration with VLESS + Reality
             xray_config = {
                 "log": {
                     "loglevel": "warning"
                 },
+                # gRPC API for live user changes (AlterInbound)
+                "api": {
+                    "tag": API_TAG,
+                    "services": ["HandlerService", "StatsService"]
+                },
+                # Per-user uplink/downlink counters for traffic accounting
+                "stats": {},
+                "policy": {
+                    "levels": {
+                        "0": {
+                            "statsUserUplink": True,
+                            "statsUserDownlink": True
+                        }
+                    }
+                },
                 "inbounds": [{
+                    "tag": VLESS_INBOUND_TAG,
                     "port": config_data['port'],
                     "protocol": "vless",
                     "settings": {
                         "clients": [{
                             "id": config_data['uuid'],
                             "flow": "xtls-rprx-vision"
-                        }],
+                        }] + [
+                            self._client_entry(user) for user in self.users.enabled_users()
+                            if user['uuid'] != config_data['uuid']
+                        ],
                         "decryption": "none"
                     },
                     "streamSettings": {
@@ -116,16 +142,31 @@ class VLESSManager:
                             "shortIds": config_data['short_ids']
                         }
                     }
+                }, {
+                    "tag": API_TAG,
+                    "listen": "127.0.0.1",
+                    "port": settings.XRAY_API_PORT,
+                    "protocol": "dokodemo-door",
+                    "settings": {
+                        "address": "127.0.0.1"
+                    }
                 }],
                 "outbounds": [{
                     "protocol": "freedom",
                     "tag": "direct"
-                }]
+                }],
+                "routing": {
+                    "rules": [{
+                        "type": "field",
+                        "inboundTag": [API_TAG],
+                        "outboundTag": API_TAG
+                    }]
+                }
             }
             
             # Write configuration
-            with open(self.config_path, 'w') as f:
-                json.dump(xray_config, f, indent=2)
+            with file_lock(self.config_path):
+                self._write_config(xray_config)
             
             # Auto-configure firewall
             self.firewall.configure_for_vless(config_data['port'])
@@ -134,13 +175,150 @@ class VLESSManager:
         except Exception as e:
             raise Exception(f"Failed to update VLESS config: {str(e)}")
     
+    def _write_config(self, xray_config: Dict[str, Any]) -> None:
+        """Atomically write the xray config and refresh the client index"""
+        tmp_path = self.config_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(xray_config, f, indent=2)
+        os.replace(tmp_path, self.config_path)
+        self._set_config(xray_config)
+    
+    def _set_config(self, xray_config: Dict[str, Any], signature=None) -> None:
+        self._config = xray_config
+        clients = xray_config['inbounds'][0]['settings']['clients']
+        self._client_index = {client['id']: i for i, client in enumerate(clients)}
+        self._config_signature = signature or self._stat_config()
+    
+    def _stat_config(self) -> Optional[Tuple[int, int, int]]:
+        return file_signature(self.config_path)
+    
+    def get_config_version(self) -> tuple:
+        """Changes whenever the config or user list changes (two ``stat`` calls)"""
+        return self._stat_config(), file_signature(self.users.path)
+    
+    def _load_config(self) -> Dict[str, Any]:
+        """Get the parsed config, re-reading the file only when it changed"""
+        signature = self._stat_config()
+        if signature is None:
+            raise Exception("VLESS not configured yet")
+        # Another worker process may have rewritten it
+        if self._config is None or signature != self._config_signature:
+            with open(self.config_path, 'r') as f:
+                self._set_config(json.load(f), signature)
+        return self._config
+    
+    @staticmethod
+    def _client_entry(user: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": user['uuid'],
+            "email": user['email'],
+            "flow": "xtls-rprx-vision"
+        }
+    
+    def _add_client(self, user: Dict[str, Any]) -> None:
+        """Append a client to the clients array (O(1))"""
+        config = self._load_config()
+        if user['uuid'] in self._client_index:
+            return
+        clients = config['inbounds'][0]['settings']['clients']
+        clients.append(self._client_entry(user))
+        self._client_index[user['uuid']] = len(clients) - 1
+    
+    def _check_removable(self, user_id: str) -> None:
+        # clients[0] is the configured UUID that the default export uses
+        if self._client_index.get(user_id) == 0:
+            raise ValueError("The default VLESS client can't be removed or disabled")
+    
+    def _remove_client(self, user_id: str) -> None:
+        """Remove a client by swapping the last entry into its slot (O(1))
+
+        Only clients[1:] are swapped, so clients[0] stays the default.
+        """
+        self._check_removable(user_id)
+        config = self._load_config()
+        pos = self._client_index.pop(user_id, None)
+        if pos is None:
+            return
+        clients = config['inbounds'][0]['settings']['clients']
+        last = clients.pop()
+        if pos < len(clients):
+            clients[pos] = last
+            self._client_index[last['id']] = pos
+    
+    def _save_clients(self) -> None:
+        """Persist the patched config without rebuilding it"""
+        self._write_config(self._config)
+    
+    def _api_available(self) -> bool:
+        """Whether the running config exposes the HandlerService API"""
+        config = self._load_config()
+        return 'HandlerService' in config.get('api', {}).get('services', [])
+    
+    def _apply_live(self, operation, *args) -> bool:
+        """Apply a user change to the running xray; False if it needs a restart"""
+        if not self._api_available():
+            return False
+        try:
+            operation(VLESS_INBOUND_TAG, *args)
+            return True
+        except Exception as e:
+            print(f"Warning: xray API call failed, restart xray to apply: {e}")
+            return False
+    
+    def add_user(self, email: str, user_id: Optional[str] = None,
+                 quota_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """Add a VLESS user, live via the xray API and in the config file"""
+        with file_lock(self.config_path):
+            self._load_config()
+            user = self.users.add(email, user_id, quota_bytes)
+            self._add_client(user)
+            self._save_clients()
+        live = self._apply_live(self.api.add_vless_user, user['uuid'], user['email'])
+        return dict(user, applied_live=live)
+    
+    def remove_user(self, user_id: str) -> Dict[str, Any]:
+        """Remove a VLESS user, live via the xray API and from the config file"""
+        with file_lock(self.config_path):
+            self._load_config()
+            self._check_removable(user_id)
+            user = self.users.remove(user_id)
+            self._remove_client(user_id)
+            self._save_clients()
+        live = self._apply_live(self.api.remove_user, user['email'])
+        return dict(user, applied_live=live)
+    
+    def set_user_enabled(self, user_id: str, enabled: bool) -> Dict[str, Any]:
+        """Enable or disable a VLESS user (disabled users stay in the store)"""
+        with file_lock(self.config_path):
+            self._load_config()
+            current = self.users.get(user_id)
+            if current and current['enabled'] == enabled:
+                return dict(current, applied_live=True)
+            if not enabled:
+                self._check_removable(user_id)
+            user = self.users.set_enabled(user_id, enabled)
+            if enabled:
+                self._add_client(user)
+            else:
+                self._remove_client(user_id)
+            self._save_clients()
+        if enabled:
+            live = self._apply_live(self.api.add_vless_user, user['uuid'], user['email'])
+        else:
+            live = self._apply_live(self.api.remove_user, user['email'])
+        return dict(user, applied_live=live)
+    
+    def list_users(self) -> List[Dict[str, Any]]:
+        """List all VLESS users"""
+        return self.users.list()
+    
     def control_service(self, action: str) -> str:
         """Control VLESS service (start/stop/restart/status)"""
         if action not in ["start", "stop", "restart", "status"]:
             raise ValueError(f"Invalid action: {action}")
         
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["systemctl", action, self.service_name],
                 capture_output=True,
                 text=True,
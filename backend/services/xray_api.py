@@ -0,0 +1,144 @@
+from typing import Dict, Any, List, Tuple
+
+# The few xray protobuf messages ProxyVault needs are encoded by hand so
+# no generated stubs (or protobuf runtime) are required; grpcio only
+# carries the raw bytes.
+
+HANDLER_SERVICE = "/xray.app.proxyman.command.HandlerService"
+STATS_SERVICE = "/xray.app.stats.command.StatsService"
+ADD_USER_OPERATION = "xray.app.proxyman.command.AddUserOperation"
+REMOVE_USER_OPERATION = "xray.app.proxyman.command.RemoveUserOperation"
+VLESS_ACCOUNT = "xray.proxy.vless.Account"
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    value &= (1 << 64) - 1
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def encode_field(number: int, value) -> bytes:
+    """Encode one protobuf field (int -> varint, str/bytes -> length-delimited)"""
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return _varint((number << 3) | 2) + _varint(len(value)) + value
+
+
+def encode_message(*fields: Tuple[int, Any]) -> bytes:
+    """Encode (number, value) pairs, skipping empty/default values"""
+    return b"".join(
+        encode_field(number, value) for number, value in fields
+        if value not in (None, "", b"", 0)
+    )
+
+
+def decode_message(data: bytes) -> List[Tuple[int, Any]]:
+    """Decode a protobuf message into (number, value) pairs
+
+    Varints come back as ints, length-delimited fields as bytes (nested
+    messages are decoded by the caller).
+    """
+    fields = []
+    pos = 0
+    while pos < len(data):
+        key, pos = _read_varint(data, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = _read_varint(data, pos)
+        elif wire_type == 2:
+            length, pos = _read_varint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+        elif wire_type == 1:
+            value = int.from_bytes(data[pos:pos + 8], "little")
+            pos += 8
+        elif wire_type == 5:
+            value = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+        fields.append((number, value))
+    return fields
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def typed_message(type_name: str, value: bytes) -> bytes:
+    """xray.common.serial.TypedMessage"""
+    return encode_message((1, type_name), (2, value))
+
+
+def vless_user(user_id: str, email: str, flow: str = "xtls-rprx-vision") -> bytes:
+    """xray.common.protocol.User carrying a VLESS account"""
+    account = encode_message((1, user_id), (2, flow), (3, "none"))
+    return encode_message((2, email), (3, typed_message(VLESS_ACCOUNT, account)))
+
+
+class XrayAPIClient:
+    """Minimal client for xray's gRPC API (the ``api`` inbound)"""
+
+    def __init__(self, address: str, timeout: float = 2.0):
+        self.address = address
+        self.timeout = timeout
+        self._channel = None
+
+    def _call(self, method: str, request: bytes) -> bytes:
+        import grpc  # Optional: only needed when live updates are used
+        if self._channel is None:
+            self._channel = grpc.insecure_channel(self.address)
+        stub = self._channel.unary_unary(method)
+        return stub(request, timeout=self.timeout)
+
+    def close(self) -> None:
+        if self._channel is not None:
+            self._channel.close()
+            self._channel = None
+
+    def alter_inbound(self, tag: str, operation: bytes) -> None:
+        self._call(
+            f"{HANDLER_SERVICE}/AlterInbound",
+            encode_message((1, tag), (2, operation))
+        )
+
+    def add_vless_user(self, tag: str, user_id: str, email: str,
+                       flow: str = "xtls-rprx-vision") -> None:
+        """Add a VLESS client to a running inbound"""
+        operation = encode_message((1, vless_user(user_id, email, flow)))
+        self.alter_inbound(tag, typed_message(ADD_USER_OPERATION, operation))
+
+    def remove_user(self, tag: str, email: str) -> None:
+        """Remove a client (by email) from a running inbound"""
+        operation = encode_message((1, email))
+        self.alter_inbound(tag, typed_message(REMOVE_USER_OPERATION, operation))
+
+    def query_stats(self, pattern: str = "", reset: bool = False) -> Dict[str, int]:
+        """Query (and optionally reset) counters matching a name pattern in one call"""
+        response = self._call(
+            f"{STATS_SERVICE}/QueryStats",
+            encode_message((1, pattern), (2, int(reset)))
+        )
+        stats = {}
+        for number, value in decode_message(response):
+            if number != 1:
+                continue
+            stat = dict(decode_message(value))
+            stats[stat.get(1, b"").decode()] = stat.get(2, 0)
+        return stats
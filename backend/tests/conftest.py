@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read once, on first import: point every path at a scratch dir
+_STATE = tempfile.mkdtemp(prefix="proxyvault-tests-")
+os.environ.setdefault("CONFIG_DIR", _STATE)
+os.environ.setdefault("SHARED_STATE_DIR", os.path.join(_STATE, "shared"))
+os.environ.setdefault("HYSTERIA_CONFIG", os.path.join(_STATE, "hysteria.yaml"))
+os.environ.setdefault("VLESS_CONFIG", os.path.join(_STATE, "xray.json"))
+os.environ.setdefault("OPENVPN_CONFIG", os.path.join(_STATE, "client.conf"))
+os.environ.setdefault("VPN_PROBE_ENABLED", "false")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
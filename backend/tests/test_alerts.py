@@ -0,0 +1,171 @@
+import time
+
+import pytest
+
+from mock_services import FakeWebhookReceiver
+from services import alerts
+from services.alerts import (
+    AlertEngine, FileSink, GrowthRule, Rule, ThresholdRule, ThroughputMeter, WebhookSink, default_rules
+)
+
+
+def sample(t, **values):
+    return {'time': t, **values}
+
+
+@pytest.fixture
+def receiver():
+    fake = FakeWebhookReceiver()
+    fake.start()
+    yield fake
+    fake.stop()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_rule_is_abstract():
+    with pytest.raises(TypeError):
+        Rule('r', 'abstract', 0)
+
+
+def test_threshold_fires_only_after_for_seconds():
+    rule = ThresholdRule('cpu_high', 'CPU high', 'cpu_percent', 90, for_seconds=300)
+    assert rule.update(sample(0, cpu_percent=95), 0) is None
+    assert rule.state == 'pending'
+    assert rule.update(sample(299, cpu_percent=97), 299) is None
+    assert rule.update(sample(300, cpu_percent=96), 300) == 'firing'
+    assert rule.state == 'firing'
+    # Already firing: no second transition
+    assert rule.update(sample(310, cpu_percent=99), 310) is None
+
+
+def test_threshold_pending_resets_on_clean_sample():
+    rule = ThresholdRule('cpu_high', 'CPU high', 'cpu_percent', 90, for_seconds=300)
+    rule.update(sample(0, cpu_percent=95), 0)
+    rule.update(sample(200, cpu_percent=50), 200)
+    assert rule.state == 'ok'
+    assert rule.update(sample(400, cpu_percent=95), 400) is None
+    assert rule.update(sample(699, cpu_percent=95), 699) is None
+    assert rule.update(sample(700, cpu_percent=95), 700) == 'firing'
+
+
+def test_threshold_resolves_on_first_clean_sample():
+    rule = ThresholdRule('cpu_high', 'CPU high', 'cpu_percent', 90)
+    assert rule.update(sample(0, cpu_percent=95), 0) == 'firing'
+    assert rule.update(sample(10, cpu_percent=90), 10) == 'resolved'
+    assert rule.state == 'ok'
+
+
+def test_missing_metric_keeps_state():
+    rule = ThresholdRule('cpu_high', 'CPU high', 'cpu_percent', 90)
+    rule.update(sample(0, cpu_percent=95), 0)
+    assert rule.update(sample(10), 10) is None
+    assert rule.state == 'firing'
+
+
+def test_below_threshold_rule():
+    rule = ThresholdRule('bandwidth_zero', 'No traffic', 'proxy_kbs', 0, for_seconds=60, below=True)
+    assert rule.update(sample(0, proxy_kbs=0), 0) is None
+    assert rule.update(sample(60, proxy_kbs=0), 60) == 'firing'
+    assert rule.update(sample(70, proxy_kbs=1.5), 70) == 'resolved'
+
+
+def test_stalled_tunnel_fires_despite_host_traffic(monkeypatch):
+    monkeypatch.setattr(alerts.settings, 'ALERT_ZERO_BANDWIDTH_MINUTES', 1)
+    rule = next(rule for rule in default_rules() if rule.name == 'bandwidth_zero')
+    meter = ThroughputMeter()
+    downlink = 0
+    for t in range(0, 60, 10):
+        downlink += 50 * 1024 * 10  # proxies deliver 50 KB/s
+        value = meter.rate(downlink, t)
+        assert rule.update(sample(t, proxy_kbs=value, host_kbs=80), t) is None
+    # Tunnel dies: proxy counters stop, SSH and dashboard traffic go on
+    transitions = []
+    for t in range(60, 140, 10):
+        value = meter.rate(downlink, t)
+        transitions.append(rule.update(sample(t, proxy_kbs=value, host_kbs=80), t))
+    assert transitions.count('firing') == 1
+    assert rule.state == 'firing'
+
+
+def test_growth_rule_ewma():
+    rule = GrowthRule('rss_growth', 'RSS growth', 'rss_mb', 100, alpha=0.5)
+    assert rule.check(sample(0, rss_mb=100)) is None  # no previous value yet
+    assert rule.check(sample(3600, rss_mb=200)) == 100.0  # first rate is taken as is
+    # 300 MB/h observed: 0.5 * 300 + 0.5 * 100
+    assert rule.check(sample(7200, rss_mb=500)) == 200.0
+    # Flat: 0.5 * 0 + 0.5 * 200
+    assert rule.check(sample(10800, rss_mb=500)) == 100.0
+
+
+def test_growth_rule_restarts_after_gap():
+    rule = GrowthRule('rss_growth', 'RSS growth', 'rss_mb', 100)
+    rule.check(sample(0, rss_mb=100))
+    assert rule.check(sample(60)) is None  # process gone: no reading
+    assert rule.check(sample(120, rss_mb=50)) is None  # no rate across the gap
+
+
+def test_growth_rule_fires():
+    rule = GrowthRule('rss_growth', 'RSS growth', 'rss_mb', 100, alpha=1)
+    rule.update(sample(0, rss_mb=100), 0)
+    assert rule.update(sample(1800, rss_mb=200), 1800) == 'firing'  # 200 MB/h
+    assert rule.update(sample(3600, rss_mb=210), 3600) == 'resolved'  # 20 MB/h
+
+
+def test_webhook_receives_firing_and_resolved(receiver, tmp_path):
+    webhook = WebhookSink(receiver.url)
+    engine = AlertEngine(
+        [ThresholdRule('disk_full', 'Disk full', 'disk_percent', 90)],
+        [FileSink(tmp_path / 'alerts.jsonl'), webhook]
+    )
+    engine.evaluate(sample(100, disk_percent=95))
+    engine.evaluate(sample(110, disk_percent=96))
+    engine.evaluate(sample(120, disk_percent=50))
+
+    events = receiver.wait_for(2)
+    assert [(e['alert'], e['status']) for e in events] == [('disk_full', 'firing'), ('disk_full', 'resolved')]
+    assert events[0]['value'] == 95 and events[0]['threshold'] == 90 and events[0]['time'] == 100
+    assert len((tmp_path / 'alerts.jsonl').read_text().splitlines()) == 2
+    assert wait_until(lambda: webhook.last_error is None)
+    state = engine.get_state()
+    assert state['firing'] == []
+    assert [e['status'] for e in state['events']] == ['resolved', 'firing']
+
+
+def test_webhook_error_reply_is_recorded(receiver, tmp_path):
+    receiver.status = 500
+    webhook = WebhookSink(receiver.url)
+    file_sink = FileSink(tmp_path / 'alerts.jsonl')
+    engine = AlertEngine([ThresholdRule('disk_full', 'Disk full', 'disk_percent', 90)], [webhook, file_sink])
+    engine.evaluate(sample(100, disk_percent=95))
+
+    assert receiver.wait_for(1)[0]['status'] == 'firing'
+    assert wait_until(lambda: webhook.last_error is not None)
+    assert '500' in webhook.last_error
+    # A failing webhook doesn't stop the other sinks
+    assert 'firing' in (tmp_path / 'alerts.jsonl').read_text()
+
+
+def test_unit_rules_are_created_from_samples():
+    engine = AlertEngine([], unit_for_seconds=0)
+    state = engine.evaluate(sample(0, units={'xray': False, 'hysteria-server': True}))
+    firing = {rule['name'] for rule in state['firing']}
+    assert firing == {'unit_inactive:xray'}
+
+
+def test_alerts_are_only_evaluated_by_the_leader():
+    from services.shared_state import SharedMonitoring
+    calls = []
+    monitoring = SharedMonitoring()
+    monitoring.register('alerts', lambda: calls.append(1) or {'firing': []}, {'pending': True, 'firing': []})
+    # A follower (or any worker before the first snapshot) serves the placeholder
+    assert monitoring.get('alerts') == {'pending': True, 'firing': []}
+    assert monitoring.get_encoded('alerts').raw == b'{"pending":true,"firing":[]}'
+    assert calls == []
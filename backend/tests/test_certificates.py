@@ -0,0 +1,74 @@
+import datetime
+import multiprocessing
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.x509.oid import NameOID
+
+from services.certificates import CERT_COMMON_NAME, CertificateProvisioner
+
+
+def provision(cert_dir):
+    CertificateProvisioner(cert_dir).ensure()
+
+
+def test_concurrent_workers_publish_one_matching_pair(tmp_path):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=provision, args=(tmp_path,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    certs = CertificateProvisioner(tmp_path)
+    cert_file, key_file = certs.paths()
+    with open(cert_file, 'rb') as f:
+        cert = x509.load_pem_x509_certificate(f.read())
+    with open(key_file, 'rb') as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+    assert cert.public_key().public_numbers() == key.public_key().public_numbers()
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def write_rsa_pair(cert_dir, common_name):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(1)
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    (cert_dir / 'key.pem').write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption()
+    ))
+    (cert_dir / 'cert.pem').write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+
+
+def load_key(cert_dir):
+    return serialization.load_pem_private_key((cert_dir / 'key.pem').read_bytes(), password=None)
+
+
+def test_self_signed_rsa_pair_is_replaced_with_ecdsa(tmp_path):
+    write_rsa_pair(tmp_path, CERT_COMMON_NAME)
+    rotations = []
+    certs = CertificateProvisioner(tmp_path, on_rotated=lambda: rotations.append(True))
+    certs.ensure()
+    assert isinstance(load_key(tmp_path), ec.EllipticCurvePrivateKey)
+    assert rotations == [True]
+
+    certs.ensure()
+    CertificateProvisioner(tmp_path, on_rotated=lambda: rotations.append(True)).ensure()
+    assert rotations == [True]
+
+
+def test_operator_certificate_is_kept(tmp_path):
+    write_rsa_pair(tmp_path, 'proxy.example.com')
+    certs = CertificateProvisioner(tmp_path, on_rotated=lambda: pytest.fail('rotated'))
+    certs.ensure()
+    assert isinstance(load_key(tmp_path), rsa.RSAPrivateKey)
@@ -0,0 +1,23 @@
+from services.conditional import encoded_etag, make_etag, matching_etag
+
+
+def test_gzip_etag_differs_from_identity():
+    etag = make_etag('/api/example', 1)
+    assert encoded_etag(etag, None) == etag
+    assert encoded_etag(etag, 'gzip') == etag[:-1] + '-gzip"'
+
+
+def test_revalidation_matches_any_encoding_of_the_same_content():
+    etag = make_etag('/api/example', 1)
+    gzip_etag = encoded_etag(etag, 'gzip')
+    assert matching_etag(gzip_etag, etag) == gzip_etag
+    assert matching_etag(f'W/{etag}', etag) == etag
+    assert matching_etag(f'"other", {gzip_etag}', etag) == gzip_etag
+    assert matching_etag('*', etag) == etag
+
+
+def test_revalidation_misses_other_content():
+    etag = make_etag('/api/example', 1)
+    newer = encoded_etag(make_etag('/api/example', 2), 'gzip')
+    assert matching_etag(newer, etag) is None
+    assert matching_etag(None, etag) is None
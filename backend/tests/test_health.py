@@ -0,0 +1,60 @@
+import subprocess
+
+import services.health as health
+from services.health import VPNHealthMonitor
+
+
+class StubRouting:
+    def __init__(self, enabled):
+        self.enabled = enabled
+
+    def is_routing_enabled(self):
+        return self.enabled
+
+    def _get_vpn_interface(self):
+        return 'tun0'
+
+
+def probe_with(score):
+    return lambda interface: {'time': '', 'interface': interface, 'loss': 100.0 - score,
+                              'latency_ms': None, 'score': score}
+
+
+def fake_commands(monkeypatch):
+    calls = []
+
+    def run_command(command, **kwargs):
+        calls.append(command)
+        # iptables -C: the standby NAT rule doesn't exist yet
+        return subprocess.CompletedProcess(command, 1 if '-C' in command else 0, '', '')
+
+    monkeypatch.setattr(health, 'run_command', run_command)
+    return calls
+
+
+def test_no_probes_while_routing_disabled(monkeypatch):
+    calls = fake_commands(monkeypatch)
+    monitor = VPNHealthMonitor(StubRouting(enabled=False))
+    monitor.probe = probe_with(0.0)
+    for _ in range(5):
+        assert monitor.check() is None
+    assert calls == []
+    assert monitor.active_route == 'primary'
+    assert not monitor.probe_history
+
+
+def test_recovery_removes_standby_nat(monkeypatch):
+    calls = fake_commands(monkeypatch)
+    monitor = VPNHealthMonitor(StubRouting(enabled=True))
+    monitor.standby_interface = 'wg0'
+    monitor.probe = probe_with(0.0)
+    for _ in range(3):
+        monitor.check()
+    assert monitor.active_route == 'failover'
+    assert ['iptables', '-t', 'nat', '-A', 'POSTROUTING', '-o', 'wg0', '-j', 'MASQUERADE'] in calls
+
+    monitor.probe = probe_with(100.0)
+    for _ in range(6):
+        monitor.check()
+    assert monitor.active_route == 'primary'
+    assert calls[-1] == ['iptables', '-t', 'nat', '-D', 'POSTROUTING', '-o', 'wg0', '-j', 'MASQUERADE']
@@ -0,0 +1,57 @@
+import pytest
+import yaml
+
+from mock_services import FakeHysteriaStatsServer
+from services.hysteria_stats import HysteriaStatsCollector
+
+
+@pytest.fixture
+def stats_server():
+    server = FakeHysteriaStatsServer(secret='s3cret')
+    server.start()
+    yield server
+    server.stop()
+
+
+def collector_for(tmp_path, port, secret):
+    config = tmp_path / 'config.yaml'
+    config.write_text(yaml.safe_dump({'trafficStats': {'listen': f'127.0.0.1:{port}', 'secret': secret}}))
+    collector = HysteriaStatsCollector()
+    collector.config_path = config
+    return collector
+
+
+def test_counters_accumulate_and_clear(tmp_path, stats_server):
+    collector = collector_for(tmp_path, stats_server.port, 's3cret')
+    stats_server.traffic = {'alice': {'tx': 1000, 'rx': 200}}
+    stats_server.online = {'alice': 2, 'bob': 1}
+    first = collector.collect()
+    assert first['online'] == 3
+    assert first['users']['bob'] == {'tx': 0, 'rx': 0, 'online': 1}
+    assert stats_server.traffic == {}  # read with clear=1
+
+    stats_server.traffic = {'alice': {'tx': 3000, 'rx': 800}, 'bob': {'tx': 50, 'rx': 5}}
+    second = collector.collect()
+    assert second['users']['alice']['tx'] > 0
+    stats = collector.get_stats()
+    assert stats['enabled'] and stats['error'] is None
+    assert stats['totals'] == {'alice': {'tx': 4000, 'rx': 1000}, 'bob': {'tx': 50, 'rx': 5}}
+    assert collector.tx_bytes == 4050
+    assert len(collector.get_history()) == 2
+
+
+def test_wrong_secret_is_reported(tmp_path, stats_server):
+    collector = collector_for(tmp_path, stats_server.port, 'wrong')
+    stats_server.traffic = {'alice': {'tx': 1000, 'rx': 200}}
+    assert collector.collect() is None
+    assert '401' in collector.last_error
+    assert collector.tx_bytes == 0
+
+
+def test_disabled_without_traffic_stats(tmp_path):
+    config = tmp_path / 'config.yaml'
+    config.write_text(yaml.safe_dump({'listen': ':36712'}))
+    collector = HysteriaStatsCollector()
+    collector.config_path = config
+    assert collector.collect() is None
+    assert not collector.get_stats()['enabled']
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from mock_services import FakeOpenVPNManagementServer
+from services.openvpn_mgmt import OpenVPNManagementClient
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def management(tmp_path):
+    server = FakeOpenVPNManagementServer(str(tmp_path / 'mgmt.sock'))
+    server.start()
+    client = OpenVPNManagementClient(server.socket_path, bytecount_interval=5)
+    client.start()
+    yield server, client
+    client.stop()
+    server.stop()
+
+
+def test_subscribes_and_reads_current_state(management):
+    server, client = management
+    assert wait_until(lambda: client.state == 'CONNECTED')
+    assert server.commands[:3] == ['state on', 'state', 'bytecount 5']
+    stats = client.get_stats()
+    assert stats['attached'] and stats['connected']
+    assert stats['tunnel_ip'] == '10.8.0.6'
+    assert stats['remote_ip'] == '203.0.113.10'
+    assert stats['connected_since'] == 1700000000
+
+
+def test_state_notifications_count_reconnects(management):
+    server, client = management
+    assert wait_until(lambda: client.state == 'CONNECTED')
+    server.push_state('RECONNECTING', 'ping-restart')
+    assert wait_until(lambda: client.state == 'RECONNECTING')
+    assert client.tunnel_ip is None
+    assert client.state_detail == 'ping-restart'
+    server.push_state('CONNECTED', 'SUCCESS', '10.8.0.10', '203.0.113.20')
+    assert wait_until(lambda: client.state == 'CONNECTED')
+    assert client.reconnects == 1
+    assert client.tunnel_ip == '10.8.0.10'
+
+
+def test_bytecount_totals_and_rates(management):
+    server, client = management
+    assert wait_until(lambda: client.attached and client.state == 'CONNECTED')
+    server.push_bytecount(1000, 500)
+    assert wait_until(lambda: client.bytes_in == 1000)
+    time.sleep(0.1)
+    server.push_bytecount(11000, 2500)
+    assert wait_until(lambda: client.bytes_in == 11000)
+    stats = client.get_stats()
+    assert stats['bytes_out'] == 2500
+    assert 0 < stats['rate_out'] < stats['rate_in']
+
+
+def test_reply_lines_without_prefix():
+    client = OpenVPNManagementClient('/nonexistent')
+    client.handle_line('>INFO:OpenVPN Management Interface Version 3')
+    client.handle_line('SUCCESS: bytecount interval changed')
+    assert client.state is None
+    client.handle_line('1700000000,WAIT,,,,,,')
+    assert client.state == 'WAIT'
+    client.handle_line('>BYTECOUNT:not,numbers')
+    assert client.bytes_in == 0
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from services import user_store
+from services.user_store import HysteriaUserStore, VLESSUserStore
+
+
+def test_replays_delete_records_in_both_formats(tmp_path):
+    path = tmp_path / 'vless_users.jsonl'
+    records = [
+        {'op': 'put', 'user': {'uuid': 'a', 'email': 'a@x', 'enabled': True}},
+        {'op': 'put', 'user': {'uuid': 'b', 'email': 'b@x', 'enabled': True}},
+        {'op': 'put', 'user': {'uuid': 'c', 'email': 'c@x', 'enabled': True}},
+        {'op': 'del', 'uuid': 'a'},
+        {'op': 'del', 'key': 'b'},
+    ]
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    store = VLESSUserStore(path)
+    assert [user['uuid'] for user in store.list()] == ['c']
+    assert store.get_by_email('a@x') is None
+
+
+def test_set_password_replaces_in_place(tmp_path):
+    store = HysteriaUserStore(tmp_path / 'hysteria_users.jsonl')
+    created = store.set_password('default', 'first')['created']
+    store.set_password('default', 'second')
+    assert store.authenticate('first') is None
+    assert store.authenticate('second') == 'default'
+    assert store.get('default')['created'] == created
+    assert HysteriaUserStore(store.path).authenticate('second') == 'default'
+
+
+def test_set_password_taken_keeps_the_old_one(tmp_path):
+    store = HysteriaUserStore(tmp_path / 'hysteria_users.jsonl')
+    store.set_password('default', 'first')
+    store.add('alice', 'secret')
+    with pytest.raises(ValueError):
+        store.set_password('default', 'secret')
+    assert store.authenticate('first') == 'default'
+    assert store.authenticate('secret') == 'alice'
+
+
+def test_auth_reads_memory_between_refreshes(tmp_path, monkeypatch):
+    path = tmp_path / 'hysteria_users.jsonl'
+    worker = HysteriaUserStore(path)
+    other = HysteriaUserStore(path)
+    other.add('alice', 'secret')
+
+    clock = [1000.0]
+    monkeypatch.setattr(user_store.time, 'monotonic', lambda: clock[0])
+    assert worker.authenticate('secret') == 'alice'  # first read refreshes
+
+    stats = []
+    real_stat = user_store.os.stat
+    monkeypatch.setattr(user_store.os, 'stat', lambda *a, **k: stats.append(a) or real_stat(*a, **k))
+    other.add('bob', 'hunter2')
+    stats.clear()
+    for _ in range(100):
+        assert worker.authenticate('hunter2') is None
+    assert stats == []
+
+    clock[0] += user_store.REFRESH_INTERVAL
+    assert worker.authenticate('hunter2') == 'bob'
@@ -0,0 +1,64 @@
+import grpc
+import pytest
+
+from mock_services import FakeXrayAPIServer
+from services.xray_api import VLESS_ACCOUNT, XrayAPIClient, decode_message, encode_message, vless_user
+
+TAG = 'vless-in'
+UUID = '11111111-2222-4333-8444-555555555555'
+
+
+@pytest.fixture
+def xray():
+    server = FakeXrayAPIServer()
+    port = server.start()
+    client = XrayAPIClient(f'127.0.0.1:{port}')
+    yield server, client
+    client.close()
+    server.stop()
+
+
+def test_wire_format_matches_protobuf():
+    # Reference encodings from the protobuf docs: 150 is 0x96 0x01
+    assert encode_message((1, 150)) == b'\x08\x96\x01'
+    assert encode_message((2, 'testing')) == b'\x12\x07testing'
+    assert encode_message((1, ''), (2, 0), (3, None)) == b''
+    assert decode_message(b'\x08\x96\x01\x12\x07testing') == [(1, 150), (2, b'testing')]
+    assert decode_message(encode_message((2, 2 ** 40))) == [(2, 2 ** 40)]
+
+
+def test_vless_user_layout():
+    account = b'\x0a\x24' + UUID.encode() + b'\x12\x10xtls-rprx-vision\x1a\x04none'
+    typed = b'\x0a' + bytes([len(VLESS_ACCOUNT)]) + VLESS_ACCOUNT.encode() + b'\x12' + bytes([len(account)]) + account
+    assert vless_user(UUID, 'a@x') == b'\x12\x03a@x\x1a' + bytes([len(typed)]) + typed
+
+
+def test_add_and_remove_user(xray):
+    server, client = xray
+    client.add_vless_user(TAG, UUID, 'a@x')
+    assert server.clients[TAG] == {'a@x': UUID}
+    with pytest.raises(grpc.RpcError):
+        client.add_vless_user(TAG, UUID, 'a@x')
+
+    client.remove_user(TAG, 'a@x')
+    assert server.clients[TAG] == {}
+    with pytest.raises(grpc.RpcError):
+        client.remove_user(TAG, 'a@x')
+    assert server.requests == [('add', TAG, 'a@x'), ('remove', TAG, 'a@x')]
+
+
+def test_query_stats_pattern_and_reset(xray):
+    server, client = xray
+    server.stats = {
+        'user>>>a@x>>>traffic>>>uplink': 100,
+        'user>>>a@x>>>traffic>>>downlink': 5 * 2 ** 32,
+        'inbound>>>vless-in>>>traffic>>>uplink': 7,
+    }
+    stats = client.query_stats('user>>>')
+    assert stats == {'user>>>a@x>>>traffic>>>uplink': 100, 'user>>>a@x>>>traffic>>>downlink': 5 * 2 ** 32}
+    assert client.query_stats('user>>>') == stats  # no reset: unchanged
+
+    assert client.query_stats('user>>>', reset=True) == stats
+    assert set(client.query_stats('user>>>').values()) == {0}
+    assert server.stats['inbound>>>vless-in>>>traffic>>>uplink'] == 7
+    assert server.requests[-2:] == [('query_stats', 'user>>>', True), ('query_stats', 'user>>>', False)]
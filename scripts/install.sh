@@ -143,7 +143,10 @@ Type=simple
 User=root
 WorkingDirectory=/opt/proxyvault/backend
 Environment="PATH=/opt/proxyvault/venv/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
-ExecStart=/opt/proxyvault/venv/bin/python app.py
+ExecStart=/opt/proxyvault/venv/bin/python app.py --production
+# Private in-memory dir for the workers' shared monitoring snapshot
+RuntimeDirectory=proxyvault
+RuntimeDirectoryMode=0700
 Restart=on-failure
 RestartSec=5s
 